@@ -1,6 +1,208 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+
+from .cache import bump_game_versions
+from .changes import record_changes
+from .classify import classify_games
+from .facets import detail_tag_values, release_details, restore_details, set_detail_tags
+from .ingest import delete_games
 from .models import SteamGame, SteamGameDetail
+from .search import name_match
+from .stats import read_stats, track_stats
+from .titleindex import update_title_index
+from .workqueue import queue_refetch
+
+# Changelists count exactly up to this many rows, beyond that the count is an estimate
+EXACT_COUNT_LIMIT = 10000
+
+
+def estimated_rows(model):
+    """
+    Cheap row count estimate of the whole table of `model`: the planner statistics on Postgres, the catalog
+    counters for SteamGame elsewhere. None when there is no estimate.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+            row = cursor.fetchone()
+        # -1 until the table was analyzed once
+        if row and row[0] > 0:
+            return row[0]
+    if model is SteamGame:
+        stats = read_stats()
+        return stats.get("games", 0) + stats.get("removed", 0)
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Changelist paginator that never counts more than EXACT_COUNT_LIMIT rows. A bigger unfiltered list shows the
+    table estimate, a bigger filtered one is cut at the limit (the last pages stay reachable through the filters).
+    """
+    @cached_property
+    def count(self):
+        exact = self.object_list.values("pk")[:EXACT_COUNT_LIMIT + 1].count()
+        if exact <= EXACT_COUNT_LIMIT:
+            return exact
+        if not self.object_list.query.has_filters():
+            estimate = estimated_rows(self.object_list.model)
+            if estimate:
+                return max(estimate, exact)
+        return exact
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for the catalog sized tables: estimated counts, no full COUNT for "x results (y total)",
+    no facet counts next to the filters, and a set-based delete action instead of delete_selected, which loads
+    every selected row and deletes them one by one.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    list_per_page = 100
+    # attribute holding the SteamGame appid of a row
+    appid_attname = "appid"
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+    def save_model(self, request, obj, form, change):
+        # edits from the change form reach the catalog counters, the cached pages and the change feed too
+        appid = getattr(obj, self.appid_attname)
+        with track_stats([appid]):
+            super().save_model(request, obj, form, change)
+            self.save_catalog(obj, form, change)
+        bump_game_versions([appid])
+        record_changes([appid])
+
+    def save_catalog(self, obj, form, change):
+        """
+        The writes to the other catalog rows that go with saving `obj`, counted along with it.
+        """
+
+
+@admin.register(SteamGame)
+class SteamGameAdmin(LargeTableAdmin):
+    list_display = ("appid", "name", "has_details", "is_non_game", "non_game_reason", "is_removed")
+    list_filter = ("has_details", "is_non_game", "is_removed", "details_stale")
+    # get_search_results replaces the LIKE '%term%' scans, search_fields only turns the search box on
+    search_fields = ("name",)
+    search_help_text = "An appid, or the (start of the) game name."
+    ordering = ("appid",)
+    readonly_fields = ("search_name", "is_non_game", "non_game_reason", "content_hash", "sync_generation")
+    actions = ("refetch_details", "reclassify", "delete_selected_games")
+
+    def save_catalog(self, obj, form, change):
+        if change and "is_removed" in form.changed_data:
+            details = SteamGameDetail.objects.filter(steam_game_id=obj.appid)
+            if obj.is_removed:
+                release_details(details)
+            else:
+                restore_details(details)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change or {"name", "is_removed"}.intersection(form.changed_data):
+            if obj.is_removed:
+                update_title_index(deletes=[obj.appid])
+            else:
+                update_title_index(upserts=[(obj.appid, obj.name)])
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if search_term.isdigit():
+            return queryset.filter(appid=int(search_term)), False
+        match = name_match(search_term)
+        return (queryset.none() if match is None else queryset.filter(match)), False
+
+    @admin.action(description="Refetch the details of the selected games (queued for the crawler)")
+    def refetch_details(self, request, queryset):
+        queued = queue_refetch(list(queryset.filter(is_removed=False).values_list("appid", flat=True)))
+        self.message_user(request, f"Queued {queued} games for a detail fetch, follow them at /crawl-status/.")
+
+    @admin.action(description="Re-run the non-game classifier on the selected games")
+    def reclassify(self, request, queryset):
+        changes = []
+        with track_stats(queryset.values_list("appid", flat=True)):
+            changed = classify_games(queryset, changes=changes)
+        bump_game_versions(changes)
+        record_changes(changes)
+        self.message_user(request, f"Reclassified {changed} games.")
+
+    @admin.action(description="Delete the selected games and their details")
+    def delete_selected_games(self, request, queryset):
+        deleted = self.delete_queryset(request, queryset)
+        self.message_user(request, f"Deleted {len(deleted)} games.")
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, SteamGame.objects.filter(appid=obj.appid))
+
+    def delete_queryset(self, request, queryset):
+        return delete_games(queryset)
+
+
+@admin.register(SteamGameDetail)
+class SteamGameDetailAdmin(LargeTableAdmin):
+    list_display = ("name", "steam_game", "is_game", "is_free", "developers")
+    # the steam_game column is rendered from the joined row instead of one query per line
+    list_select_related = ("steam_game",)
+    list_filter = ("is_game", "is_free")
+    search_fields = ("name",)
+    search_help_text = "An appid, or the (start of the) game name."
+    ordering = ("steam_game_id",)
+    # a plain appid input, the default select would list the whole catalog
+    raw_id_fields = ("steam_game",)
+    actions = ("refetch_details", "delete_details")
+    appid_attname = "steam_game_id"
+    # the columns the genre/category/developer links are built from, and is_game which decides if there are any
+    tag_fields = {"genres", "categories", "developers", "is_game"}
+
+    def get_readonly_fields(self, request, obj=None):
+        # moving details to another game would leave the first one flagged has_details
+        return ("steam_game",) if obj is not None else ()
+
+    def save_catalog(self, obj, form, change):
+        # the same bookkeeping as a crawled detail (store_app_details): the game has its details, fresh ones
+        SteamGame.objects.filter(appid=obj.steam_game_id).update(has_details=True, details_stale=False)
+        if not change or self.tag_fields.intersection(form.changed_data):
+            # relinks the detail: the old tags are taken off the facet counters, the edited ones added
+            set_detail_tags([(obj.pk, detail_tag_values(obj))])
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if search_term.isdigit():
+            return queryset.filter(steam_game_id=int(search_term)), False
+        match = name_match(search_term, "steam_game__search_name")
+        return (queryset.none() if match is None else queryset.filter(match)), False
+
+    @admin.action(description="Refetch the selected details (queued for the crawler)")
+    def refetch_details(self, request, queryset):
+        queued = queue_refetch(list(queryset.values_list("steam_game_id", flat=True)))
+        self.message_user(request, f"Queued {queued} games for a detail fetch, follow them at /crawl-status/.")
+
+    @admin.action(description="Delete the selected details (the games stay, without details)")
+    def delete_details(self, request, queryset):
+        appids = self.delete_queryset(request, queryset)
+        self.message_user(request, f"Deleted the details of {len(appids)} games.")
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, SteamGameDetail.objects.filter(pk=obj.pk))
 
-# Register your models here.
-admin.site.register(SteamGame)
-admin.site.register(SteamGameDetail)
+    def delete_queryset(self, request, queryset):
+        appids = list(queryset.values_list("steam_game_id", flat=True))
+        with track_stats(appids):
+            SteamGame.objects.filter(details__in=queryset.values("pk")).update(has_details=False, details_stale=False)
+            release_details(queryset)
+            queryset.delete()
+        bump_game_versions(appids)
+        record_changes(appids)
+        return appids
@@ -0,0 +1,129 @@
+import json
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always there
+    zstandard = None
+
+from django.db import connections
+
+from .cache import bump_game_versions
+from .changes import record_changes
+from .facets import set_detail_tags, tag_values
+from .models import AppDetailsArchive, SteamGameDetail
+from .stats import track_stats
+
+# First byte of every archived blob tells which codec compressed it
+ZLIB = b"z"
+ZSTD = b"s"
+REPROCESS_BATCH_SIZE = 500
+# detail columns that also have normalized tables, rebuilding one of them relinks the tags
+TAG_FIELDS = {"genres", "categories", "developers"}
+
+
+def compress_payload(details):
+    raw = json.dumps(details, separators=(",", ":")).encode()
+    if zstandard is not None:
+        return ZSTD + zstandard.ZstdCompressor(level=10).compress(raw)
+    return ZLIB + zlib.compress(raw, 6)
+
+
+def decompress_payload(blob):
+    blob = bytes(blob)
+    codec, data = blob[:1], blob[1:]
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("This payload was archived with zstd, install the zstandard package to read it.")
+        return json.loads(zstandard.ZstdDecompressor().decompress(data))
+    return json.loads(zlib.decompress(data))
+
+
+def archive_app_details(appid, details):
+    """
+    Keep the raw appdetails payload of `appid`, replacing the previous one.
+    """
+    AppDetailsArchive.objects.update_or_create(appid=appid, defaults={"payload": compress_payload(details)})
+
+
+def detail_fields(details):
+    """
+    The SteamGameDetail column values for an appdetails payload. Shared by the crawl and the archive reprocessing
+    so both always build the same row.
+    """
+    return dict(
+        name=details.get("name", ""),
+        is_game=details.get("type", "") == "game",
+        required_age=details.get("required_age", ""),
+        header_image=details.get("header_image", ""),# header image for the game to be used in the frontend
+        about_the_game=details.get("short_description", ""),
+        is_free=details.get("is_free", False),
+        developers=", ".join(details.get("developers", [])),
+        genres=", ".join([genre["description"] for genre in details.get("genres", [])]),
+        categories=details.get("categories", []),
+    )
+
+
+def _rebuild_batch(rows, fields):
+    # Runs in a worker process: decompress and parse only, no database access
+    rebuilt = []
+    for appid, blob in rows:
+        details = decompress_payload(blob)
+        values = detail_fields(details)
+        rebuilt.append((appid, ({field: values[field] for field in fields}, tag_values(details))))
+    return rebuilt
+
+
+def _archived_batches(batch_size):
+    last_appid = None
+    while True:
+        rows = AppDetailsArchive.objects.order_by("appid")
+        if last_appid is not None:
+            rows = rows.filter(appid__gt=last_appid)
+        rows = list(rows.values_list("appid", "payload")[:batch_size])
+        if not rows:
+            return
+        yield [(appid, bytes(blob)) for appid, blob in rows]
+        last_appid = rows[-1][0]
+
+
+def reprocess_archive(fields=None, workers=None, batch_size=REPROCESS_BATCH_SIZE, report=None):
+    """
+    Rebuild `fields` (all the detail columns by default) of every SteamGameDetail from the archived payloads.
+    Decompressing and parsing run in a process pool, the main process only reads batches and bulk updates them.
+    Returns the number of detail rows updated.
+    """
+    fields = list(fields or detail_fields({}).keys())
+    updated = 0
+    # forked workers must not share the parent's database socket
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        window = (workers or os.cpu_count() or 1) * 2
+        pending = deque()
+        batches = _archived_batches(batch_size)
+        while True:
+            # keep every worker busy while the main process writes, without reading the whole archive ahead
+            for rows in islice(batches, window - len(pending)):
+                pending.append(executor.submit(_rebuild_batch, rows, fields))
+            if not pending:
+                break
+            rebuilt = dict(pending.popleft().result())
+            details = list(SteamGameDetail.objects.filter(steam_game_id__in=rebuilt.keys()).only("pk", "steam_game_id"))
+            for detail in details:
+                for field, value in rebuilt[detail.steam_game_id][0].items():
+                    setattr(detail, field, value)
+            # is_free and is_game feed the catalog counters
+            with track_stats(rebuilt):
+                SteamGameDetail.objects.bulk_update(details, fields)
+            if TAG_FIELDS.intersection(fields):
+                set_detail_tags((detail.pk, rebuilt[detail.steam_game_id][1]) for detail in details)
+            bump_game_versions(detail.steam_game_id for detail in details)
+            record_changes(detail.steam_game_id for detail in details)
+            updated += len(details)
+            if report:
+                report(updated)
+    return updated
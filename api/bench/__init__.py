@@ -0,0 +1,4 @@
+"""
+Benchmark harness: synthetic catalogs (catalog.py), a local stand-in for the Steam endpoints (stub.py) and the
+benchmark suite run by `manage.py run_benchmarks` (suite.py).
+"""
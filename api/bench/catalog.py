@@ -0,0 +1,86 @@
+import random
+
+from ..archive import detail_fields
+from ..changes import record_changes
+from ..facets import set_detail_tags, tag_values
+from ..ingest import build_game
+from ..models import SteamGame, SteamGameDetail
+from ..stats import track_stats
+
+WORDS = [
+    'Dark', 'Souls', 'Legend', 'Quest', 'Star', 'Empire', 'Space', 'Dungeon', 'Hero', 'Kingdom', 'Shadow', 'Night',
+    'Racing', 'Simulator', 'Tactics', 'War', 'Dragon', 'City', 'Farm', 'Zombie', 'Survival', 'Island', 'Galaxy',
+    'Knight', 'Puzzle', 'Castle', 'Ocean', 'Rogue', 'Tower', 'Defense', 'Pixel', 'Storm', 'Fallen', 'Crystal',
+]
+# a share of the names get a suffix the non-game classifier picks up, like the real app list
+NON_GAME_SUFFIXES = ['Soundtrack', 'DLC', 'Demo', 'Season Pass Pack', 'Dedicated Server', 'Artbook']
+GENRES = ['Action', 'Adventure', 'RPG', 'Indie', 'Strategy', 'Simulation', 'Casual', 'Racing', 'Sports']
+CATEGORIES = [(1, 'Multi-player'), (2, 'Single-player'), (9, 'Co-op'), (22, 'Steam Achievements'), (29, 'Steam Trading Cards')]
+DEVELOPERS = [f'Studio {index}' for index in range(500)]
+
+
+def synthetic_name(appid, seed=0):
+    rng = random.Random(appid * 7919 + seed)
+    name = ' '.join(rng.sample(WORDS, rng.randint(1, 3)))
+    if rng.random() < 0.15:
+        name += f' {rng.choice(NON_GAME_SUFFIXES)}'
+    elif rng.random() < 0.3:
+        name += f' {rng.randint(2, 5)}'
+    return name
+
+
+def synthetic_app(appid, seed=0):
+    return {'appid': appid, 'name': synthetic_name(appid, seed)}
+
+
+def synthetic_details(appid, seed=0):
+    """
+    Deterministic appdetails `data` payload for an appid, shaped like the real store API answer.
+    """
+    rng = random.Random(appid * 104729 + seed)
+    name = synthetic_name(appid, seed)
+    return {
+        'type': 'game' if rng.random() < 0.9 else 'dlc',
+        'name': name,
+        'steam_appid': appid,
+        'required_age': rng.choice([0, 0, 0, 13, 18]),
+        'is_free': rng.random() < 0.2,
+        'short_description': f'{name} is a synthetic game generated for benchmarks.',
+        'header_image': f'https://cdn.example.com/apps/{appid}/header.jpg',
+        'developers': rng.sample(DEVELOPERS, rng.randint(1, 2)),
+        'genres': [{'id': str(index), 'description': genre} for index, genre in enumerate(rng.sample(GENRES, rng.randint(1, 3)))],
+        'categories': [{'id': key, 'description': value} for key, value in rng.sample(CATEGORIES, rng.randint(1, 3))],
+    }
+
+
+def generate_catalog(size, detail_ratio=0.3, start_appid=1, seed=0, batch_size=5000, report=None):
+    """
+    Insert `size` synthetic SteamGame rows from `start_appid` on, with SteamGameDetail rows (and their tags)
+    for roughly `detail_ratio` of them. Returns (games, details) inserted.
+    """
+    games_total = details_total = 0
+    for start in range(start_appid, start_appid + size, batch_size):
+        appids = range(start, min(start + batch_size, start_appid + size))
+        rng = random.Random(start + seed)
+        with_details = {appid for appid in appids if rng.random() < detail_ratio}
+        with track_stats(appids):
+            SteamGame.objects.bulk_create(
+                [build_game(synthetic_app(appid, seed), has_details=appid in with_details) for appid in appids],
+                ignore_conflicts=True,
+            )
+            payloads = {appid: synthetic_details(appid, seed) for appid in with_details}
+            details = SteamGameDetail.objects.bulk_create(
+                [SteamGameDetail(steam_game_id=appid, **detail_fields(payload)) for appid, payload in payloads.items()],
+                ignore_conflicts=True,
+            )
+            # bulk_create only returns primary keys on some databases, so read them back
+            detail_ids = dict(
+                SteamGameDetail.objects.filter(steam_game_id__in=with_details).values_list('steam_game_id', 'pk')
+            )
+            set_detail_tags((detail_ids[appid], tag_values(payload)) for appid, payload in payloads.items())
+        record_changes(appids)
+        games_total += len(appids)
+        details_total += len(details)
+        if report:
+            report(games_total, details_total)
+    return games_total, details_total
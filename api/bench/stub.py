@@ -0,0 +1,119 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .catalog import synthetic_app, synthetic_details
+
+
+class _Server(ThreadingHTTPServer):
+    # the default listen backlog of 5 drops connections when hundreds of async calls open at once
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class SteamStub:
+    """
+    Local stand-in for GetAppList and appdetails, serving a synthetic catalog of `size` apps from `start_appid` on.
+    Every answer waits `latency` seconds, and `error_rate` of the appdetails calls get a 429 like the real quota.
+    Use it as a context manager, `url` is the base to put in STEAM_WEB_API_URL / STEAM_STORE_URL.
+    """
+    def __init__(self, size, start_appid=1, latency=0.0, error_rate=0.0, seed=0, missing_rate=0.05):
+        self.size = size
+        self.start_appid = start_appid
+        self.latency = latency
+        self.error_rate = error_rate
+        self.missing_rate = missing_rate
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.server = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.server = _Server(("127.0.0.1", 0), self._handler())
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _count(self, throttle=False):
+        with self.lock:
+            self.requests += 1
+            if throttle and self.rng.random() < self.error_rate:
+                self.throttled += 1
+                return True
+        return False
+
+    def app_list_chunks(self, apps_per_chunk=1000):
+        yield b'{"applist":{"apps":['
+        appids = range(self.start_appid, self.start_appid + self.size)
+        for start in range(0, len(appids), apps_per_chunk):
+            chunk = ",".join(json.dumps(synthetic_app(appid, self.seed)) for appid in appids[start:start + apps_per_chunk])
+            yield (b"," if start else b"") + chunk.encode()
+        yield b"]}}"
+
+    def app_details(self, appids, filters):
+        payload = {}
+        for appid in appids:
+            in_catalog = self.start_appid <= appid < self.start_appid + self.size
+            if not in_catalog or random.Random(appid + self.seed).random() < self.missing_rate:
+                payload[str(appid)] = {"success": False}
+                continue
+            data = synthetic_details(appid, self.seed)
+            if filters == "price_overview":
+                data = [] if data["is_free"] else {"price_overview": {"currency": "USD", "final": 999}}
+            payload[str(appid)] = {"success": True, "data": data}
+        return payload
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, body):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if stub.latency:
+                    time.sleep(stub.latency)
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path.rstrip("/") == "/ISteamApps/GetAppList/v2":
+                    stub._count()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for chunk in stub.app_list_chunks():
+                        self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                elif url.path == "/api/appdetails":
+                    if stub._count(throttle=True):
+                        self.send_json(429, b"null")
+                        return
+                    appids = [int(appid) for appid in query.get("appids", [""])[0].split(",") if appid]
+                    filters = query.get("filters", [""])[0]
+                    self.send_json(200, json.dumps(stub.app_details(appids, filters)).encode())
+                else:
+                    self.send_json(404, b"null")
+
+        return Handler
@@ -0,0 +1,179 @@
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+from django.test import Client, override_settings
+
+from ..crawler import DetailCrawler
+from ..ingest import app_list_url, ingest_app_list, iter_app_list
+from ..models import SteamGame
+from ..search import autocomplete, search_games
+from ..stats import reconcile_stats
+from ..sync import sync_catalog
+from ..titleindex import TitleIndex, build_title_index
+from .catalog import WORDS, generate_catalog
+from .stub import SteamStub
+
+# Metrics whose name ends like this are better when higher, every other metric (seconds, ms) when lower
+HIGHER_IS_BETTER = ("_per_sec",)
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+
+
+def _latencies(calls):
+    """
+    Run every callable in `calls`, return p50/p95 in ms and the calls per second.
+    """
+    samples = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1 if len(samples) > 1 else 0], 3),
+        "calls_per_sec": round(len(samples) / (sum(samples) / 1000), 1),
+    }
+
+
+def _ingest(report):
+    with requests.get(app_list_url(), stream=True) as response, Timer() as timer:
+        stats = ingest_app_list(iter_app_list(response.iter_content(chunk_size=64 * 1024)))
+    total = sum(stats.values())
+    report(f"ingested {total} apps in {timer.seconds:.2f}s")
+    return {"seconds": round(timer.seconds, 3), "apps_per_sec": round(total / timer.seconds, 1), **stats}
+
+
+def _walk_pages(client, url, pages):
+    rows = 0
+    after = None
+    with Timer() as timer:
+        for _ in range(pages):
+            response = client.get(url, {"page_size": 100, **({"after": after} if after else {})})
+            if url.startswith("/api/"):
+                payload = json.loads(response.content)
+                rows += len(payload["results"])
+                after = payload["next"]
+            else:
+                rows += response.content.count(b'class="game-card"')
+                after = response.context["next_cursor"] if response.context else None
+            if not after:
+                break
+    return {"seconds": round(timer.seconds, 3), "rows_per_sec": round(rows / timer.seconds, 1)}
+
+
+def run_suite(size=10_000, detail_ratio=0.3, crawl_sample=500, queries=200, latency=0.0, error_rate=0.0,
+              workers=8, report=print):
+    """
+    Run every benchmark against the current (throwaway) database and a local SteamStub. Returns the results dict
+    that run_benchmarks writes as JSON.
+    """
+    results = {}
+    rng = random.Random(0)
+    crawl_start = size + 1
+    # the stub serves the catalog plus a range of apps that are only crawled, never ingested from the list
+    with SteamStub(size + crawl_sample, latency=latency, error_rate=error_rate) as stub, \
+            tempfile.TemporaryDirectory() as tmp, \
+            override_settings(
+                STEAM_WEB_API_URL=stub.url, STEAM_STORE_URL=stub.url, TITLE_INDEX_PATH=Path(tmp) / "title_index.bin"
+            ):
+        stub.size = size
+        report(f"Steam stand-in listening on {stub.url}")
+        results["ingest_full"] = _ingest(report)
+        results["ingest_unchanged"] = _ingest(report)
+
+        with requests.get(app_list_url(), stream=True) as response, Timer() as timer:
+            run = sync_catalog(iter_app_list(response.iter_content(chunk_size=64 * 1024)))
+        results["sync_unchanged"] = {
+            "seconds": round(timer.seconds, 3), "apps_per_sec": round(size / timer.seconds, 1), "changed": run.changed,
+        }
+
+        # details for a share of the catalog, written directly since crawling them all would measure the stub
+        SteamGame.objects.all().delete()
+        with Timer() as timer:
+            generate_catalog(size, detail_ratio=detail_ratio)
+        results["catalog_bulk_load"] = {"seconds": round(timer.seconds, 3), "apps_per_sec": round(size / timer.seconds, 1)}
+        report(f"loaded a {size} game synthetic catalog in {timer.seconds:.2f}s")
+
+        stub.size = size + crawl_sample
+        SteamGame.objects.bulk_create(
+            [SteamGame(appid=appid, name=f"Crawl target {appid}") for appid in range(crawl_start, crawl_start + crawl_sample)]
+        )
+        # the wipe and the crawl targets bypass the tracked write paths
+        reconcile_stats()
+        crawler = DetailCrawler(workers=workers, rate=1_000_000, burst=1_000, backoff=0.05)
+        with Timer() as timer:
+            stats = crawler.run(limit=crawl_sample)
+        results["crawl"] = {
+            "seconds": round(timer.seconds, 3),
+            "apps_per_sec": round(stats.processed / timer.seconds, 1),
+            "errors": stats.errors,
+            "throttled": stub.throttled,
+        }
+        report(f"crawled {stats.processed} apps in {timer.seconds:.2f}s")
+
+        terms = [" ".join(rng.sample(WORDS, rng.randint(1, 2))).lower() for _ in range(queries)]
+        typos = [term[:-1] + "x" if len(term) > 4 else term for term in terms]
+        results["search"] = _latencies(lambda term=term: search_games(term, limit=20) for term in terms)
+        results["search_typo"] = _latencies(lambda term=term: search_games(term, limit=20) for term in typos)
+        prefixes = [term[:rng.randint(2, 5)] for term in terms]
+        results["autocomplete_db"] = _latencies(lambda prefix=prefix: autocomplete(prefix) for prefix in prefixes)
+        with Timer() as timer:
+            build_title_index()
+        index = TitleIndex(Path(tmp) / "title_index.bin")
+        results["autocomplete_mmap"] = {
+            "build_seconds": round(timer.seconds, 3),
+            **_latencies(lambda prefix=prefix: index.prefix(prefix) for prefix in prefixes),
+        }
+        index.close()
+        report("search done")
+
+        client = Client()
+        results["list_html"] = _walk_pages(client, "/games/", pages=20)
+        results["list_json"] = _walk_pages(client, "/api/games/", pages=20)
+        results["detail_json"] = _latencies(
+            lambda appid=appid: client.get(f"/api/games/{appid}/") for appid in rng.sample(range(1, size + 1), 100)
+        )
+        report("listing done")
+
+        with Timer() as timer:
+            client.get("/delete-obvious-non-games/")
+        deleted = size + crawl_sample - SteamGame.objects.count()
+        results["delete_obvious_non_games"] = {
+            "seconds": round(timer.seconds, 3), "rows_per_sec": round(deleted / timer.seconds, 1), "deleted": deleted,
+        }
+        report(f"deleted {deleted} obvious non-games in {timer.seconds:.2f}s")
+    return results
+
+
+def check_regressions(results, baseline, threshold):
+    """
+    Compare every metric present in both runs. Returns a message for each one that got worse by more than
+    `threshold` (0.2 = 20%). Counters (inserted, errors, ...) are not performance metrics and are skipped.
+    """
+    failures = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(name, {}).get(metric)
+            timed = metric.endswith(HIGHER_IS_BETTER) or metric.endswith(("_ms", "seconds"))
+            if not timed or not old or not isinstance(value, (int, float)):
+                continue
+            if metric.endswith(HIGHER_IS_BETTER):
+                change = (old - value) / old
+            else:
+                change = (value - old) / old
+            if change > threshold:
+                failures.append(f"{name}.{metric}: {old} -> {value} ({change:+.0%} worse)")
+    return failures
@@ -0,0 +1,90 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+
+LOCAL_ALIAS = "default"
+SHARED_ALIAS = "shared"
+RESPONSE_TIMEOUT = getattr(settings, "GAME_CACHE_TIMEOUT", 60 * 60)
+
+
+def _tiers():
+    # (cache, timeout) fastest first. The local tier keeps its short default timeout because without a shared tier
+    # a bump made by another process (the crawler) never reaches it.
+    tiers = [(caches[LOCAL_ALIAS], DEFAULT_TIMEOUT)]
+    if SHARED_ALIAS in settings.CACHES:
+        tiers.append((caches[SHARED_ALIAS], RESPONSE_TIMEOUT))
+    return tiers
+
+
+def _version_cache():
+    # Versions must be seen by every process, so they live in the shared tier whenever there is one
+    return caches[SHARED_ALIAS] if SHARED_ALIAS in settings.CACHES else caches[LOCAL_ALIAS]
+
+
+def _version_key(appid):
+    return f"game:{appid}:version"
+
+
+def game_version(appid):
+    """
+    Current cache version of a game. Versions are random tokens rather than counters, so a version lost to
+    eviction can never come back and make an old cached response current again.
+    """
+    cache = _version_cache()
+    version = cache.get(_version_key(appid))
+    if version is None:
+        version = uuid.uuid4().hex[:12]
+        # add() so two processes starting a version at the same time agree on one
+        if not cache.add(_version_key(appid), version, timeout=None):
+            version = cache.get(_version_key(appid), version)
+    return version
+
+
+def bump_game_versions(appids):
+    """
+    Invalidate every cached response of these games. Call it after anything that changes a SteamGame or its details.
+    A None appid (an instance whose pk was cleared by delete()) raises ValueError instead of silently bumping nothing.
+    """
+    appids = list(appids)
+    if None in appids:
+        raise ValueError("Cannot bump the cache version of a game without an appid.")
+    if appids:
+        _version_cache().set_many(
+            {_version_key(appid): uuid.uuid4().hex[:12] for appid in appids}, timeout=None
+        )
+
+
+def cached_game_response(request, appid, kind, render, content_type="text/html; charset=utf-8"):
+    """
+    Serve `render()` (which returns the response body as bytes) for one game through the cache tiers:
+    in-process LRU first, then the shared cache, rendering only on a miss. The key carries the game's version,
+    so a bump makes every old entry unreachable. Answers If-None-Match with 304 from the cached ETag.
+    """
+    key = f"game:{appid}:{kind}:{game_version(appid)}"
+    tiers = _tiers()
+    entry = None
+    for depth, (cache, _) in enumerate(tiers):
+        entry = cache.get(key)
+        if entry is not None:
+            # refill the faster tiers that missed
+            for faster, timeout in tiers[:depth]:
+                faster.set(key, entry, timeout)
+            break
+    if entry is None:
+        body = render()
+        entry = (f'"{hashlib.md5(body).hexdigest()}"', body)
+        for cache, timeout in tiers:
+            cache.set(key, entry, timeout)
+    etag, body = entry
+    if etag in [tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")]:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type=content_type)
+    response["ETag"] = etag
+    patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,62 @@
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+
+from .models import ChangeLogEntry, SteamGame
+from .serializers import game_rows
+
+# appids per DELETE + INSERT when recording changes
+RECORD_BATCH_SIZE = 1000
+SETTLE_SECONDS = getattr(settings, "CHANGE_FEED_SETTLE_SECONDS", 2)
+
+
+def record_changes(appids):
+    """
+    Give every appid of `appids` (games inserted, updated or deleted, details included) a new change log entry,
+    replacing its older one in the same transaction: the feed serves the current state of a game, so only its latest
+    entry matters and the log stays one row per game, however often the games change. The entry carries no
+    operation, upsert or delete is read off the game when the feed is served.
+    Call it next to bump_game_versions, after the write it reports: an entry recorded inside a long transaction is
+    exposed to the delivery gap described in changes_page.
+    """
+    iterator = iter(dict.fromkeys(appids))
+    while batch := list(islice(iterator, RECORD_BATCH_SIZE)):
+        with transaction.atomic():
+            ChangeLogEntry.objects.filter(appid__in=batch).delete()
+            ChangeLogEntry.objects.bulk_create([ChangeLogEntry(appid=appid) for appid in batch])
+
+
+def changes_page(after=0, size=100, fields=("appid", "name", "has_details")):
+    """
+    The change log entries after the `after` seq, oldest first, each with the current row of its game
+    (`fields`, see api.serializers.GAME_FIELDS): {"seq", "appid", "op": "upsert", "game": {...}} for a live game,
+    "op": "delete" and no game once it was deleted or removed from Steam.
+    Entries younger than CHANGE_FEED_SETTLE_SECONDS are held back: seqs are handed out when a transaction writes, not
+    when it commits, and a consumer must not move its cursor past a seq that isn't visible yet.
+    That is a heuristic, delivery is best-effort: an entry whose transaction stays open longer than the settle delay
+    can become visible below a cursor a consumer already moved past, and that consumer misses the change until the
+    game changes again. Consumers that need every change reread the feed from 0 now and then (it is one row per game).
+    Returns (entries, cursor to resume from, whether more entries are ready).
+    """
+    # the entries and the games come from the same database, a replica lagging behind another could otherwise
+    # report a game that was just added as deleted
+    using = router.db_for_read(ChangeLogEntry)
+    cutoff = timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+    entries = list(
+        ChangeLogEntry.objects.using(using).filter(seq__gt=after, created_at__lte=cutoff)
+        .order_by("seq").values_list("seq", "appid")[:size + 1]
+    )
+    more = len(entries) > size
+    entries = entries[:size]
+    games = {
+        row["appid"]: row
+        for row in game_rows(SteamGame.objects.using(using).live().filter(appid__in=[appid for _, appid in entries]), fields)
+    }
+    rows = [
+        {"seq": seq, "appid": appid, "op": "upsert" if appid in games else "delete", "game": games.get(appid)}
+        for seq, appid in entries
+    ]
+    return rows, (entries[-1][0] if entries else after), more
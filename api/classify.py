@@ -0,0 +1,48 @@
+import re
+
+# Words in an app name that mark it as a DLC, soundtrack, tool, etc. rather than a game
+NON_GAME_KEYWORDS = ['DLC', 'Soundtrack', 'Demo', 'Video', 'Comic', 'Guide', 'Tool', 'Driver', 'Theme', 'Server', 'Patch', 'Mod', 'Beta', 'Update', 'winui', 'steamworks', 'steamclient', 'vr', 'vrchat', 'vr game', 'vr experience', 'vr app', 'vr demo', 'steam', 'source', 'sdk', 'workshop', 'editor', 'map', 'level', 'plugin', 'addon', 'extension', 'utility', 'application', 'app', 'software', 'framework', 'library', 'engine', 'platform', 'service', 'toolkit', 'package', 'bundle', 'collection', 'playtest', 'test', 'testing', 'experiment', 'experimental', 'prototype', 'concept', 'idea', 'vision', 'demo reel', 'showcase', 'preview', 'trailer', 'teaser', 'clip', 'footage', 'sneak peek', 'behind the scenes', 'making of', 'interview', 'featurette', 'documentary', 'deleted scenes', 'client', 'server', 'multiplayer', 'singleplayer', 'co-op', 'cooperative', 'online', 'offline', 'lan', 'local', 'cross-platform', 'crossplay', 'modding', 'customization', 'skins', 'themes', 'avatars', 'emotes', 'badges', 'achievements', 'leaderboards', 'stats', 'progression', 'inventory', 'marketplace', 'trading', 'economy', 'currency', 'microtransactions', 'in-app purchases', 'pack']
+
+# All the keywords in one alternation, longest first so "vr demo" wins over "vr", matched on whole words only
+NON_GAME_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(keyword) for keyword in sorted(
+        {keyword.lower() for keyword in NON_GAME_KEYWORDS}, key=len, reverse=True
+    )) + r")\b",
+    re.IGNORECASE,
+)
+
+
+def classify_name(name):
+    """
+    The keyword that marks `name` as a non-game, lowercased, or an empty string for what looks like a game.
+    """
+    match = NON_GAME_PATTERN.search(name)
+    return match.group(0).lower() if match else ""
+
+
+def classify_games(queryset, batch_size=2000, changes=None):
+    """
+    Re-run the classifier over the games of `queryset` (after the keyword list changed) and save the flags that moved.
+    Returns the number of games whose classification changed. When a `changes` list is given the appids of those
+    games are appended to it. Only the flags are written: the catalog counters and the change feed are up to the caller.
+    """
+    changed = 0
+    last_appid = None
+    queryset = queryset.order_by("appid").only("appid", "name", "is_non_game", "non_game_reason")
+    while True:
+        batch = queryset if last_appid is None else queryset.filter(appid__gt=last_appid)
+        batch = list(batch[:batch_size])
+        if not batch:
+            return changed
+        updated = []
+        for game in batch:
+            reason = classify_name(game.name)
+            if reason != game.non_game_reason:
+                game.non_game_reason = reason
+                game.is_non_game = bool(reason)
+                updated.append(game)
+        queryset.model.objects.bulk_update(updated, ["is_non_game", "non_game_reason"])
+        if changes is not None:
+            changes.extend(game.appid for game in updated)
+        changed += len(updated)
+        last_appid = batch[-1].appid
@@ -0,0 +1,274 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import chain, islice
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError
+from django.db.models import Q
+
+from .ingest import STORED, NOT_A_GAME, store_app_details
+from .metrics import CRAWL_APPS, record_crawl_progress
+from .models import CrawlTask, SteamGame
+from .stats import backlog_size
+from .titleindex import update_title_index
+from .workqueue import CLAIM_BATCH_SIZE, LEASE_SECONDS, claim_batch, complete, enqueue_backlog, record_progress
+from .steam import APP_DETAILS_BURST, APP_DETAILS_RATE, SteamAPIError, TokenBucket, get_app_details, make_session
+
+
+@dataclass
+class CrawlStats:
+    """
+    Running counters of a crawl, used for the progress reports and the checkpoint file.
+    """
+    total: int = 0
+    processed: int = 0
+    stored: int = 0
+    not_games: int = 0
+    missing: int = 0
+    errors: int = 0
+    last_appid: int = 0
+    deleted: list = field(default_factory=list)
+    # appids that failed in run() and are retried by the next --resume
+    failed: list = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def remaining(self):
+        return max(self.total - self.processed, 0)
+
+    @property
+    def rate(self):
+        elapsed = time.monotonic() - self.started_at
+        return self.processed / elapsed if elapsed else 0.0
+
+    def report(self):
+        return (
+            f"{self.processed}/{self.total} apps, {self.rate:.2f} apps/sec, "
+            f"{self.stored} stored, {self.not_games} not games, {self.missing} missing, "
+            f"{self.errors} errors, {self.remaining} left"
+        )
+
+
+def backlog_queryset():
+    """
+    Games whose details still have to be fetched: never fetched, or flagged stale by the catalog sync.
+    """
+    return SteamGame.objects.filter(Q(has_details=False) | Q(details_stale=True), is_removed=False)
+
+
+def store_result(stats, appid, details, error):
+    """
+    Store one fetched appdetails result (or the SteamAPIError it raised) and count it in `stats`. Returns False
+    when the app failed and should be retried later.
+    """
+    stats.processed += 1
+    # retried appids come from below the checkpoint, they must not move it back
+    stats.last_appid = max(stats.last_appid, appid)
+    if error is not None:
+        stats.errors += 1
+        CRAWL_APPS.inc(outcome="error")
+        return False
+    if details is None:
+        stats.missing += 1
+        CRAWL_APPS.inc(outcome="missing")
+        return True
+    game = SteamGame.objects.filter(appid=appid).first()
+    if game is None:
+        CRAWL_APPS.inc(outcome="gone")
+        return True
+    try:
+        outcome = store_app_details(game, details)
+    except DatabaseError:
+        stats.errors += 1
+        CRAWL_APPS.inc(outcome="error")
+        return False
+    CRAWL_APPS.inc(outcome=outcome)
+    if outcome == STORED:
+        stats.stored += 1
+    elif outcome == NOT_A_GAME:
+        stats.not_games += 1
+        stats.deleted.append(appid)
+    return True
+
+
+class DetailCrawler:
+    """
+    Fetches appdetails for every SteamGame without details using a pool of worker threads.
+    The threads only talk to Steam through one shared session and token bucket, the results are written
+    to the database in appid order by the calling thread so the checkpoint is always a safe resume point.
+    """
+    def __init__(self, workers=4, rate=APP_DETAILS_RATE, burst=APP_DETAILS_BURST, checkpoint=None, report=None,
+                 report_every=10.0, backoff=2.0):
+        self.workers = workers
+        self.backoff = backoff
+        self.limiter = TokenBucket(rate=rate, capacity=burst)
+        self.session = make_session(pool_size=workers)
+        self.checkpoint = checkpoint
+        self.report = report
+        self.report_every = report_every
+
+    def load_checkpoint(self):
+        """
+        (appid the crawl got past, appids below it that failed and still have to be retried).
+        """
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            with open(self.checkpoint) as f:
+                checkpoint = json.load(f)
+            return checkpoint.get("last_appid", 0), checkpoint.get("failed", [])
+        return 0, []
+
+    def save_checkpoint(self, stats, retry=()):
+        if not self.checkpoint:
+            return
+        tmp_path = f"{self.checkpoint}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "last_appid": stats.last_appid,
+                # the new failures and the ones of the previous run this run hasn't retried yet
+                "failed": sorted({*stats.failed, *retry}),
+                "processed": stats.processed,
+                "stored": stats.stored,
+                "errors": stats.errors,
+            }, f)
+        # rename is atomic so a crash never leaves half a checkpoint behind
+        os.replace(tmp_path, self.checkpoint)
+
+    def iter_backlog(self, start_after, limit=None, chunk_size=1000):
+        """
+        Keyset-paginate the appids still without details, so no cursor stays open while the crawl writes.
+        """
+        yielded = 0
+        while limit is None or yielded < limit:
+            size = chunk_size if limit is None else min(chunk_size, limit - yielded)
+            chunk = list(
+                backlog_queryset().filter(appid__gt=start_after)
+                .order_by("appid").values_list("appid", flat=True)[:size]
+            )
+            if not chunk:
+                return
+            yield from chunk
+            yielded += len(chunk)
+            start_after = chunk[-1]
+
+    def fetch(self, appid):
+        try:
+            return appid, get_app_details(appid, session=self.session, limiter=self.limiter, backoff=self.backoff), None
+        except SteamAPIError as exc:
+            return appid, None, exc
+
+    def run(self, limit=None, resume=False):
+        """
+        Crawl the backlog in appid order. The checkpoint keeps the last appid handled and the appids that failed
+        (SteamAPIError, DatabaseError); a `resume` run retries those first, then continues after the appid.
+        """
+        start_after, failed = self.load_checkpoint() if resume else (0, [])
+        # the failed apps that are still missing their details, a retry of the others would be wasted
+        retry = set(backlog_queryset().filter(appid__in=failed).values_list("appid", flat=True)) if failed else set()
+        # a fresh crawl reads the backlog size off the catalog counters, a resumed one counts what is left
+        total = backlog_queryset().filter(appid__gt=start_after).count() + len(retry) if resume else backlog_size()
+        stats = CrawlStats(total=total, last_appid=start_after)
+        if limit is not None:
+            stats.total = min(stats.total, limit)
+        appids = islice(chain(sorted(retry), self.iter_backlog(start_after)), limit)
+        last_report = time.monotonic()
+        # Bounded window of in-flight fetches so memory stays flat whatever the backlog size
+        window = self.workers * 4
+        pending = deque()
+
+        def finish(appid, details, error):
+            retry.discard(appid)
+            if not store_result(stats, appid, details, error):
+                stats.failed.append(appid)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for appid in appids:
+                pending.append(executor.submit(self.fetch, appid))
+                if len(pending) < window:
+                    continue
+                finish(*pending.popleft().result())
+                if time.monotonic() - last_report >= self.report_every:
+                    last_report = time.monotonic()
+                    self.save_checkpoint(stats, retry)
+                    record_crawl_progress(stats)
+                    if self.report:
+                        self.report(stats)
+            while pending:
+                finish(*pending.popleft().result())
+        self.save_checkpoint(stats, retry)
+        record_crawl_progress(stats)
+        update_title_index(deletes=stats.deleted)
+        return stats
+
+    def run_distributed(self, node, batch_size=CLAIM_BATCH_SIZE, lease_seconds=LEASE_SECONDS, limit=None,
+                        backlog=True, poll=None):
+        """
+        Crawl the shared CrawlTask queue instead of the local backlog. Every node claims its own batches,
+        so any number of nodes can run against the same database without fetching an appid twice.
+        With `backlog` the has_details=False games are queued first, with `poll` the node doesn't stop when the
+        queue is empty but checks again every `poll` seconds, which makes it the worker for the queued fetch jobs.
+        """
+        if backlog:
+            enqueue_backlog()
+        stats = CrawlStats(total=CrawlTask.objects.filter(status=CrawlTask.PENDING).count())
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while limit is None or stats.processed < limit:
+                size = batch_size if limit is None else min(batch_size, limit - stats.processed)
+                appids = claim_batch(node, size=size, lease_seconds=lease_seconds)
+                if not appids:
+                    if poll is None:
+                        break
+                    update_title_index(deletes=stats.deleted)
+                    stats.deleted.clear()
+                    time.sleep(poll)
+                    continue
+                stats.total = max(stats.total, stats.processed + len(appids))
+                before = (stats.processed, stats.stored, stats.errors)
+                done, failed = [], []
+                for result in executor.map(self.fetch, appids):
+                    (done if store_result(stats, *result) else failed).append(result[0])
+                complete(node, done, failed)
+                record_progress(
+                    node,
+                    processed=stats.processed - before[0],
+                    stored=stats.stored - before[1],
+                    errors=stats.errors - before[2],
+                    rate=stats.rate,
+                )
+                record_crawl_progress(stats)
+                if self.report:
+                    self.report(stats)
+        update_title_index(deletes=stats.deleted)
+        return stats
+
+
+async def crawl_async(client, appids=None, limit=None, concurrency=100):
+    """
+    Crawl `appids` (by default the first `limit` backlog apps) with an AsyncSteamClient instead of DetailCrawler's
+    worker threads, up to `concurrency` requests in flight. The pacing is the client's token bucket, and no session
+    or thread pool is set up. Used by the async views under ASGI, no checkpoint. stats.total is the whole backlog,
+    so stats.remaining is what is left of it afterwards.
+    """
+    stats = CrawlStats(total=await sync_to_async(backlog_size)())
+    if appids is None:
+        appids = [appid async for appid in backlog_queryset().order_by("appid").values_list("appid", flat=True)[:limit]]
+    semaphore = asyncio.Semaphore(concurrency)
+    # the writes go through Django's single sync thread, one at a time like in DetailCrawler.run()
+    handle = sync_to_async(store_result)
+
+    async def crawl(appid):
+        async with semaphore:
+            try:
+                details, error = await client.app_details(appid), None
+            except SteamAPIError as exc:
+                details, error = None, exc
+        await handle(stats, appid, details, error)
+
+    await asyncio.gather(*(crawl(appid) for appid in appids))
+    record_crawl_progress(stats)
+    await sync_to_async(update_title_index)(deletes=stats.deleted)
+    return stats
@@ -0,0 +1,215 @@
+from django.db import connection, transaction
+from django.db.models import Count, F
+
+from .models import Category, Developer, Genre, SteamGameDetail
+
+TOP_DEVELOPERS = 20
+
+
+def tag_values(details):
+    """
+    (genre names, [(category id, description)], developer names) of an appdetails payload.
+    """
+    genres = [genre["description"] for genre in details.get("genres", []) if genre.get("description")]
+    categories = [
+        (category["id"], category.get("description", "")) for category in details.get("categories", [])
+        if "id" in category
+    ]
+    developers = [developer.strip() for developer in details.get("developers", []) if developer and developer.strip()]
+    return genres, categories, developers
+
+
+def detail_tag_values(detail):
+    """
+    tag_values() rebuilt from the columns of a stored SteamGameDetail, for edits that never saw a payload (the admin).
+    genres and developers are stored comma joined, so a developer name containing a comma gets split.
+    """
+    def split(value):
+        return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+    genres = split(detail.genres) if isinstance(detail.genres, str) else []
+    categories = [
+        (category["id"], category.get("description", ""))
+        for category in (detail.categories if isinstance(detail.categories, list) else [])
+        if isinstance(category, dict) and "id" in category
+    ]
+    return genres, categories, split(detail.developers)
+
+
+def _bump_counts(model, deltas):
+    """
+    Add {tag pk: delta} to the counters, one UPDATE per distinct delta rather than one per tag.
+    """
+    tags_by_delta = {}
+    for tag_id, delta in deltas.items():
+        tags_by_delta.setdefault(delta, []).append(tag_id)
+    for delta, tag_ids in tags_by_delta.items():
+        model.objects.filter(pk__in=tag_ids).update(game_count=F("game_count") + delta)
+
+
+def _link(model, detail_ids_by_tag):
+    """
+    Add {tag pk: [detail ids]} links and bump the tags' counters by the number of games linked.
+    """
+    through = model.games.through
+    tag_field = f"{model._meta.model_name}_id"
+    links = [(tag_id, detail_id) for tag_id, detail_ids in detail_ids_by_tag.items() for detail_id in set(detail_ids)]
+    if connection.vendor in ("postgresql", "sqlite"):
+        # a snapshot import links tens of thousands of rows, building a model instance for each one costs more
+        # than the insert itself
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {quote(through._meta.db_table)} ({quote(tag_field)}, {quote('steamgamedetail_id')}) "
+                f"VALUES (%s, %s) ON CONFLICT DO NOTHING",
+                links,
+            )
+    else:
+        through.objects.bulk_create(
+            [through(**{tag_field: tag_id, "steamgamedetail_id": detail_id}) for tag_id, detail_id in links],
+            ignore_conflicts=True,
+            batch_size=1000,
+        )
+    _bump_counts(model, {tag_id: len(set(detail_ids)) for tag_id, detail_ids in detail_ids_by_tag.items()})
+
+
+def _unlink(model, detail_ids):
+    """
+    Remove every link of these details and take them off the tags' counters.
+    """
+    through = model.games.through
+    links = through.objects.filter(steamgamedetail_id__in=detail_ids)
+    tag_field = f"{model._meta.model_name}_id"
+    _bump_counts(model, {tag_id: -total for tag_id, total in links.values_list(tag_field).annotate(total=Count("id"))})
+    links.delete()
+
+
+def _tag_ids(model, names, field="name"):
+    names = set(names)
+    if not names:
+        return {}
+    model.objects.bulk_create([model(**{field: name}) for name in names], ignore_conflicts=True)
+    return dict(model.objects.filter(**{f"{field}__in": names}).values_list(field, "pk"))
+
+
+def set_detail_tags(pairs):
+    """
+    Replace the genre/category/developer links of several details at once. `pairs` are (SteamGameDetail pk,
+    tag_values() of its payload). The old links are taken off the counters and the new ones added, nothing is recounted.
+    Only the details browse() lists get links, so the counters of a tag match what filtering by it finds.
+    """
+    values = dict(pairs)
+    if not values:
+        return
+    detail_ids = list(values)
+    with transaction.atomic():
+        for model in (Genre, Category, Developer):
+            _unlink(model, detail_ids)
+        browsable = set(browse().filter(pk__in=detail_ids).values_list("pk", flat=True))
+        values = {detail_id: tags for detail_id, tags in values.items() if detail_id in browsable}
+        categories = {}
+        for _, (_, detail_categories, _) in values.items():
+            categories.update(detail_categories)
+        Category.objects.bulk_create(
+            [Category(id=category_id, description=description) for category_id, description in categories.items()],
+            ignore_conflicts=True,
+        )
+        genre_ids = _tag_ids(Genre, (name for genres, _, _ in values.values() for name in genres))
+        developer_ids = _tag_ids(Developer, (name for _, _, developers in values.values() for name in developers))
+        genre_links, category_links, developer_links = {}, {}, {}
+        for detail_id, (genres, detail_categories, developers) in values.items():
+            for name in genres:
+                genre_links.setdefault(genre_ids[name], []).append(detail_id)
+            for category_id, _ in detail_categories:
+                category_links.setdefault(category_id, []).append(detail_id)
+            for name in developers:
+                developer_links.setdefault(developer_ids[name], []).append(detail_id)
+        _link(Genre, genre_links)
+        _link(Category, category_links)
+        _link(Developer, developer_links)
+
+
+def release_details(detail_queryset):
+    """
+    Take the details of `detail_queryset` off the facet counters and drop their links. Call it right before deleting
+    them (or their games), or when their games are tombstoned.
+    """
+    detail_ids = list(detail_queryset.values_list("pk", flat=True))
+    for start in range(0, len(detail_ids), 5000):
+        chunk = detail_ids[start:start + 5000]
+        for model in (Genre, Category, Developer):
+            _unlink(model, chunk)
+
+
+def restore_details(detail_queryset):
+    """
+    Put the details of `detail_queryset` back on the facet counters, from their stored columns. The counterpart of
+    release_details() for games that come back, e.g. a tombstone revived by the sync.
+    """
+    details = detail_queryset.only("pk", "genres", "categories", "developers")
+    set_detail_tags((detail.pk, detail_tag_values(detail)) for detail in details.iterator(chunk_size=5000))
+
+
+def recount_facets():
+    """
+    Recompute every counter from the link tables. Only needed to repair drift, e.g. after rows were deleted by hand.
+    """
+    for model in (Genre, Category, Developer):
+        counts = dict(
+            model.games.through.objects.values_list(f"{model._meta.model_name}_id").annotate(total=Count("id"))
+        )
+        tags = list(model.objects.only("pk", "game_count"))
+        for tag in tags:
+            tag.game_count = counts.get(tag.pk, 0)
+        model.objects.bulk_update(tags, ["game_count"], batch_size=1000)
+
+
+def browse(is_free=None, genre=None, category=None, developer=None):
+    """
+    SteamGameDetail queryset filtered through the indexed link tables, e.g. free co-op RPGs by one developer.
+    Only the games of live catalog entries, the rows the facet counters count.
+    """
+    details = SteamGameDetail.objects.filter(is_game=True, steam_game__is_removed=False)
+    if is_free is not None:
+        details = details.filter(is_free=is_free)
+    if genre:
+        details = details.filter(genre_set__name=genre)
+    if category:
+        details = details.filter(category_set__id=category)
+    if developer:
+        details = details.filter(developer_set__name=developer)
+    return details
+
+
+def facet_counts(details=None):
+    """
+    Facet counts for the browse page. Without filters they are the maintained counters (no scan at all),
+    with filters they are grouped over the already narrowed `details` queryset only.
+    """
+    if details is None:
+        return {
+            "genres": list(Genre.objects.filter(game_count__gt=0).order_by("-game_count").values("name", count=F("game_count"))),
+            "categories": list(
+                Category.objects.filter(game_count__gt=0).order_by("-game_count")
+                .values("id", "description", count=F("game_count"))
+            ),
+            "developers": list(
+                Developer.objects.filter(game_count__gt=0).order_by("-game_count")
+                .values("name", count=F("game_count"))[:TOP_DEVELOPERS]
+            ),
+        }
+    detail_ids = details.values("pk")
+    return {
+        "genres": list(
+            Genre.objects.filter(games__in=detail_ids).annotate(count=Count("games")).order_by("-count")
+            .values("name", "count")
+        ),
+        "categories": list(
+            Category.objects.filter(games__in=detail_ids).annotate(count=Count("games")).order_by("-count")
+            .values("id", "description", "count")
+        ),
+        "developers": list(
+            Developer.objects.filter(games__in=detail_ids).annotate(count=Count("games")).order_by("-count")
+            .values("name", "count")[:TOP_DEVELOPERS]
+        ),
+    }
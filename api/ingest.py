@@ -0,0 +1,217 @@
+import codecs
+import hashlib
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from .archive import archive_app_details, detail_fields
+from .cache import bump_game_versions
+from .changes import record_changes
+from .classify import classify_name
+from .facets import release_details, restore_details, set_detail_tags, tag_values
+from .models import SteamGame, SteamGameDetail, normalize_name
+from .stats import track_stats
+from .titleindex import update_title_index
+
+INGEST_BATCH_SIZE = 1000
+# (connect, read) seconds for the GetAppList download: the read timeout bounds each wait for the next chunk,
+# so a stalled connection fails instead of holding the worker forever
+APP_LIST_TIMEOUT = (10, 60)
+
+
+def app_list_url():
+    # read on every call so the benchmarks can point it at the local Steam stand-in
+    return f"{settings.STEAM_WEB_API_URL}/ISteamApps/GetAppList/v2/"
+
+
+def iter_app_list(chunks):
+    """
+    Incrementally parse the GetAppList payload and yield one app dict at a time.
+    `chunks` is any iterable of text chunks (e.g. response.iter_content(decode_unicode=True)),
+    so the whole ~200k entry document never has to sit in memory as a python object.
+    """
+    decoder = json.JSONDecoder()
+    # bytes chunks can split a multi-byte character, the incremental decoder keeps the tail for the next chunk
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    in_array = False
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = utf8.decode(chunk)
+        buffer += chunk
+        if not in_array:
+            start = buffer.find('"apps"')
+            if start == -1:
+                continue
+            bracket = buffer.find("[", start)
+            if bracket == -1:
+                continue
+            buffer = buffer[bracket + 1:]
+            in_array = True
+        pos = 0
+        while True:
+            # skip the separators between two objects
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                app, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # the object is cut in half by the chunk boundary, wait for more data
+                break
+            yield app
+            pos = end
+        buffer = buffer[pos:]
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def app_hash(app):
+    """
+    Short digest of a GetAppList record (everything but the appid), used by the incremental sync to spot changes.
+    """
+    record = {key: value for key, value in app.items() if key != "appid"}
+    return hashlib.blake2b(json.dumps(record, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+def build_game(app, **extra):
+    """
+    Unsaved SteamGame for a GetAppList record. bulk_create and bulk_update skip save(), so every derived column
+    is filled in here.
+    """
+    name = app["name"][:255]
+    reason = classify_name(name)
+    return SteamGame(
+        appid=app["appid"],
+        name=name,
+        search_name=normalize_name(name),
+        is_non_game=bool(reason),
+        non_game_reason=reason,
+        content_hash=app_hash(app),
+        **extra,
+    )
+
+
+def ingest_app_list(apps, batch_size=INGEST_BATCH_SIZE, changes=None):
+    """
+    Diff a stream of {"appid", "name"} dicts against the stored SteamGame rows and write the changes in batches.
+    Every batch costs one SELECT, at most one bulk INSERT and one bulk UPDATE, no matter how many apps it holds.
+    The title index follows batch by batch, so memory stays bounded by the batch size whatever the catalog size.
+    Returns a dict with the inserted/updated/unchanged counts. When a `changes` list is given the (appid, name)
+    pairs of the inserted, renamed and revived games are appended to it.
+    A tombstone left by the incremental sync (api.sync) that is in the list again is brought back to life, and
+    counted as updated.
+    """
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+    for batch in _batched(apps, batch_size):
+        # GetAppList contains duplicated appids, the last name wins like it would with single inserts
+        incoming = {app["appid"]: app for app in batch if "appid" in app}
+        existing = {
+            appid: (name, is_removed)
+            for appid, name, is_removed in SteamGame.objects.filter(appid__in=incoming.keys())
+            .values_list("appid", "name", "is_removed")
+        }
+        new_games = []
+        changed_games = []
+        revived = []
+        for appid, app in incoming.items():
+            if appid not in existing:
+                new_games.append(build_game(app))
+                continue
+            name, is_removed = existing[appid]
+            if name != app["name"][:255] or is_removed:
+                # build_game() leaves is_removed False, the update revives the tombstones
+                changed_games.append(build_game(app))
+                if is_removed:
+                    revived.append(appid)
+            else:
+                stats["unchanged"] += 1
+        # a rename can reclassify the game, so the renamed appids are tallied along with the new ones
+        with track_stats(game.appid for game in new_games + changed_games):
+            if new_games:
+                new_appids = [game.appid for game in new_games]
+                # ignore_conflicts covers a concurrent run inserting the same appids in between, the rows it skips
+                # are not counted: inserted is how many of the appids the insert added
+                present = SteamGame.objects.filter(appid__in=new_appids).count()
+                SteamGame.objects.bulk_create(new_games, ignore_conflicts=True)
+                stats["inserted"] += SteamGame.objects.filter(appid__in=new_appids).count() - present
+            if changed_games:
+                SteamGame.objects.bulk_update(
+                    changed_games,
+                    ["name", "search_name", "is_non_game", "non_game_reason", "content_hash", "is_removed"],
+                )
+                stats["updated"] += len(changed_games)
+                bump_game_versions(game.appid for game in changed_games)
+                restore_details(SteamGameDetail.objects.filter(steam_game_id__in=revived))
+        record_changes(game.appid for game in new_games + changed_games)
+        update_title_index(upserts=[(game.appid, game.name) for game in new_games + changed_games])
+        if changes is not None:
+            changes.extend((game.appid, game.name) for game in new_games + changed_games)
+    return stats
+
+
+STORED = "stored"
+EXISTS = "exists"
+NOT_A_GAME = "not_a_game"
+
+
+def store_app_details(game, details):
+    """
+    Save the appdetails `data` dict of a game into SteamGameDetail and flag the game as having details.
+    Non-games are deleted from SteamGame instead. The raw payload is archived either way.
+    Existing details are only overwritten when the game is flagged details_stale.
+    Returns STORED, EXISTS or NOT_A_GAME.
+    """
+    archive_app_details(game.appid, details)
+    with track_stats([game.appid]):
+        return _store_app_details(game, details)
+
+
+def _store_app_details(game, details):
+    if details.get("type", "") != "game":
+        # a stale game being refetched still has its details, the cascade must not leave them on the facet counters
+        release_details(SteamGameDetail.objects.filter(steam_game_id=game.appid))
+        # through the queryset: Model.delete() would clear game.appid, which the caller and the bump below still need
+        SteamGame.objects.filter(appid=game.appid).delete()
+        bump_game_versions([game.appid])
+        record_changes([game.appid])
+        return NOT_A_GAME
+    # get_or_create inside a transaction: when two crawlers race on the same appid the loser
+    # gets the existing row back instead of an IntegrityError on the OneToOne
+    with transaction.atomic():
+        detail, created = SteamGameDetail.objects.get_or_create(steam_game=game, defaults=detail_fields(details))
+        if not created:
+            if not game.details_stale:
+                return EXISTS
+            # the catalog sync saw the app change, refresh the stored details
+            SteamGameDetail.objects.filter(pk=detail.pk).update(**detail_fields(details))
+        set_detail_tags([(detail.pk, tag_values(details))])
+        SteamGame.objects.filter(appid=game.appid).update(has_details=True, details_stale=False)
+    game.details_stale = False
+    game.has_details = True
+    bump_game_versions([game.appid])
+    record_changes([game.appid])
+    return STORED
+
+
+def delete_games(games):
+    """
+    Set-based delete of the SteamGame queryset `games` and of their details, with the facet and catalog counters,
+    the title index and the cached responses following. Returns the deleted appids.
+    """
+    deleted = list(games.values_list("appid", flat=True))
+    with track_stats(deleted):
+        release_details(SteamGameDetail.objects.filter(steam_game__in=games))
+        # the details go with the games through the cascade
+        games.delete()
+    update_title_index(deletes=deleted)
+    bump_game_versions(deleted)
+    record_changes(deleted)
+    return deleted
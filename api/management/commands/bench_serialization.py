@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from api.models import SteamGame
+from api.serializers import DEFAULT_LIST_FIELDS, dumps, game_rows
+
+
+class Command(BaseCommand):
+    help = "Compare rows/sec of the html game list, model-instance JSON and the values_list() JSON path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Rows per page to serialize.")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per path, the best one is reported.")
+
+    def bench(self, label, rows, func, repeat):
+        best = min(self.timed(func) for _ in range(repeat))
+        self.stdout.write(f"{label:<28} {rows / best:>12,.0f} rows/sec  ({best * 1000:.1f} ms per page)")
+        return best
+
+    def timed(self, func):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        # every run re-evaluates queryset.all() so the query time is part of each path
+        queryset = SteamGame.objects.order_by("appid")[:rows]
+        count = queryset.count()
+        if not count:
+            self.stdout.write("No games in the database, run fetch_games first.")
+            return
+        self.stdout.write(f"Serializing {count} games, best of {repeat} runs")
+        template = self.bench(
+            "template (game_list.html)", count,
+            lambda: render_to_string("api/game_list.html", {"games": list(queryset.all())}), repeat,
+        )
+        self.bench(
+            "json from model instances", count,
+            lambda: dumps([
+                {"appid": game.appid, "name": game.name, "has_details": game.has_details} for game in queryset.all()
+            ]), repeat,
+        )
+        fast = self.bench(
+            "json from values_list()", count,
+            lambda: dumps({"results": game_rows(queryset.all(), DEFAULT_LIST_FIELDS)}), repeat,
+        )
+        self.stdout.write(self.style.SUCCESS(f"values_list() JSON is {template / fast:.1f}x faster than the template path."))
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.titleindex import build_title_index, compact_title_index
+
+
+class Command(BaseCommand):
+    help = "Build the memory-mapped title snapshot the autocomplete endpoint answers from."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=None, help="Snapshot file, defaults to settings.TITLE_INDEX_PATH.")
+        parser.add_argument(
+            "--compact", action="store_true",
+            help="Only merge the journal of changes into the existing snapshot instead of rebuilding it from the database.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"] or settings.TITLE_INDEX_PATH
+        count = compact_title_index(path) if options["compact"] else build_title_index(path)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} titles to {path}."))
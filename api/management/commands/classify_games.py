@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_game_versions
+from api.changes import record_changes
+from api.classify import classify_games
+from api.models import SteamGame
+from api.stats import reconcile_stats
+
+
+class Command(BaseCommand):
+    help = "Re-run the non-game name classifier over every SteamGame, e.g. after NON_GAME_KEYWORDS changed."
+
+    def handle(self, *args, **options):
+        changes = []
+        changed = classify_games(SteamGame.objects.all(), changes=changes)
+        # the whole catalog was looked at, recounting beats tallying every appid twice
+        reconcile_stats()
+        bump_game_versions(changes)
+        record_changes(changes)
+        self.stdout.write(self.style.SUCCESS(f"Reclassified {changed} games."))
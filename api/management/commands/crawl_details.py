@@ -0,0 +1,54 @@
+import os
+import socket
+
+from django.core.management.base import BaseCommand
+
+from api.crawler import DetailCrawler
+from api.steam import APP_DETAILS_BURST, APP_DETAILS_RATE
+from api.workqueue import CLAIM_BATCH_SIZE, LEASE_SECONDS
+
+
+class Command(BaseCommand):
+    help = "Fetch the Steam appdetails of every game that has no details yet, with a pool of rate-limited workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Number of concurrent fetch threads.")
+        parser.add_argument("--rate", type=float, default=APP_DETAILS_RATE,
+                            help="Steam requests per second shared by all the workers.")
+        parser.add_argument("--burst", type=int, default=APP_DETAILS_BURST,
+                            help="Requests allowed back to back before the rate limit kicks in.")
+        parser.add_argument("--limit", type=int, default=None, help="Stop after this many apps.")
+        parser.add_argument("--checkpoint", default="crawl_details.checkpoint.json",
+                            help="File the progress is saved to.")
+        parser.add_argument("--resume", action="store_true", help="Retry the apps that failed, then continue after the appid saved in the checkpoint.")
+        parser.add_argument("--distributed", action="store_true",
+                            help="Claim work from the shared CrawlTask queue so several nodes can crawl together.")
+        parser.add_argument("--node", default=f"{socket.gethostname()}-{os.getpid()}",
+                            help="Name this node reports its progress under (distributed mode).")
+        parser.add_argument("--batch-size", type=int, default=CLAIM_BATCH_SIZE,
+                            help="Appids claimed at once (distributed mode).")
+        parser.add_argument("--lease", type=int, default=LEASE_SECONDS,
+                            help="Seconds before an unfinished claim goes back to the queue (distributed mode).")
+        parser.add_argument("--no-backlog", action="store_true",
+                            help="Don't queue the has_details=False backlog, only work the queued jobs (distributed mode).")
+        parser.add_argument("--poll", type=float, default=None,
+                            help="Keep running and look for new work every POLL seconds (distributed mode).")
+        parser.add_argument("--report-every", type=float, default=10.0, help="Seconds between progress reports.")
+
+    def handle(self, *args, **options):
+        crawler = DetailCrawler(
+            workers=options["workers"],
+            rate=options["rate"],
+            burst=options["burst"],
+            checkpoint=options["checkpoint"],
+            report=lambda stats: self.stdout.write(stats.report()),
+            report_every=options["report_every"],
+        )
+        if options["distributed"]:
+            stats = crawler.run_distributed(
+                options["node"], batch_size=options["batch_size"], lease_seconds=options["lease"], limit=options["limit"],
+                backlog=not options["no_backlog"], poll=options["poll"],
+            )
+        else:
+            stats = crawler.run(limit=options["limit"], resume=options["resume"])
+        self.stdout.write(self.style.SUCCESS(f"Crawl finished: {stats.report()}"))
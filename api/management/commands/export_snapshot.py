@@ -0,0 +1,29 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.snapshot import export_snapshot, index_path
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream SteamGame, SteamGameDetail and their tags to a compressed snapshot file, to bootstrap another "
+        "environment with import_snapshot instead of re-crawling Steam."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Snapshot file to write, its index goes next to it as <path>.index.")
+        parser.add_argument(
+            "--base", help="Earlier snapshot to diff against: only the games changed or deleted since are written."
+        )
+
+    def handle(self, *args, **options):
+        base = options["base"]
+        if base and not os.path.exists(index_path(base)):
+            raise CommandError(f"{index_path(base)} not found, a delta needs the index written with its base.")
+        written, deleted = export_snapshot(options["path"], base=base)
+        kind = "Delta" if base else "Snapshot"
+        self.stdout.write(self.style.SUCCESS(
+            f"{kind} written to {options['path']}: {written} games, {deleted} deletions "
+            f"({os.path.getsize(options['path']) / 1024 / 1024:.1f} MB)."
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.bench.catalog import generate_catalog
+
+
+class Command(BaseCommand):
+    help = "Fill the database with a deterministic synthetic catalog of games, details and tags."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=100_000, help="Number of games to insert.")
+        parser.add_argument("--detail-ratio", type=float, default=0.3, help="Share of the games that get details.")
+        parser.add_argument("--start-appid", type=int, default=1, help="First appid of the catalog.")
+        parser.add_argument("--seed", type=int, default=0, help="Same seed, same catalog.")
+
+    def handle(self, *args, **options):
+        games, details = generate_catalog(
+            options["size"], detail_ratio=options["detail_ratio"], start_appid=options["start_appid"],
+            seed=options["seed"], report=lambda games, details: self.stdout.write(f"{games} games, {details} details"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Inserted {games} games and {details} details."))
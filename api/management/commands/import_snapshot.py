@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.snapshot import SnapshotError, import_snapshot
+
+
+class Command(BaseCommand):
+    help = "Load one or more snapshots written by export_snapshot, a full one then its deltas in order."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Snapshot files, oldest first.")
+
+    def handle(self, *args, **options):
+        previous = None
+        for path in options["paths"]:
+            try:
+                header, loaded, deleted = import_snapshot(
+                    path, expected_base=previous,
+                    report=lambda loaded, deleted: self.stdout.write(f"{path}: {loaded} games loaded, {deleted} deleted"),
+                )
+            except SnapshotError as exc:
+                raise CommandError(str(exc))
+            previous = header["id"]
+            self.stdout.write(self.style.SUCCESS(
+                f"{path} ({'delta' if header['base'] else 'full'} snapshot of {header['created_at']}): "
+                f"{loaded} games loaded, {deleted} deleted."
+            ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.facets import recount_facets
+from api.stats import reconcile_stats
+
+
+class Command(BaseCommand):
+    help = "Recount the catalog counters (and the genre/category/developer counters) and fix any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--skip-facets", action="store_true", help="Only reconcile the catalog counters.")
+
+    def handle(self, *args, **options):
+        drift = reconcile_stats()
+        for name, delta in sorted(drift.items()):
+            self.stdout.write(f"{name}: off by {delta:+d}, fixed")
+        if not options["skip_facets"]:
+            recount_facets()
+        self.stdout.write(self.style.SUCCESS(
+            f"Catalog counters reconciled, {len(drift)} had drifted." if drift else "Catalog counters were in sync."
+        ))
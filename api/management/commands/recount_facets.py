@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.facets import recount_facets
+
+
+class Command(BaseCommand):
+    help = "Recompute the genre/category/developer game counters from the link tables."
+
+    def handle(self, *args, **options):
+        recount_facets()
+        self.stdout.write(self.style.SUCCESS("Facet counters recounted."))
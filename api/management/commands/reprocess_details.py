@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.archive import REPROCESS_BATCH_SIZE, detail_fields, reprocess_archive
+
+
+class Command(BaseCommand):
+    help = "Rebuild SteamGameDetail columns from the archived appdetails payloads, without calling Steam."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fields", nargs="+", default=None,
+                            help="Detail columns to rebuild, all of them by default.")
+        parser.add_argument("--workers", type=int, default=None, help="Parser processes, one per CPU by default.")
+        parser.add_argument("--batch-size", type=int, default=REPROCESS_BATCH_SIZE, help="Payloads per batch.")
+
+    def handle(self, *args, **options):
+        known = set(detail_fields({}))
+        unknown = set(options["fields"] or ()) - known
+        if unknown:
+            raise CommandError(f"Unknown detail fields: {', '.join(sorted(unknown))}. Pick from {', '.join(sorted(known))}.")
+        updated = reprocess_archive(
+            fields=options["fields"],
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            report=lambda count: self.stdout.write(f"{count} details rebuilt"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {updated} game details from the archive."))
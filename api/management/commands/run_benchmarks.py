@@ -0,0 +1,69 @@
+import json
+import platform
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from api.bench.suite import check_regressions, run_suite
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ingest, sync, crawl, search, listing and deletes on a throwaway test database filled with a "
+        "synthetic catalog, against a local Steam stand-in. Never touches the real database or Steam."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=10_000, help="Games in the synthetic catalog.")
+        parser.add_argument("--detail-ratio", type=float, default=0.3, help="Share of the games that get details.")
+        parser.add_argument("--crawl-sample", type=int, default=500, help="Apps the crawl benchmark fetches.")
+        parser.add_argument("--queries", type=int, default=200, help="Queries per search benchmark.")
+        parser.add_argument("--latency", type=float, default=0.0, help="Seconds the Steam stand-in waits per answer.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Share of appdetails calls answered 429.")
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against.")
+        parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown against the baseline.")
+        parser.add_argument("--keepdb", action="store_true", help="Keep the test database between runs.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, keepdb=options["keepdb"])
+        try:
+            started = time.time()
+            benchmarks = run_suite(
+                size=options["size"], detail_ratio=options["detail_ratio"], crawl_sample=options["crawl_sample"],
+                queries=options["queries"], latency=options["latency"], error_rate=options["error_rate"],
+                report=self.stdout.write,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+        results = {
+            "meta": {
+                "started_at": started,
+                "seconds": round(time.time() - started, 1),
+                "size": options["size"],
+                "detail_ratio": options["detail_ratio"],
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+            },
+            "benchmarks": benchmarks,
+        }
+        for name, metrics in benchmarks.items():
+            self.stdout.write(f"{name:<26} " + "  ".join(f"{key}={value}" for key, value in metrics.items()))
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+            failures = check_regressions(benchmarks, baseline["benchmarks"], options["threshold"])
+            if failures:
+                raise CommandError("Performance regressions:\n" + "\n".join(failures))
+            self.stdout.write(self.style.SUCCESS(f"No regression over {options['threshold']:.0%} against the baseline."))
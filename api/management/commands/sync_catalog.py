@@ -0,0 +1,19 @@
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ingest import APP_LIST_TIMEOUT, app_list_url, iter_app_list
+from api.metrics import STEAM_HOOKS
+from api.sync import sync_catalog
+
+
+class Command(BaseCommand):
+    help = "Incrementally sync SteamGame with Steam's app list: add and update what changed, tombstone what vanished."
+
+    def handle(self, *args, **options):
+        response = requests.get(app_list_url(), stream=True, timeout=APP_LIST_TIMEOUT, hooks=STEAM_HOOKS)
+        if response.status_code != 200:
+            raise CommandError(f"Failed to fetch the app list, Steam answered {response.status_code}.")
+        run = sync_catalog(iter_app_list(response.iter_content(chunk_size=64 * 1024)))
+        self.stdout.write(self.style.SUCCESS(
+            f"Sync {run.pk}: added {run.added}, changed {run.changed}, removed {run.removed}, unchanged {run.unchanged}."
+        ))
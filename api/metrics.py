@@ -0,0 +1,301 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from urllib.parse import urlparse
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+
+# Prometheus text exposition format, the one every scraper understands
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500, 1000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    A metric family: one value (or histogram) per combination of label values, guarded by a single lock.
+    Recording is a dict lookup and an addition, cheap enough to stay on in production.
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+    def render(self):
+        return self.header() + self.samples()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # per-bucket counts (the last one is +Inf), then sum
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self):
+        with self.lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self.values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        # called right before rendering, for gauges that are read from the database at scrape time
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        for collect in self.collectors:
+            collect()
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "steamdb_http_request_duration_seconds", "Time spent in a view, until the response is returned.",
+    ["view", "method", "status"],
+))
+REQUEST_QUERIES = REGISTRY.register(Histogram(
+    "steamdb_http_request_db_queries", "ORM queries run by one request.", ["view"], buckets=QUERY_COUNT_BUCKETS,
+))
+REQUEST_QUERY_TIME = REGISTRY.register(Counter(
+    "steamdb_http_request_db_seconds_total", "Time requests spent waiting on the database.", ["view"],
+))
+STEAM_LATENCY = REGISTRY.register(Histogram(
+    "steamdb_steam_request_duration_seconds", "Latency of outbound Steam API calls, until the headers arrived.",
+    ["endpoint", "status"],
+))
+STEAM_FAILURES = REGISTRY.register(Counter(
+    "steamdb_steam_request_failures_total", "Outbound Steam API calls that got no answer at all.", ["endpoint"],
+))
+CRAWL_APPS = REGISTRY.register(Counter(
+    "steamdb_crawl_apps_total", "Apps handled by the detail crawler in this process, per outcome.", ["outcome"],
+))
+CRAWL_RATE = REGISTRY.register(Gauge(
+    "steamdb_crawl_rate", "Apps/sec of the detail crawl running in this process.",
+))
+CRAWL_REMAINING = REGISTRY.register(Gauge(
+    "steamdb_crawl_remaining", "Apps left in the detail crawl running in this process.",
+))
+CRAWL_TASKS = REGISTRY.register(Gauge(
+    "steamdb_crawl_tasks", "CrawlTask rows per status.", ["status"],
+))
+CRAWL_NODE_RATE = REGISTRY.register(Gauge(
+    "steamdb_crawl_node_rate", "Apps/sec last reported by each distributed crawler node.", ["node"],
+))
+CRAWL_NODE_PROCESSED = REGISTRY.register(Gauge(
+    "steamdb_crawl_node_processed", "Apps processed so far by each distributed crawler node.", ["node"],
+))
+
+
+def steam_endpoint(url):
+    path = urlparse(url).path
+    if path.endswith("/appdetails"):
+        return "appdetails"
+    if "GetAppList" in path:
+        return "applist"
+    return "other"
+
+
+def record_steam_response(response, *args, **kwargs):
+    """
+    requests response hook, pass it as `hooks=STEAM_HOOKS` on every call to Steam.
+    """
+    STEAM_LATENCY.observe(
+        response.elapsed.total_seconds(), endpoint=steam_endpoint(response.url), status=response.status_code
+    )
+    return response
+
+
+STEAM_HOOKS = {"response": [record_steam_response]}
+
+
+def record_steam_failure(url):
+    STEAM_FAILURES.inc(endpoint=steam_endpoint(url))
+
+
+def record_crawl_progress(stats):
+    CRAWL_RATE.set(round(stats.rate, 3))
+    CRAWL_REMAINING.set(stats.remaining)
+
+
+def collect_crawl_queue():
+    # the crawler usually runs in its own process (crawl_details), so the web process reads its progress back
+    # from the tables every node reports to
+    from .workqueue import queue_status
+
+    status = queue_status()
+    for task_status, total in status["tasks"].items():
+        CRAWL_TASKS.set(total, status=task_status)
+    for node in status["nodes"]:
+        CRAWL_NODE_RATE.set(node["rate"], node=node["name"])
+        CRAWL_NODE_PROCESSED.set(node["processed"], node=node["name"])
+
+
+REGISTRY.collectors.append(collect_crawl_queue)
+
+
+class QueryTimer:
+    """
+    The queries of a request and the time they took, filled in by time_query().
+    """
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# the QueryTimer of the request being served. Context variables follow the request into the thread sync_to_async
+# runs the ORM calls of an async view in, where a wrapper installed by the middleware itself would never see them.
+current_timer = ContextVar("current_timer", default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper installed on every connection, adds the query to the current request's QueryTimer.
+    """
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.count += 1
+        timer.seconds += time.perf_counter() - start
+
+
+def install_query_timer(sender, connection, **kwargs):
+    # connection_created fires in the thread that opened the connection, on every reconnect of the same wrapper
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+connection_created.connect(install_query_timer)
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, query count and database time of every request, labelled with the url name of the view.
+    Streamed responses (the CSV export) are timed until their first byte is ready, not until the download ends.
+    Works in both the sync and the async middleware chain, so it never forces the async views into a thread; the
+    queries are counted through current_timer, whichever thread runs them.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        self.record(request, response, time.perf_counter() - start, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        self.record(request, response, time.perf_counter() - start, timer)
+        return response
+
+    def record(self, request, response, elapsed, timer):
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else "unmatched"
+        REQUEST_LATENCY.observe(elapsed, view=view, method=request.method, status=response.status_code)
+        REQUEST_QUERIES.observe(timer.count, view=view)
+        REQUEST_QUERY_TIME.inc(timer.seconds, view=view)
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_steamgamedetail_is_game'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlNode',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField(auto_now=True)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('stored', models.PositiveIntegerField(default=0)),
+                ('errors', models.PositiveIntegerField(default=0)),
+                ('rate', models.FloatField(default=0.0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CrawlTask',
+            fields=[
+                ('steam_game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='crawl_task', serialize=False, to='api.steamgame')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('claimed', 'Claimed'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('claimed_by', models.CharField(blank=True, default='', max_length=100)),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'lease_expires_at'], name='api_crawlta_status_149d7d_idx')],
+            },
+        ),
+    ]
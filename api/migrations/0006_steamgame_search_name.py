@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:49
+
+import re
+
+from django.db import migrations, models
+
+NON_ALNUM = re.compile(r"[\W_]+")
+
+
+def backfill_search_name(apps, schema_editor):
+    SteamGame = apps.get_model('api', 'SteamGame')
+    last_appid = None
+    while True:
+        games = SteamGame.objects.order_by('appid').only('appid', 'name')
+        if last_appid is not None:
+            games = games.filter(appid__gt=last_appid)
+        games = list(games[:2000])
+        if not games:
+            return
+        for game in games:
+            game.search_name = NON_ALNUM.sub(" ", game.name.casefold()).strip()
+        SteamGame.objects.bulk_update(games, ['search_name'])
+        last_appid = games[-1].appid
+
+
+def create_trigram_index(apps, schema_editor):
+    # pg_trgm only exists on Postgres, the SQLite dev database searches without it
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS api_steamgame_search_name_trgm "
+        "ON api_steamgame USING gin (search_name gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS api_steamgame_search_name_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_crawltask_crawlnode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='steamgame',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_search_name, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
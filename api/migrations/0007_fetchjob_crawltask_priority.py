@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_steamgame_search_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FetchJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(blank=True, default='', max_length=255)),
+                ('appids', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='crawltask',
+            name='priority',
+            field=models.SmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+from api.classify import classify_name
+
+
+def classify_existing_games(apps, schema_editor):
+    # Only the historical model here: the app code (api.classify.classify_games and what its callers do around it)
+    # may rely on tables and columns later migrations add
+    SteamGame = apps.get_model('api', 'SteamGame')
+    last_appid = None
+    while True:
+        games = SteamGame.objects.order_by('appid').only('appid', 'name')
+        if last_appid is not None:
+            games = games.filter(appid__gt=last_appid)
+        games = list(games[:2000])
+        if not games:
+            return
+        for game in games:
+            game.non_game_reason = classify_name(game.name)
+            game.is_non_game = bool(game.non_game_reason)
+        SteamGame.objects.bulk_update(games, ['is_non_game', 'non_game_reason'])
+        last_appid = games[-1].appid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_fetchjob_crawltask_priority'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='steamgame',
+            name='is_non_game',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='steamgame',
+            name='non_game_reason',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.RunPython(classify_existing_games, migrations.RunPython.noop),
+    ]
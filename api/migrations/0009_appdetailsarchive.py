@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_steamgame_non_game_classification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppDetailsArchive',
+            fields=[
+                ('appid', models.IntegerField(primary_key=True, serialize=False)),
+                ('payload', models.BinaryField()),
+                ('fetched_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
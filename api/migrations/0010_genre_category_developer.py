@@ -0,0 +1,119 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:58
+
+from django.db import migrations, models
+from django.db.models import Count
+
+from api.archive import decompress_payload
+
+
+def _split(value):
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+def backfill_tags(apps, schema_editor):
+    """
+    Link the existing details to their genres, categories and developers. The archived payload is used when there is
+    one, otherwise the comma joined columns are split (a developer name containing a comma gets split too).
+    """
+    SteamGameDetail = apps.get_model('api', 'SteamGameDetail')
+    AppDetailsArchive = apps.get_model('api', 'AppDetailsArchive')
+    models_by_kind = {
+        'genre': apps.get_model('api', 'Genre'),
+        'category': apps.get_model('api', 'Category'),
+        'developer': apps.get_model('api', 'Developer'),
+    }
+    last_pk = 0
+    while True:
+        details = list(
+            SteamGameDetail.objects.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'steam_game_id', 'genres', 'categories', 'developers')[:1000]
+        )
+        if not details:
+            break
+        last_pk = details[-1][0]
+        payloads = {
+            appid: decompress_payload(blob) for appid, blob in
+            AppDetailsArchive.objects.filter(appid__in=[row[1] for row in details]).values_list('appid', 'payload')
+        }
+        links = {'genre': [], 'category': [], 'developer': []}
+        categories = {}
+        for pk, appid, genres, detail_categories, developers in details:
+            payload = payloads.get(appid)
+            if payload is not None:
+                genres = [genre['description'] for genre in payload.get('genres', []) if genre.get('description')]
+                detail_categories = payload.get('categories', [])
+                developers = [developer.strip() for developer in payload.get('developers', []) if developer.strip()]
+            else:
+                genres = _split(genres) if isinstance(genres, str) else []
+                detail_categories = detail_categories if isinstance(detail_categories, list) else []
+                developers = _split(developers)
+            for category in detail_categories:
+                if 'id' in category:
+                    categories[category['id']] = category.get('description', '')
+                    links['category'].append((category['id'], pk))
+            links['genre'].extend((name, pk) for name in genres)
+            links['developer'].extend((name, pk) for name in developers)
+        models_by_kind['category'].objects.bulk_create(
+            [models_by_kind['category'](id=key, description=value) for key, value in categories.items()],
+            ignore_conflicts=True,
+        )
+        for kind in ('genre', 'developer'):
+            model = models_by_kind[kind]
+            names = {name for name, _ in links[kind]}
+            model.objects.bulk_create([model(name=name) for name in names], ignore_conflicts=True)
+            ids = dict(model.objects.filter(name__in=names).values_list('name', 'pk'))
+            links[kind] = [(ids[name], pk) for name, pk in links[kind]]
+        for kind, model in models_by_kind.items():
+            through = model.games.through
+            through.objects.bulk_create(
+                [through(**{f'{kind}_id': tag_id, 'steamgamedetail_id': pk}) for tag_id, pk in set(links[kind])],
+                ignore_conflicts=True,
+                batch_size=1000,
+            )
+    for kind, model in models_by_kind.items():
+        counts = dict(model.games.through.objects.values_list(f'{kind}_id').annotate(total=Count('id')))
+        tags = list(model.objects.all())
+        for tag in tags:
+            tag.game_count = counts.get(tag.pk, 0)
+        model.objects.bulk_update(tags, ['game_count'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_appdetailsarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('description', models.CharField(max_length=255)),
+                ('game_count', models.PositiveIntegerField(default=0)),
+                ('games', models.ManyToManyField(blank=True, related_name='category_set', to='api.steamgamedetail')),
+            ],
+            options={
+                'verbose_name_plural': 'categories',
+            },
+        ),
+        migrations.CreateModel(
+            name='Developer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('game_count', models.PositiveIntegerField(db_index=True, default=0)),
+                ('games', models.ManyToManyField(blank=True, related_name='developer_set', to='api.steamgamedetail')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('game_count', models.PositiveIntegerField(default=0)),
+                ('games', models.ManyToManyField(blank=True, related_name='genre_set', to='api.steamgamedetail')),
+            ],
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:00
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def backfill_content_hash(apps, schema_editor):
+    # Same digest api.ingest.app_hash() gives the {"appid", "name"} GetAppList record, so the first
+    # incremental sync only sees the apps that really changed
+    SteamGame = apps.get_model('api', 'SteamGame')
+    last_appid = None
+    while True:
+        games = SteamGame.objects.order_by('appid').only('appid', 'name')
+        if last_appid is not None:
+            games = games.filter(appid__gt=last_appid)
+        games = list(games[:2000])
+        if not games:
+            return
+        for game in games:
+            record = json.dumps({'name': game.name}, sort_keys=True).encode()
+            game.content_hash = hashlib.blake2b(record, digest_size=8).hexdigest()
+        SteamGame.objects.bulk_update(games, ['content_hash'])
+        last_appid = games[-1].appid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_genre_category_developer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('added', models.PositiveIntegerField(default=0)),
+                ('changed', models.PositiveIntegerField(default=0)),
+                ('removed', models.PositiveIntegerField(default=0)),
+                ('unchanged', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='steamgame',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='steamgame',
+            name='details_stale',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='steamgame',
+            name='is_removed',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='steamgame',
+            name='sync_generation',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:19
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_stats(apps, schema_editor):
+    # Same counters api.stats.tally() keeps, counted once over the existing catalog
+    SteamGame = apps.get_model('api', 'SteamGame')
+    CatalogStat = apps.get_model('api', 'CatalogStat')
+    live = Q(is_removed=False)
+    counts = SteamGame.objects.aggregate(
+        games=Count('appid', filter=live),
+        with_details=Count('appid', filter=live & Q(has_details=True)),
+        stale=Count('appid', filter=live & Q(has_details=True, details_stale=True)),
+        removed=Count('appid', filter=Q(is_removed=True)),
+        free=Count('appid', filter=live & Q(details__is_free=True)),
+        paid=Count('appid', filter=live & Q(details__is_free=False)),
+        detail_non_games=Count('appid', filter=Q(details__is_game=False)),
+    )
+    reasons = SteamGame.objects.filter(is_non_game=True).values('non_game_reason').annotate(total=Count('appid')).order_by()
+    for row in reasons:
+        counts['non_games:' + row['non_game_reason']] = row['total']
+    CatalogStat.objects.bulk_create([CatalogStat(name=name, value=value) for name, value in counts.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_incremental_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogStat',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:24
+
+from django.db import migrations, models
+
+
+def backfill_change_log(apps, schema_editor):
+    # One entry per stored game, so a consumer starting from seq 0 reads the whole catalog once
+    SteamGame = apps.get_model('api', 'SteamGame')
+    ChangeLogEntry = apps.get_model('api', 'ChangeLogEntry')
+    last_appid = None
+    while True:
+        appids = SteamGame.objects.order_by('appid').values_list('appid', flat=True)
+        if last_appid is not None:
+            appids = appids.filter(appid__gt=last_appid)
+        appids = list(appids[:5000])
+        if not appids:
+            return
+        ChangeLogEntry.objects.bulk_create([ChangeLogEntry(appid=appid) for appid in appids])
+        last_appid = appids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_catalog_stat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('appid', models.IntegerField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_change_log, migrations.RunPython.noop),
+    ]
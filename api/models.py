@@ -1,5 +1,28 @@
+import re
+
 from django.db import models
 
+from .classify import classify_name
+
+NON_ALNUM = re.compile(r"[\W_]+")
+
+
+def normalize_name(name):
+    """
+    Lowercased game name with punctuation and symbols (™, ®, :, -) collapsed to single spaces. Search and autocomplete
+    compare against this form so "DOOM: Eternal" and "doom eternal" are the same thing.
+    """
+    return NON_ALNUM.sub(" ", name.casefold()).strip()
+
+
+class SteamGameQuerySet(models.QuerySet):
+    def live(self):
+        """
+        Games still in the Steam catalog, without the tombstones left by the incremental sync.
+        """
+        return self.filter(is_removed=False)
+
+
 # Create your models here.
 class SteamGame(models.Model):
     """
@@ -9,9 +32,74 @@ class SteamGame(models.Model):
     appid = models.IntegerField(primary_key=True)
     name = models.CharField(max_length=255)
     has_details = models.BooleanField(default=False)
+    # normalize_name(name), indexed for prefix lookups and (on Postgres) trigram search
+    search_name = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    # set from the name when the game is ingested, see api.classify
+    is_non_game = models.BooleanField(default=False, db_index=True)
+    non_game_reason = models.CharField(max_length=50, blank=True, default='')
+    # incremental catalog sync (api.sync): hash of the GetAppList record, generation of the SyncRun that last
+    # added/changed/removed the game, tombstone for apps gone from Steam, and whether the details need a refetch
+    content_hash = models.CharField(max_length=16, blank=True, default='')
+    sync_generation = models.PositiveIntegerField(default=0, db_index=True)
+    is_removed = models.BooleanField(default=False, db_index=True)
+    details_stale = models.BooleanField(default=False)
+
+    objects = SteamGameQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_name(self.name)
+        self.non_game_reason = classify_name(self.name)
+        self.is_non_game = bool(self.non_game_reason)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
+
+
+class SyncRun(models.Model):
+    """
+    One incremental catalog sync. Its id is the sync generation stored on the games it touched.
+    """
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    added = models.PositiveIntegerField(default=0)
+    changed = models.PositiveIntegerField(default=0)
+    removed = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Sync {self.pk}: +{self.added} ~{self.changed} -{self.removed}"
+
+
+class CatalogStat(models.Model):
+    """
+    A materialized catalog counter ("games", "with_details", "free", ...). The write paths keep them up to date
+    through api.stats.track_stats, so the dashboard numbers never need a COUNT over SteamGame;
+    `manage.py reconcile_stats` recounts them if they ever drift.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class ChangeLogEntry(models.Model):
+    """
+    One entry of the change feed (api.changes): the SteamGame `appid` (or its details) was inserted, updated or
+    deleted. seq only ever grows, consumers keep the last one they read as their cursor. This is not an append-only
+    log: a new entry replaces the older ones of the same appid, so it never holds more than one row per game, and no
+    operation is stored, the feed reads the current row. Delivery is best-effort, see api.changes.changes_page.
+    """
+    seq = models.BigAutoField(primary_key=True)
+    appid = models.IntegerField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.seq}: {self.appid}"
+
+
 class SteamGameDetail(models.Model):
     """
     A model representing the details of a steam game. Linked to the SteamGame model through a ForeignKey.
@@ -31,3 +119,122 @@ class SteamGameDetail(models.Model):
 
     def __str__(self):
         return f"{self.name} Details by {self.developers}"
+
+
+class CrawlTask(models.Model):
+    """
+    One appid of the appdetails crawl backlog. Crawler nodes claim tasks in batches and hold them through a lease,
+    an expired lease means the node died and the task goes back to the queue.
+    """
+    PENDING = 'pending'
+    CLAIMED = 'claimed'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (CLAIMED, 'Claimed'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    steam_game = models.OneToOneField(SteamGame, on_delete=models.CASCADE, primary_key=True, related_name='crawl_task')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    claimed_by = models.CharField(max_length=100, blank=True, default='')
+    lease_expires_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # tasks queued by user facing requests (search) are claimed before the backlog
+    priority = models.SmallIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'lease_expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.steam_game_id} ({self.status})"
+
+
+class CrawlNode(models.Model):
+    """
+    Progress of one crawler node (a `crawl_details --distributed` process), refreshed after every batch it finishes.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+    processed = models.PositiveIntegerField(default=0)
+    stored = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+    rate = models.FloatField(default=0.0)
+
+    def __str__(self):
+        return self.name
+
+
+class FetchJob(models.Model):
+    """
+    A batch of detail fetches queued by a request (a search for now). The appids themselves are fetched through the
+    CrawlTask queue by the crawler workers, the job only remembers which ones it asked for to report progress.
+    """
+    query = models.CharField(max_length=255, blank=True, default='')
+    appids = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Job {self.pk} ({len(self.appids)} apps)"
+
+
+class AppDetailsArchive(models.Model):
+    """
+    The raw appdetails `data` payload of an app as Steam sent it, compressed (see api.archive).
+    Kept in its own table so the detail queries never read the blobs, and keyed by appid without a ForeignKey
+    so the payload survives the app being deleted as a non-game.
+    """
+    appid = models.IntegerField(primary_key=True)
+    payload = models.BinaryField()
+    fetched_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Archived appdetails of {self.appid}"
+
+
+class Genre(models.Model):
+    """
+    A Steam genre ("RPG", "Indie"). game_count is kept up to date by api.facets whenever games are linked or removed,
+    so the browse facets never have to count the link table.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    games = models.ManyToManyField(SteamGameDetail, related_name='genre_set', blank=True)
+    game_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+
+
+class Category(models.Model):
+    """
+    A Steam store category ("Co-op", "Single-player"), keyed by the category id Steam uses.
+    """
+    id = models.IntegerField(primary_key=True)
+    description = models.CharField(max_length=255)
+    games = models.ManyToManyField(SteamGameDetail, related_name='category_set', blank=True)
+    game_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'categories'
+
+    def __str__(self):
+        return self.description
+
+
+class Developer(models.Model):
+    """
+    A game developer, split out of the comma joined SteamGameDetail.developers column.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    games = models.ManyToManyField(SteamGameDetail, related_name='developer_set', blank=True)
+    # there are tens of thousands of developers, the facet only shows the biggest ones
+    game_count = models.PositiveIntegerField(default=0, db_index=True)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,86 @@
+import csv
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+DEFAULT_PAGE_SIZE = getattr(settings, "GAME_LIST_PAGE_SIZE", 100)
+MAX_PAGE_SIZE = getattr(settings, "GAME_LIST_MAX_PAGE_SIZE", 1000)
+EXPORT_CHUNK_SIZE = 2000
+
+
+def int_param(request, name, default):
+    try:
+        return int(request.GET.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def keyset_page(queryset, request, key="appid", page_size=None, row_factory=list):
+    """
+    Cursor pagination on a unique, indexed column: `?after=<key>` returns the rows right after that key.
+    Unlike OFFSET this costs the same on the last page as on the first one.
+    `row_factory` turns the sliced queryset into rows (model instances by default).
+    Returns (rows, next_cursor), next_cursor is None on the last page.
+    """
+    size = int_param(request, "page_size", page_size or DEFAULT_PAGE_SIZE)
+    size = max(1, min(size, MAX_PAGE_SIZE))
+    after = request.GET.get("after")
+    if after is not None:
+        try:
+            queryset = queryset.filter(**{f"{key}__gt": after})
+        except (TypeError, ValueError):
+            # a malformed cursor just starts from the first page
+            pass
+    # one extra row tells us if there is a next page without a COUNT
+    rows = row_factory(queryset.order_by(key)[:size + 1])
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        next_cursor = last[key] if isinstance(last, dict) else getattr(last, key)
+    return rows, next_cursor
+
+
+def iter_keyset(queryset, key="appid", chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Walk a whole queryset in key order, chunk by chunk, so only one chunk is ever held in memory.
+    Works with querysets of model instances as well as .values()/.values_list() rows.
+    """
+    after = None
+    while True:
+        chunk_queryset = queryset if after is None else queryset.filter(**{f"{key}__gt": after})
+        chunk = list(chunk_queryset.order_by(key)[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last = chunk[-1]
+        if isinstance(last, dict):
+            after = last[key]
+        elif isinstance(last, tuple):
+            after = last[0]
+        else:
+            after = getattr(last, key)
+
+
+class Echo:
+    """
+    File-like object csv.writer can write into, it just hands the line back to the streaming generator.
+    """
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, fields, filename):
+    """
+    Stream a queryset out as CSV. Rows are read with keyset chunks on the first field, never loaded all at once.
+    """
+    writer = csv.writer(Echo())
+
+    def rows():
+        yield writer.writerow(fields)
+        for row in iter_keyset(queryset.values_list(*fields), key=fields[0]):
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(rows(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
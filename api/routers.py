@@ -0,0 +1,107 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Cookie telling the next requests of a client that it just wrote, so it keeps reading from the primary
+STICKY_COOKIE = "steamdb_primary"
+
+
+class _RequestState:
+    # a mutable holder, so a write made inside sync_to_async (another context copy) still pins the request
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_request_state = ContextVar("replica_request_state", default=None)
+
+
+def replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+class ReplicaRouter:
+    """
+    Sends the reads made while serving a request to a random replica of settings.DATABASE_REPLICAS, everything else
+    to the primary. A request reads from the primary once it wrote something (and, through STICKY_COOKIE, so do
+    the next requests of that client for REPLICA_STICKY_SECONDS), and so does any read inside a transaction.
+    Management commands and the crawler never go through ReplicaMiddleware, so they only ever use the primary.
+    """
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or state.pinned or not replicas():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas())
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    """
+    Opens the per-request routing state ReplicaRouter reads, and keeps a client on the primary for a few seconds
+    after it wrote, so it reads its own writes while the replicas catch up.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.finish(state, response)
+
+    @staticmethod
+    def start(request):
+        state = _RequestState(pinned=STICKY_COOKIE in request.COOKIES)
+        return state, _request_state.set(state)
+
+    @staticmethod
+    def finish(state, response):
+        if state.wrote and replicas():
+            response.set_cookie(STICKY_COOKIE, "1", max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite="Lax")
+        return response
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    connection_created handler running settings.SQLITE_PRAGMAS on every new SQLite connection (the WAL profile).
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma in getattr(settings, "SQLITE_PRAGMAS", []):
+            cursor.execute(f"PRAGMA {pragma}")
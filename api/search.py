@@ -0,0 +1,128 @@
+from django.db import connection
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Length
+
+from .models import SteamGame, normalize_name
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+# pg_trgm's default word_similarity_threshold, the SQLite fallback uses the same cut-off
+SIMILARITY_THRESHOLD = 0.6
+# upper bound of rows the SQLite fallback ranks in python
+FALLBACK_CANDIDATES = 5000
+
+
+def trigrams(text):
+    """
+    The trigram set of a normalized string, built like pg_trgm does: every word padded with two spaces in front
+    and one behind.
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(query, name):
+    """
+    Python stand-in for pg_trgm's word_similarity(query, name): the best trigram overlap between the query and any
+    run of consecutive words of the name.
+    """
+    query_grams = trigrams(query)
+    if not query_grams:
+        return 0.0
+    words = name.split()
+    width = max(len(query.split()), 1)
+    best = 0.0
+    for start in range(max(len(words) - width + 1, 1)):
+        for size in (width - 1, width, width + 1):
+            if size < 1:
+                continue
+            window_grams = trigrams(" ".join(words[start:start + size]))
+            if window_grams:
+                best = max(best, len(query_grams & window_grams) / len(query_grams))
+    return best
+
+
+def _search_postgres(query, limit):
+    from django.contrib.postgres.lookups import TrigramWordSimilar
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    # `search_name %> query` is what the GIN trigram index answers, the annotation only ranks the matches
+    return list(
+        SteamGame.objects.live().filter(TrigramWordSimilar(F('search_name'), query))
+        .annotate(rank=TrigramWordSimilarity(query, 'search_name'))
+        .order_by('-rank', 'appid')
+        .only('appid', 'name', 'has_details')[:limit]
+    )
+
+
+def _search_fallback(query, limit):
+    # Any game sharing one of the query's trigrams is a candidate, which tolerates a typo in every other trigram
+    grams = sorted(gram.strip() for gram in trigrams(query) if len(gram.strip()) == 3)
+    if not grams:
+        grams = [query]
+    candidates = SteamGame.objects.none()
+    for gram in grams:
+        candidates = candidates | SteamGame.objects.live().filter(search_name__contains=gram)
+    # the candidates sharing the most trigrams with the query (then the shortest names) are the ones worth ranking,
+    # so they are sorted before the cap rather than whichever rows the database happened to return first
+    shared = sum((Case(When(search_name__contains=gram, then=Value(1)), default=Value(0)) for gram in grams), Value(0))
+    candidates = candidates.annotate(shared=shared).order_by('-shared', Length('search_name'), 'appid')
+    scored = []
+    for game in candidates.only('appid', 'name', 'has_details', 'search_name')[:FALLBACK_CANDIDATES]:
+        score = similarity(query, game.search_name)
+        if score >= SIMILARITY_THRESHOLD:
+            game.rank = score
+            scored.append(game)
+    scored.sort(key=lambda game: (-game.rank, game.appid))
+    return scored[:limit]
+
+
+def search_games(query, limit=DEFAULT_LIMIT):
+    """
+    Typo tolerant, relevance ranked name search. Uses the pg_trgm index on Postgres and a trigram scan in python
+    on other databases. Every returned game carries its score in `game.rank`.
+    """
+    query = normalize_name(query)
+    if not query:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+    if connection.vendor == 'postgresql':
+        return _search_postgres(query, limit)
+    return _search_fallback(query, limit)
+
+
+def autocomplete(prefix, limit=10):
+    """
+    Games whose normalized name starts with `prefix`, in alphabetical order. A LIKE 'prefix%' on search_name: Postgres
+    answers it from the varchar_pattern_ops index Django adds next to the btree one (search_name_..._like), whatever
+    the collation of the database. An upper bound like prefix + U+FFFF would depend on that collation.
+    """
+    prefix = normalize_name(prefix)
+    if not prefix:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+    rows = (
+        SteamGame.objects.live().filter(search_name__startswith=prefix)
+        .order_by('search_name')
+        .values('appid', 'name')[:limit]
+    )
+    return list(rows)
+
+
+def name_match(query, field='search_name'):
+    """
+    Filter condition on a search_name column (`field`, e.g. 'steam_game__search_name' from a detail) that an index
+    answers: the pg_trgm word similarity on Postgres, a prefix match on the search_name index elsewhere.
+    None when nothing is left of `query` once normalized.
+    """
+    query = normalize_name(query)
+    if not query:
+        return None
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.lookups import TrigramWordSimilar
+
+        return TrigramWordSimilar(F(field), query)
+    return Q(**{f'{field}__startswith': query})
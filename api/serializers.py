@@ -0,0 +1,88 @@
+import gzip
+import json
+
+try:
+    import orjson
+except ImportError:  # optional, only makes dumping faster
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is used when it's missing
+    brotli = None
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+# Public field name -> ORM path, for the sparse fieldsets of the JSON API (?fields=appid,name,is_free)
+GAME_FIELDS = {
+    'appid': 'appid',
+    'name': 'name',
+    'has_details': 'has_details',
+    'is_free': 'details__is_free',
+    'required_age': 'details__required_age',
+    'header_image': 'details__header_image',
+    'website': 'details__website',
+    'developers': 'details__developers',
+    'genres': 'details__genres',
+    'categories': 'details__categories',
+    'about_the_game': 'details__about_the_game',
+}
+DEFAULT_LIST_FIELDS = ('appid', 'name', 'has_details')
+DEFAULT_DETAIL_FIELDS = tuple(GAME_FIELDS)
+# below this size compressing costs more than it saves
+COMPRESS_MIN_BYTES = 1024
+
+
+class FieldError(ValueError):
+    pass
+
+
+def parse_fields(request, default):
+    """
+    The public fields asked for with ?fields=, `default` when the parameter is missing. appid is always included
+    since it is the pagination cursor. Raises FieldError on unknown names.
+    """
+    raw = request.GET.get('fields')
+    if not raw:
+        return tuple(default)
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in GAME_FIELDS]
+    if unknown:
+        raise FieldError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(GAME_FIELDS)}.")
+    if 'appid' not in fields:
+        fields.insert(0, 'appid')
+    return tuple(dict.fromkeys(fields))
+
+
+def game_rows(queryset, fields):
+    """
+    Fetch `fields` with values_list() and zip them into plain dicts, no model instances are built.
+    appid has to be the first field.
+    """
+    return [dict(zip(fields, row)) for row in queryset.values_list(*(GAME_FIELDS[field] for field in fields))]
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, default=str)
+    return json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+
+def json_response(request, payload, status=200):
+    """
+    JSON response compressed with brotli or gzip when the client accepts it and the body is worth it.
+    """
+    body = dumps(payload)
+    response = HttpResponse(body, content_type='application/json', status=status)
+    response['Vary'] = 'Accept-Encoding'
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+    accepted = {encoding.split(';')[0].strip() for encoding in request.headers.get('Accept-Encoding', '').split(',')}
+    if brotli is not None and 'br' in accepted:
+        response.content = brotli.compress(body, quality=5)
+        response['Content-Encoding'] = 'br'
+    elif 'gzip' in accepted:
+        response.content = gzip.compress(body, compresslevel=5)
+        response['Content-Encoding'] = 'gzip'
+    return response
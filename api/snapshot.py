@@ -0,0 +1,340 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import uuid
+from array import array
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always there
+    zstandard = None
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import bump_game_versions
+from .changes import record_changes
+from .facets import release_details, set_detail_tags
+from .ingest import _batched
+from .models import Category, Developer, Genre, SteamGame, SteamGameDetail
+from .pagination import iter_keyset
+from .stats import track_stats
+from .titleindex import build_title_index, snapshot_path
+
+FORMAT = "steamdb-snapshot"
+VERSION = 1
+SNAPSHOT_CHUNK_SIZE = 5000
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+INDEX_MAGIC = b"SDBH"
+GAME_FIELDS = [
+    "appid", "name", "has_details", "search_name", "is_non_game", "non_game_reason", "content_hash",
+    "sync_generation", "is_removed", "details_stale",
+]
+DETAIL_FIELDS = [
+    "name", "required_age", "is_free", "is_game", "about_the_game", "header_image", "website", "developers",
+    "categories", "genres",
+]
+
+
+class SnapshotError(Exception):
+    """
+    Raised for a file that isn't a snapshot, or a delta applied on top of the wrong snapshot.
+    """
+
+
+def index_path(path):
+    # the appid -> row hash state of a snapshot, what the next delta is diffed against
+    return f"{path}.index"
+
+
+def _open_write(path):
+    raw = open(path, "wb")
+    if zstandard is not None:
+        stream = zstandard.ZstdCompressor(level=6).stream_writer(raw, closefd=True)
+    else:
+        stream = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)
+        # GzipFile doesn't close a fileobj it was handed
+        stream.myfileobj = raw
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+def _open_read(path):
+    raw = open(path, "rb")
+    magic = raw.read(4)
+    raw.seek(0)
+    if magic == ZSTD_MAGIC:
+        if zstandard is None:
+            raw.close()
+            raise SnapshotError(f"{path} is zstd compressed, install the zstandard package to read it.")
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    else:
+        stream = gzip.GzipFile(fileobj=raw, mode="rb")
+        stream.myfileobj = raw
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+def write_index(path, snapshot_id, appids, hashes):
+    """
+    Sorted appids and their 8 byte row hashes, 12 bytes per game.
+    """
+    header = json.dumps({"id": snapshot_id, "count": len(appids)}).encode()
+    with open(path, "wb") as f:
+        f.write(INDEX_MAGIC + len(header).to_bytes(4, "little") + header)
+        appids.tofile(f)
+        f.write(hashes)
+
+
+def read_index(path):
+    """
+    (snapshot id, appids array, hashes bytes) of a snapshot's index file.
+    """
+    with open(path, "rb") as f:
+        if f.read(4) != INDEX_MAGIC:
+            raise SnapshotError(f"{path} is not a snapshot index.")
+        header = json.loads(f.read(int.from_bytes(f.read(4), "little")))
+        appids = array("I")
+        appids.fromfile(f, header["count"])
+        hashes = f.read(header["count"] * 8)
+    return header["id"], appids, hashes
+
+
+def _tag_rows(appids):
+    """
+    {appid: [genre names, [[category id, description]], developer names]} read from the tag tables for a chunk.
+    Sorted, so relinking the same tags doesn't change the row hash.
+    """
+    tags = {}
+    sources = ((Genre, ["genre__name"]), (Category, ["category__id", "category__description"]), (Developer, ["developer__name"]))
+    for position, (model, fields) in enumerate(sources):
+        links = model.games.through.objects.filter(steamgamedetail__steam_game_id__in=appids)
+        for appid, *tag in links.values_list("steamgamedetail__steam_game_id", *fields):
+            tags.setdefault(appid, [[], [], []])[position].append(tag if len(tag) > 1 else tag[0])
+    for values in tags.values():
+        for tag_list in values:
+            tag_list.sort()
+    return tags
+
+
+def iter_records(chunk_size=SNAPSHOT_CHUNK_SIZE):
+    """
+    (appid, record) for every game in appid order, record being [game values, detail values or None, tags or None].
+    Reads one chunk of games, their details and their tags at a time.
+    """
+    games = iter_keyset(SteamGame.objects.values_list(*GAME_FIELDS), chunk_size=chunk_size)
+    for chunk in _batched(games, chunk_size):
+        appids = [row[0] for row in chunk]
+        details = {
+            row[0]: list(row[1:])
+            for row in SteamGameDetail.objects.filter(steam_game_id__in=appids)
+            .values_list("steam_game_id", *DETAIL_FIELDS)
+        }
+        tags = _tag_rows(appids) if details else {}
+        for row in chunk:
+            yield row[0], [list(row), details.get(row[0]), tags.get(row[0])]
+
+
+def export_snapshot(path, base=None, chunk_size=SNAPSHOT_CHUNK_SIZE):
+    """
+    Stream the catalog (games, details and their tags) to a compressed NDJSON file at `path`: a header line, then one
+    line per game. With `base` (the path of an earlier snapshot) only the games whose row changed since that snapshot
+    are written, plus a {"deleted": appid} line for every game gone since. Either way `path`.index gets the full
+    appid -> hash state, so a delta can be taken against any snapshot. Returns (games written, games deleted).
+    """
+    base_id, base_appids, base_hashes = read_index(index_path(base)) if base else (None, array("I"), b"")
+    snapshot_id = uuid.uuid4().hex
+    appids = array("I")
+    hashes = bytearray()
+    written = deleted = 0
+    cursor = 0
+    with _open_write(path) as out:
+        out.write(json.dumps({
+            "format": FORMAT, "version": VERSION, "id": snapshot_id, "base": base_id,
+            "created_at": timezone.now().isoformat(), "game_fields": GAME_FIELDS, "detail_fields": DETAIL_FIELDS,
+        }) + "\n")
+        for appid, record in iter_records(chunk_size):
+            line = json.dumps(record, separators=(",", ":"))
+            digest = hashlib.blake2b(line.encode(), digest_size=8).digest()
+            # both sides are in appid order, so the diff against the base is a merge join
+            while cursor < len(base_appids) and base_appids[cursor] < appid:
+                out.write(json.dumps({"deleted": base_appids[cursor]}) + "\n")
+                deleted += 1
+                cursor += 1
+            unchanged = (
+                cursor < len(base_appids) and base_appids[cursor] == appid
+                and base_hashes[cursor * 8:cursor * 8 + 8] == digest
+            )
+            if cursor < len(base_appids) and base_appids[cursor] == appid:
+                cursor += 1
+            if not unchanged:
+                out.write(line + "\n")
+                written += 1
+            appids.append(appid)
+            hashes += digest
+        for appid in base_appids[cursor:]:
+            out.write(json.dumps({"deleted": appid}) + "\n")
+            deleted += 1
+    write_index(index_path(path), snapshot_id, appids, bytes(hashes))
+    return written, deleted
+
+
+def read_snapshot(path):
+    """
+    (header, iterator of lines) of a snapshot file. Each line is either a record or a {"deleted": appid} dict.
+    """
+    f = _open_read(path)
+    try:
+        header = json.loads(f.readline())
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get("format") != FORMAT:
+        f.close()
+        raise SnapshotError(f"{path} is not a catalog snapshot.")
+    if header["version"] > VERSION:
+        f.close()
+        raise SnapshotError(f"{path} has snapshot version {header['version']}, this code reads up to {VERSION}.")
+
+    def lines():
+        with f:
+            for line in f:
+                yield json.loads(line)
+    return header, lines()
+
+
+def _copy_value(value):
+    # COPY text format
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _upsert_sql(model, columns, source, conflict):
+    quote = connection.ops.quote_name
+    updates = ", ".join(f"{quote(column)} = EXCLUDED.{quote(column)}" for column in columns if column != conflict)
+    return (
+        f"INSERT INTO {quote(model._meta.db_table)} ({', '.join(quote(column) for column in columns)}) {source} "
+        f"ON CONFLICT ({quote(conflict)}) DO UPDATE SET {updates}"
+    )
+
+
+def _copy_upsert(cursor, model, columns, rows, conflict):
+    """
+    Postgres: COPY the rows into a temporary staging table and upsert them from there in one statement.
+    """
+    quote = connection.ops.quote_name
+    table = model._meta.db_table
+    staging = quote(f"snapshot_{table}")
+    column_list = ", ".join(quote(column) for column in columns)
+    cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+    cursor.execute(f"CREATE TEMPORARY TABLE {staging} AS SELECT {column_list} FROM {quote(table)} WITH NO DATA")
+    data = "".join("\t".join(_copy_value(value) for value in row) + "\n" for row in rows)
+    copy_sql = f"COPY {staging} ({column_list}) FROM STDIN"
+    raw = cursor.cursor
+    if hasattr(raw, "copy"):  # psycopg 3
+        with raw.copy(copy_sql) as copy:
+            copy.write(data)
+    else:  # psycopg2
+        raw.copy_expert(copy_sql, io.StringIO(data))
+    cursor.execute(_upsert_sql(model, columns, f"SELECT {column_list} FROM {staging}", conflict))
+    cursor.execute(f"DROP TABLE {staging}")
+
+
+def _upsert_rows(model, columns, rows, conflict):
+    """
+    Insert or overwrite `rows` (value lists in `columns` order) keyed on the unique `conflict` column.
+    COPY on Postgres, one executemany of INSERT ... ON CONFLICT on SQLite, the ORM elsewhere.
+    """
+    if connection.vendor in ("postgresql", "sqlite"):
+        json_columns = [
+            index for index, column in enumerate(columns)
+            if model._meta.get_field(column).get_internal_type() == "JSONField"
+        ]
+        for row in rows:
+            for index in json_columns:
+                if row[index] is not None:
+                    row[index] = json.dumps(row[index])
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            _copy_upsert(cursor, model, columns, rows, conflict)
+        elif connection.vendor == "sqlite":
+            placeholders = ", ".join(["%s"] * len(columns))
+            cursor.executemany(_upsert_sql(model, columns, f"VALUES ({placeholders})", conflict), rows)
+        else:
+            fields = [model._meta.get_field(column).name for column in columns]
+            model.objects.bulk_create(
+                [model(**dict(zip(columns, row))) for row in rows],
+                update_conflicts=True, unique_fields=[model._meta.get_field(conflict).name],
+                update_fields=[field for field, column in zip(fields, columns) if column != conflict],
+            )
+
+
+def _upsert_games(games, details):
+    """
+    Insert or overwrite the SteamGame rows (dicts of GAME_FIELDS) and the SteamGameDetail rows ({appid: dict of
+    DETAIL_FIELDS}) of one batch.
+    """
+    _upsert_rows(SteamGame, GAME_FIELDS, [[game[field] for field in GAME_FIELDS] for game in games], "appid")
+    if details:
+        rows = [[appid] + [detail[field] for field in DETAIL_FIELDS] for appid, detail in details.items()]
+        _upsert_rows(SteamGameDetail, ["steam_game_id", *DETAIL_FIELDS], rows, "steam_game_id")
+
+
+def _apply_batch(header, lines):
+    game_fields, detail_fields = header["game_fields"], header["detail_fields"]
+    deletes = [line["deleted"] for line in lines if isinstance(line, dict)]
+    records = [line for line in lines if not isinstance(line, dict)]
+    games = [dict(zip(game_fields, game)) for game, _, _ in records]
+    details = {
+        game[0]: dict(zip(detail_fields, detail)) for game, detail, _ in records if detail is not None
+    }
+    appids = [game["appid"] for game in games]
+    without_details = [appid for appid in appids if appid not in details]
+    with transaction.atomic(), track_stats(appids + deletes):
+        if deletes:
+            release_details(SteamGameDetail.objects.filter(steam_game_id__in=deletes))
+            SteamGame.objects.filter(appid__in=deletes).delete()
+        if without_details:
+            # a delta can carry a game whose details were dropped (stale refetch pending)
+            gone = SteamGameDetail.objects.filter(steam_game_id__in=without_details)
+            release_details(gone)
+            gone.delete()
+        _upsert_games(games, details)
+        if details:
+            detail_ids = dict(
+                SteamGameDetail.objects.filter(steam_game_id__in=list(details)).values_list("steam_game_id", "pk")
+            )
+            set_detail_tags(
+                (detail_ids[game[0]], (tags[0], [tuple(category) for category in tags[1]], tags[2]))
+                for game, detail, tags in records if detail is not None and tags is not None
+            )
+    bump_game_versions(appids + deletes)
+    record_changes(appids + deletes)
+    return len(records), len(deletes)
+
+
+def import_snapshot(path, expected_base=None, batch_size=SNAPSHOT_CHUNK_SIZE, report=None):
+    """
+    Load a snapshot written by export_snapshot() into the database, batch by batch in one transaction each. Games are
+    upserted (COPY into a staging table on Postgres, bulk INSERT ... ON CONFLICT elsewhere), deleted games of a delta
+    are removed, tag links, facet and catalog counters follow. `expected_base` is the id of the snapshot imported before this
+    one, a delta built on another base raises SnapshotError. Returns (header, games loaded, games deleted).
+    """
+    header, lines = read_snapshot(path)
+    if header["base"] is not None and expected_base is not None and header["base"] != expected_base:
+        raise SnapshotError(
+            f"{path} is a delta against snapshot {header['base']}, the previous snapshot loaded was {expected_base}."
+        )
+    loaded = deleted = 0
+    for batch in _batched(lines, batch_size):
+        batch_loaded, batch_deleted = _apply_batch(header, batch)
+        loaded += batch_loaded
+        deleted += batch_deleted
+        if report:
+            report(loaded, deleted)
+    title_index = snapshot_path()
+    if title_index and os.path.exists(title_index):
+        build_title_index()
+    return header, loaded, deleted
@@ -0,0 +1,136 @@
+from collections import Counter
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import CatalogStat, SteamGame
+
+# appids per aggregate query when tallying the rows a write touches
+TALLY_BATCH_SIZE = 5000
+# prefix of the per-reason counters of the name-classified non-games (api.classify)
+NON_GAME_PREFIX = "non_games:"
+
+LIVE = Q(is_removed=False)
+
+
+def tally(games):
+    """
+    The catalog counters the SteamGame queryset `games` contributes, as a Counter keyed by CatalogStat name.
+    Two grouped queries over `games` only, so tallying the few rows a write touched is cheap.
+    The non-game counters include the tombstones, like the delete views they stand in for.
+    """
+    counts = Counter(games.aggregate(
+        games=Count("appid", filter=LIVE),
+        with_details=Count("appid", filter=LIVE & Q(has_details=True)),
+        stale=Count("appid", filter=LIVE & Q(has_details=True, details_stale=True)),
+        removed=Count("appid", filter=Q(is_removed=True)),
+        free=Count("appid", filter=LIVE & Q(details__is_free=True)),
+        paid=Count("appid", filter=LIVE & Q(details__is_free=False)),
+        detail_non_games=Count("appid", filter=Q(details__is_game=False)),
+    ))
+    reasons = games.filter(is_non_game=True).values("non_game_reason").annotate(total=Count("appid")).order_by()
+    for row in reasons:
+        counts[NON_GAME_PREFIX + row["non_game_reason"]] += row["total"]
+    return counts
+
+
+def _tally_appids(appids):
+    counts = Counter()
+    iterator = iter(appids)
+    while batch := list(islice(iterator, TALLY_BATCH_SIZE)):
+        counts.update(tally(SteamGame.objects.filter(appid__in=batch)))
+    return counts
+
+
+def bump_stats(deltas):
+    """
+    Add `deltas` ({name: change}) to the CatalogStat rows with single UPDATE ... SET value = value + n statements,
+    so concurrent writers never overwrite each other. Missing rows (a new non-game reason) are created first.
+    """
+    now = timezone.now()
+    missing = []
+    for name, delta in deltas.items():
+        if delta and not CatalogStat.objects.filter(name=name).update(value=F("value") + delta, updated_at=now):
+            missing.append(name)
+    if missing:
+        CatalogStat.objects.bulk_create([CatalogStat(name=name) for name in missing], ignore_conflicts=True)
+        for name in missing:
+            CatalogStat.objects.filter(name=name).update(value=F("value") + deltas[name], updated_at=now)
+
+
+@contextmanager
+def track_stats(appids):
+    """
+    Keep the catalog counters in step with a write to the SteamGame/SteamGameDetail rows of `appids`:
+    their contribution is tallied before and after the block and the difference applied with bump_stats.
+    Costs two indexed queries per TALLY_BATCH_SIZE appids whatever the write does (insert, update, tombstone,
+    delete), which is what lets the bulk paths keep the counters without per-row bookkeeping.
+    """
+    appids = list(appids)
+    before = _tally_appids(appids)
+    yield
+    after = _tally_appids(appids)
+    after.subtract(before)
+    bump_stats(after)
+
+
+def read_stats():
+    """
+    Every counter, {name: value}. One query over a handful of rows.
+    """
+    return dict(CatalogStat.objects.values_list("name", "value"))
+
+
+def catalog_stats():
+    """
+    Dashboard numbers of the catalog, read from the maintained counters: nothing is counted over SteamGame.
+    """
+    stats = read_stats()
+    reasons = {
+        name[len(NON_GAME_PREFIX):]: value for name, value in stats.items()
+        if name.startswith(NON_GAME_PREFIX) and value
+    }
+    games = stats.get("games", 0)
+    with_details = stats.get("with_details", 0)
+    return {
+        "games": games,
+        "with_details": with_details,
+        "without_details": games - with_details,
+        "stale_details": stats.get("stale", 0),
+        "free": stats.get("free", 0),
+        "paid": stats.get("paid", 0),
+        "removed": stats.get("removed", 0),
+        "non_games": sum(reasons.values()),
+        "non_game_reasons": dict(sorted(reasons.items(), key=lambda item: -item[1])),
+        "detail_non_games": stats.get("detail_non_games", 0),
+    }
+
+
+def backlog_size():
+    """
+    Size of the detail crawl backlog (api.crawler.backlog_queryset) from the counters: live games without
+    details plus the ones whose details went stale.
+    """
+    stats = read_stats()
+    return stats.get("games", 0) - stats.get("with_details", 0) + stats.get("stale", 0)
+
+
+def reconcile_stats():
+    """
+    Recount every counter over the whole catalog and overwrite the stored values. Returns the drift that was
+    corrected, {name: stored - actual}, for the counters that were off.
+    """
+    actual = tally(SteamGame.objects.all())
+    stored = read_stats()
+    drift = {
+        name: stored.get(name, 0) - actual.get(name, 0)
+        for name in set(stored) | set(actual)
+        if stored.get(name, 0) != actual.get(name, 0)
+    }
+    now = timezone.now()
+    CatalogStat.objects.bulk_create([CatalogStat(name=name) for name in drift if name not in stored], ignore_conflicts=True)
+    for name in drift:
+        CatalogStat.objects.filter(name=name).update(value=actual.get(name, 0), updated_at=now)
+    return drift
@@ -0,0 +1,390 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+
+try:
+    import aiohttp
+except ImportError:  # optional, without it the async client runs the sync one in threads
+    aiohttp = None
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .metrics import STEAM_HOOKS, STEAM_LATENCY, record_steam_failure
+
+
+# The store API allows roughly 200 appdetails calls per 5 minutes per IP
+APP_DETAILS_RATE = 200 / 300
+APP_DETAILS_BURST = 10
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def app_details_url():
+    # read on every call so the benchmarks can point it at the local Steam stand-in
+    return f"{settings.STEAM_STORE_URL}/api/appdetails"
+
+
+class SteamAPIError(Exception):
+    """
+    Raised when the Steam API keeps failing after all retries or answers with an unexpected status code.
+    """
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Every call to acquire() takes one token and sleeps until one is available,
+    so all the workers sharing a bucket stay under `rate` requests per second with bursts up to `capacity`.
+    """
+    def __init__(self, rate=APP_DETAILS_RATE, capacity=APP_DETAILS_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token without blocking and return how many seconds the caller has to wait before using it.
+        The bucket goes into debt, so callers reserving at the same time get successive slots.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+# The one bucket of the process: every client pacing the store API draws from it, so the sync and async views and a
+# crawl started from a view share the same budget
+app_details_limiter = TokenBucket()
+
+
+def make_session(pool_size=10):
+    """
+    A requests session with a keep-alive connection pool big enough for `pool_size` threads sharing it.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_app_details(appid, session=None, limiter=None, max_retries=5, backoff=2.0, timeout=30):
+    """
+    Get the appdetails payload for one appid. Returns the `data` dict or None when Steam has no details for it.
+    429 and 5xx answers are retried with exponential backoff (honouring Retry-After), other failures raise SteamAPIError.
+    """
+    session = session or requests
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            response = session.get(app_details_url(), params={"appids": appid}, timeout=timeout, hooks=STEAM_HOOKS)
+        except requests.RequestException as exc:
+            record_steam_failure(app_details_url())
+            if attempt == max_retries:
+                raise SteamAPIError(f"Request for app {appid} failed: {exc}") from exc
+            time.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+            continue
+        if response.status_code == 200:
+            return _details_from_payload(appid, response.json())
+        if response.status_code in RETRY_STATUSES and attempt < max_retries:
+            time.sleep(_retry_delay(response, attempt, backoff))
+            continue
+        raise SteamAPIError(
+            f"Steam answered {response.status_code} for app {appid}", status_code=response.status_code
+        )
+
+
+def _details_from_payload(appid, payload):
+    app_data = (payload or {}).get(str(appid), {})
+    if app_data.get("success"):
+        return app_data.get("data", {})
+    return None
+
+
+def _prices_from_payload(appids, payload):
+    prices = {}
+    for appid in appids:
+        app_data = (payload or {}).get(str(appid), {})
+        # free games answer success with an empty list instead of a price_overview dict
+        data = app_data.get("data") if app_data.get("success") else None
+        prices[appid] = data.get("price_overview") if isinstance(data, dict) else None
+    return prices
+
+
+def _retry_delay(response, attempt, backoff):
+    retry_after = response.headers.get("Retry-After", "")
+    delay = int(retry_after) if retry_after.isdigit() else backoff * 2 ** attempt
+    return delay + random.uniform(0, backoff)
+
+
+# appdetails only accepts several appids at once when the answer is filtered down to the price
+PRICE_BATCH_SIZE = 100
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache whose entries also expire `ttl` seconds after they were stored.
+    """
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+_MISSING = object()
+
+
+class SteamClient:
+    """
+    Process-wide front for the store API. Concurrent callers asking for the same appid share one in-flight request
+    (single-flight), answers are kept in a short-lived LRU cache, and price lookups for many appids go out
+    in batches of PRICE_BATCH_SIZE per call. Every request to Steam, retries included, takes a token from `limiter`.
+    """
+    def __init__(self, session=None, limiter=app_details_limiter, cache_size=1024, cache_ttl=60.0):
+        self.session = session or make_session()
+        self.limiter = limiter
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def _single_flight(self, key, call):
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self.in_flight[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            value = call()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            self.cache.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def app_details(self, appid):
+        """
+        Same as get_app_details(): the `data` dict of the app or None, SteamAPIError when Steam keeps failing.
+        """
+        return self._single_flight(
+            ("details", appid), lambda: get_app_details(appid, session=self.session, limiter=self.limiter)
+        )
+
+    def _fetch_prices(self, appids):
+        if self.limiter is not None:
+            self.limiter.acquire()
+        params = {"appids": ",".join(str(appid) for appid in appids), "filters": "price_overview"}
+        try:
+            response = self.session.get(app_details_url(), params=params, timeout=30, hooks=STEAM_HOOKS)
+        except requests.RequestException as exc:
+            record_steam_failure(app_details_url())
+            raise SteamAPIError(f"Price request failed: {exc}") from exc
+        if response.status_code != 200:
+            raise SteamAPIError(f"Steam answered {response.status_code} for prices", status_code=response.status_code)
+        return _prices_from_payload(appids, response.json())
+
+    def app_prices(self, appids):
+        """
+        {appid: price_overview dict or None} for many appids, one request per PRICE_BATCH_SIZE uncached appids.
+        """
+        prices = {}
+        missing = []
+        for appid in dict.fromkeys(appids):
+            value = self.cache.get(("price", appid), _MISSING)
+            if value is _MISSING:
+                missing.append(appid)
+            else:
+                prices[appid] = value
+        for start in range(0, len(missing), PRICE_BATCH_SIZE):
+            batch = tuple(missing[start:start + PRICE_BATCH_SIZE])
+            # identical batches asked for at the same time are coalesced like single appids
+            fetched = self._single_flight(("prices", batch), lambda batch=batch: self._fetch_prices(batch))
+            for appid, value in fetched.items():
+                self.cache.set(("price", appid), value)
+                prices[appid] = value
+        return prices
+
+
+class AsyncSteamClient:
+    """
+    asyncio counterpart of SteamClient for the async views under ASGI. One aiohttp session with a pool of keep-alive
+    connections is shared by every request of the event loop, so a process keeps up to `max_connections` Steam calls
+    in flight without a thread each. The answer cache is shared with `sync_client`, concurrent calls for the same
+    appid or price batch are coalesced per event loop. Without aiohttp installed the calls go through `sync_client`
+    in a thread. The token bucket is the one of `sync_client`, taken on every attempt like get_app_details() does.
+    """
+    def __init__(self, sync_client=None, limiter=app_details_limiter, max_connections=200, max_retries=5, backoff=2.0,
+                 timeout=30):
+        self.sync_client = sync_client or SteamClient(limiter=limiter)
+        self.limiter = self.sync_client.limiter
+        self.cache = self.sync_client.cache
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        # a session can't be shared across event loops (WSGI runs every async view in a loop of its own)
+        self.loops = weakref.WeakKeyDictionary()
+
+    async def _loop_state(self):
+        loop = asyncio.get_running_loop()
+        state = self.loops.get(loop)
+        if state is None:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            keeper = self._close_with_loop(session)
+            state = self.loops[loop] = (session, {}, keeper)
+            await keeper.__anext__()
+        return state
+
+    @staticmethod
+    async def _close_with_loop(session):
+        # asyncio finalizes pending async generators before it closes a loop, which closes the session of the
+        # short-lived loops too
+        try:
+            yield
+        finally:
+            await session.close()
+
+    async def aclose(self):
+        state = self.loops.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state[2].aclose()
+
+    async def _get(self, params):
+        """
+        One appdetails call with the retries of get_app_details(). Returns the decoded payload.
+        """
+        session = (await self._loop_state())[0]
+        url = app_details_url()
+        for attempt in range(self.max_retries + 1):
+            if self.limiter is not None:
+                await self.limiter.acquire_async()
+            start = time.perf_counter()
+            try:
+                async with session.get(url, params=params) as response:
+                    status = response.status
+                    STEAM_LATENCY.observe(time.perf_counter() - start, endpoint="appdetails", status=status)
+                    if status == 200:
+                        return await response.json(content_type=None)
+                    delay = _retry_delay(response, attempt, self.backoff)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                record_steam_failure(url)
+                if attempt == self.max_retries:
+                    raise SteamAPIError(f"Request for {params['appids']} failed: {exc}") from exc
+                await asyncio.sleep(self.backoff * 2 ** attempt + random.uniform(0, self.backoff))
+                continue
+            if status in RETRY_STATUSES and attempt < self.max_retries:
+                await asyncio.sleep(delay)
+                continue
+            raise SteamAPIError(f"Steam answered {status} for {params['appids']}", status_code=status)
+
+    async def _single_flight(self, key, call):
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        in_flight = (await self._loop_state())[1]
+        task = in_flight.get(key)
+        if task is None:
+            task = in_flight[key] = asyncio.ensure_future(call())
+            task.add_done_callback(lambda _: in_flight.pop(key, None))
+        # shield, so a caller that goes away doesn't cancel the request the others are waiting on
+        value = await asyncio.shield(task)
+        self.cache.set(key, value)
+        return value
+
+    async def app_details(self, appid):
+        """
+        Same as SteamClient.app_details(), awaitable.
+        """
+        if aiohttp is None:
+            return await sync_to_async(self.sync_client.app_details, thread_sensitive=False)(appid)
+
+        async def fetch():
+            return _details_from_payload(appid, await self._get({"appids": str(appid)}))
+        return await self._single_flight(("details", appid), fetch)
+
+    async def app_prices(self, appids):
+        """
+        Same as SteamClient.app_prices(), the batches are fetched concurrently.
+        """
+        if aiohttp is None:
+            return await sync_to_async(self.sync_client.app_prices, thread_sensitive=False)(appids)
+        prices = {}
+        missing = []
+        for appid in dict.fromkeys(appids):
+            value = self.cache.get(("price", appid), _MISSING)
+            if value is _MISSING:
+                missing.append(appid)
+            else:
+                prices[appid] = value
+
+        async def fetch(batch):
+            params = {"appids": ",".join(str(appid) for appid in batch), "filters": "price_overview"}
+            return _prices_from_payload(batch, await self._get(params))
+
+        batches = [tuple(missing[start:start + PRICE_BATCH_SIZE]) for start in range(0, len(missing), PRICE_BATCH_SIZE)]
+        results = await asyncio.gather(
+            *(self._single_flight(("prices", batch), lambda batch=batch: fetch(batch)) for batch in batches)
+        )
+        for fetched in results:
+            for appid, value in fetched.items():
+                self.cache.set(("price", appid), value)
+                prices[appid] = value
+        return prices
@@ -0,0 +1,120 @@
+from django.utils import timezone
+
+from .cache import bump_game_versions
+from .changes import record_changes
+from .facets import release_details, restore_details
+from .ingest import INGEST_BATCH_SIZE, _batched, build_game
+from .models import SteamGame, SteamGameDetail, SyncRun
+from .stats import read_stats, track_stats
+from .titleindex import update_title_index
+from .workqueue import enqueue_appids
+
+# Below this share of the stored catalog the app list is assumed truncated and nothing gets tombstoned
+MIN_SEEN_RATIO = 0.5
+SYNC_FIELDS = [
+    "name", "search_name", "is_non_game", "non_game_reason", "content_hash", "sync_generation", "is_removed",
+    "details_stale",
+]
+
+
+def _tombstone_missing(seen, generation, batch_size):
+    """
+    Tombstone the live games whose appid was not in this sync's app list. Only the appid index is read,
+    and only the missing games are written.
+    """
+    removed = []
+    last_appid = 0
+    while True:
+        appids = list(
+            SteamGame.objects.filter(is_removed=False, appid__gt=last_appid)
+            .order_by("appid").values_list("appid", flat=True)[:batch_size]
+        )
+        if not appids:
+            break
+        missing = [appid for appid in appids if appid not in seen]
+        if missing:
+            with track_stats(missing):
+                # browse() skips tombstones, so do the facet counters
+                release_details(SteamGameDetail.objects.filter(steam_game_id__in=missing))
+                SteamGame.objects.filter(appid__in=missing).update(is_removed=True, sync_generation=generation)
+            removed.extend(missing)
+        last_appid = appids[-1]
+    return removed
+
+
+def sync_catalog(apps, batch_size=INGEST_BATCH_SIZE):
+    """
+    Incremental catalog sync. Every GetAppList record is hashed and compared with the content_hash stored for it:
+    only added and changed games are written (stamped with this run's generation), changed games that have details
+    are flagged details_stale, and both are queued for a detail fetch. Games missing from the list are tombstoned
+    (is_removed) rather than deleted, and come back to life if they reappear: with their stored details when the
+    record is unchanged, no refetch. Returns the SyncRun.
+    """
+    run = SyncRun.objects.create()
+    generation = run.pk
+    seen = set()
+    for batch in _batched(apps, batch_size):
+        incoming = {app["appid"]: app for app in batch if "appid" in app}
+        seen.update(incoming)
+        existing = {
+            appid: (content_hash, is_removed, has_details, details_stale)
+            for appid, content_hash, is_removed, has_details, details_stale
+            in SteamGame.objects.filter(appid__in=incoming.keys())
+            .values_list("appid", "content_hash", "is_removed", "has_details", "details_stale")
+        }
+        new_games = []
+        changed_games = []
+        revived = []
+        # games whose details have to be (re)fetched: new ones, ones without details and ones flagged stale
+        fetch = []
+        for appid, app in incoming.items():
+            if appid not in existing:
+                new_games.append(build_game(app, sync_generation=generation))
+                fetch.append(appid)
+                continue
+            content_hash, is_removed, has_details, details_stale = existing[appid]
+            game = build_game(app, sync_generation=generation)
+            changed = game.content_hash != content_hash
+            # only a change of the record outdates the stored details, a revived tombstone keeps its flag
+            game.details_stale = details_stale or (has_details and changed)
+            if changed or is_removed:
+                changed_games.append(game)
+                if is_removed:
+                    revived.append(appid)
+                if not has_details or game.details_stale:
+                    fetch.append(appid)
+            else:
+                run.unchanged += 1
+        with track_stats(game.appid for game in new_games + changed_games):
+            if new_games:
+                SteamGame.objects.bulk_create(new_games, ignore_conflicts=True)
+            if changed_games:
+                SteamGame.objects.bulk_update(changed_games, SYNC_FIELDS)
+                restore_details(SteamGameDetail.objects.filter(steam_game_id__in=revived))
+                bump_game_versions(game.appid for game in changed_games)
+        run.added += len(new_games)
+        run.changed += len(changed_games)
+        touched = new_games + changed_games
+        if touched:
+            record_changes(game.appid for game in touched)
+            update_title_index(upserts=[(game.appid, game.name) for game in touched])
+        if fetch:
+            enqueue_appids(fetch, priority=0, requeue=True)
+    removed = []
+    stored = read_stats().get("games", 0)
+    if seen and len(seen) >= stored * MIN_SEEN_RATIO:
+        removed = _tombstone_missing(seen, generation, batch_size)
+        bump_game_versions(removed)
+        record_changes(removed)
+    run.removed = len(removed)
+    run.finished_at = timezone.now()
+    run.save()
+    update_title_index(deletes=removed)
+    return run
+
+
+def changed_since(generation):
+    """
+    Games added, changed or removed by the syncs after `generation`.
+    """
+    return SteamGame.objects.filter(sync_generation__gt=generation)
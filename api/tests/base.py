@@ -0,0 +1,41 @@
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from ..ingest import ingest_app_list
+from ..stats import reconcile_stats
+
+
+def game_payload(name, is_free=False, app_type="game", genres=("Action",), developers=("Valve",)):
+    """
+    A minimal appdetails `data` dict, the shape store_app_details() receives from Steam.
+    """
+    return {
+        "type": app_type,
+        "name": name,
+        "is_free": is_free,
+        "short_description": f"About {name}",
+        "developers": list(developers),
+        "genres": [{"id": str(i), "description": genre} for i, genre in enumerate(genres)],
+        "categories": [{"id": 2, "description": "Single-player"}],
+    }
+
+
+class CatalogTestCase(TestCase):
+    """
+    Tests start from an empty catalog with its counters; the title index points at a scratch directory.
+    """
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        settings_override = override_settings(TITLE_INDEX_PATH=os.path.join(tmp.name, "title_index.bin"))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def ingest(self, *names, start=1):
+        return ingest_app_list([{"appid": appid, "name": name} for appid, name in enumerate(names, start)])
+
+    def assertNoDrift(self):
+        self.assertEqual(reconcile_stats(), {})
@@ -0,0 +1,94 @@
+from django.contrib.auth.models import User
+
+from ..facets import browse
+from ..ingest import store_app_details
+from ..models import ChangeLogEntry, CrawlTask, Developer, Genre, SteamGame, SteamGameDetail
+from ..stats import catalog_stats, track_stats
+from .base import CatalogTestCase, game_payload
+
+
+class AdminTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "admin"))
+        self.ingest("Portal", "Half-Life", "Portal Soundtrack")
+        store_app_details(SteamGame.objects.get(appid=1), game_payload("Portal"))
+
+    def action(self, model, action, pks):
+        return self.client.post(f"/admin/api/{model}/", {"action": action, "_selected_action": pks}, follow=True)
+
+    def detail_form(self, **fields):
+        return {
+            "name": "Half-Life", "steam_game": 2, "is_game": "on", "developers": "Valve, Gearbox",
+            "genres": '"Action, Shooter"', "categories": "[]", "required_age": "", "about_the_game": "",
+            "header_image": "", "website": "", **fields,
+        }
+
+    def test_added_detail_is_booked_like_a_crawled_one(self):
+        SteamGame.objects.filter(appid=2).update(details_stale=True)
+        response = self.client.post("/admin/api/steamgamedetail/add/", self.detail_form())
+        self.assertEqual(response.status_code, 302)
+        game = SteamGame.objects.get(appid=2)
+        self.assertEqual((game.has_details, game.details_stale), (True, False))
+        self.assertEqual(catalog_stats()["with_details"], 2)
+        self.assertEqual(Developer.objects.get(name="Gearbox").game_count, 1)
+        self.assertEqual(list(browse(genre="Shooter").values_list("steam_game_id", flat=True)), [2])
+        self.assertTrue(ChangeLogEntry.objects.filter(appid=2).exists())
+        self.assertNoDrift()
+
+    def test_edited_detail_relinks_its_tags(self):
+        detail = SteamGameDetail.objects.get(steam_game_id=1)
+        response = self.client.post(
+            f"/admin/api/steamgamedetail/{detail.pk}/change/",
+            self.detail_form(name="Portal", steam_game=2, genres='"Puzzle"', developers="Valve"),
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Genre.objects.get(name="Action").game_count, 0)
+        self.assertEqual(Genre.objects.get(name="Puzzle").game_count, 1)
+        # the game of a stored detail can't be changed from the form
+        self.assertEqual(SteamGameDetail.objects.get(pk=detail.pk).steam_game_id, 1)
+        self.assertNoDrift()
+
+    def test_tombstoning_a_game_takes_its_details_off_the_facets(self):
+        response = self.client.post(
+            "/admin/api/steamgame/1/change/", {"appid": 1, "name": "Portal", "has_details": "on", "is_removed": "on"}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Genre.objects.get(name="Action").game_count, 0)
+        self.assertEqual(catalog_stats()["removed"], 1)
+        self.assertNoDrift()
+
+    def test_refetch_details_action(self):
+        self.action("steamgame", "refetch_details", [1, 2])
+        self.assertEqual(sorted(CrawlTask.objects.values_list("pk", flat=True)), [1, 2])
+        self.assertTrue(SteamGame.objects.get(appid=1).details_stale)
+        self.assertNoDrift()
+
+    def test_reclassify_action(self):
+        with track_stats([3]):
+            SteamGame.objects.filter(appid=3).update(is_non_game=False, non_game_reason="")
+        self.action("steamgame", "reclassify", [3])
+        self.assertEqual(SteamGame.objects.get(appid=3).non_game_reason, "soundtrack")
+        self.assertEqual(catalog_stats()["non_game_reasons"], {"soundtrack": 1})
+        self.assertNoDrift()
+
+    def test_delete_selected_games_action(self):
+        response = self.action("steamgame", "delete_selected_games", [1, 3])
+        self.assertContains(response, "Deleted 2 games.")
+        self.assertEqual(list(SteamGame.objects.values_list("appid", flat=True)), [2])
+        self.assertEqual(Genre.objects.get(name="Action").game_count, 0)
+        self.assertNoDrift()
+
+    def test_delete_details_action(self):
+        detail = SteamGameDetail.objects.get(steam_game_id=1)
+        response = self.action("steamgamedetail", "delete_details", [detail.pk])
+        self.assertContains(response, "Deleted the details of 1 games.")
+        self.assertFalse(SteamGame.objects.get(appid=1).has_details)
+        self.assertEqual(Genre.objects.get(name="Action").game_count, 0)
+        self.assertNoDrift()
+
+    def test_changelist_search(self):
+        response = self.client.get("/admin/api/steamgame/", {"q": "port"})
+        self.assertEqual([game.appid for game in response.context["cl"].result_list], [1, 3])
+        response = self.client.get("/admin/api/steamgame/", {"q": "2"})
+        self.assertEqual([game.appid for game in response.context["cl"].result_list], [2])
@@ -0,0 +1,47 @@
+from unittest import mock
+
+from ..archive import archive_app_details, compress_payload, decompress_payload, reprocess_archive
+from ..ingest import store_app_details
+from ..models import AppDetailsArchive, Category, CrawlTask, FetchJob, SteamGame, SteamGameDetail
+from .base import CatalogTestCase, game_payload
+
+
+class ArchiveTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ingest("Portal", "Half-Life", "Stardew Valley")
+        for appid, name in [(1, "Portal"), (2, "Half-Life")]:
+            store_app_details(SteamGame.objects.get(appid=appid), game_payload(name))
+
+    def test_payload_round_trip(self):
+        payload = game_payload("Portal")
+        self.assertEqual(decompress_payload(compress_payload(payload)), payload)
+
+    def test_reprocess_rebuilds_the_columns_from_the_archive(self):
+        payload = game_payload("Portal")
+        payload["categories"] = [{"id": 1, "description": "Multi-player"}]
+        archive_app_details(1, payload)
+        self.assertEqual(reprocess_archive(fields=["categories"], workers=1), 2)
+        detail = SteamGameDetail.objects.get(steam_game_id=1)
+        self.assertEqual(detail.categories, payload["categories"])
+        self.assertEqual(list(detail.category_set.values_list("id", flat=True)), [1])
+        self.assertEqual(dict(Category.objects.values_list("id", "game_count")), {1: 1, 2: 1})
+        self.assertNoDrift()
+
+    @mock.patch("api.steam.get_app_details")
+    def test_insert_categories_queues_the_unarchived_details(self, get_app_details):
+        AppDetailsArchive.objects.filter(appid=2).delete()
+        response = self.client.get("/fix-missing-categories/")
+        job = FetchJob.objects.get()
+        self.assertEqual(job.appids, [2])
+        self.assertContains(response, f"/fetch-jobs/{job.pk}/")
+        self.assertEqual(list(CrawlTask.objects.values_list("pk", "status")), [(2, CrawlTask.PENDING)])
+        # flagged stale, so the crawler overwrites the stored details instead of keeping them
+        self.assertTrue(SteamGame.objects.get(appid=2).details_stale)
+        get_app_details.assert_not_called()
+        self.assertNoDrift()
+
+    def test_insert_categories_with_everything_archived(self):
+        response = self.client.get("/fix-missing-categories/")
+        self.assertContains(response, "reprocess_details --fields categories")
+        self.assertFalse(FetchJob.objects.exists())
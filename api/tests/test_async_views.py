@@ -0,0 +1,54 @@
+from unittest import mock
+
+from ..models import CrawlTask, FetchJob, SteamGame
+from ..steam import APP_DETAILS_BURST, SteamAPIError
+from .base import CatalogTestCase
+from .test_crawler import FakeSteam
+
+
+class FetchDetailsViewTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ingest(*(f"Game {appid}" for appid in range(1, APP_DETAILS_BURST + 6)))
+        self.steam = FakeSteam(failing=[3])
+        patcher = mock.patch("api.views.async_steam_client", self.steam)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch("api.crawler.make_session")
+    @mock.patch("api.crawler.TokenBucket")
+    def test_the_burst_is_fetched_and_the_rest_queued(self, token_bucket, make_session):
+        response = self.client.get("/fetch-all-game-details/", {"limit": APP_DETAILS_BURST + 3})
+        self.assertEqual(sorted(self.steam.calls), list(range(1, APP_DETAILS_BURST + 1)))
+        self.assertEqual(SteamGame.objects.filter(has_details=True).count(), APP_DETAILS_BURST - 1)
+        job = FetchJob.objects.get()
+        self.assertEqual(job.appids, list(range(APP_DETAILS_BURST + 1, APP_DETAILS_BURST + 4)))
+        self.assertEqual(CrawlTask.objects.filter(status=CrawlTask.PENDING).count(), 3)
+        self.assertContains(response, f"{APP_DETAILS_BURST - 1} stored, 1 errors, 5 left")
+        self.assertContains(response, f"/fetch-jobs/{job.pk}/")
+        # the view crawls on the shared async client, nothing of the threaded crawler is built per request
+        token_bucket.assert_not_called()
+        make_session.assert_not_called()
+        self.assertNoDrift()
+
+    def test_a_small_limit_queues_nothing(self):
+        response = self.client.get("/fetch-all-game-details/", {"limit": 2})
+        self.assertEqual(sorted(self.steam.calls), [1, 2])
+        self.assertFalse(FetchJob.objects.exists())
+        self.assertNotContains(response, "Queued")
+
+
+class GamePricesViewTests(CatalogTestCase):
+    @mock.patch("api.views.async_steam_client")
+    def test_prices(self, client):
+        client.app_prices = mock.AsyncMock(return_value={10: {"final": 999}, 20: None})
+        response = self.client.get("/game-prices/", {"appids": "10, 20"})
+        self.assertEqual(response.json(), {"10": {"final": 999}, "20": None})
+        client.app_prices.assert_awaited_once_with([10, 20])
+
+    @mock.patch("api.views.async_steam_client")
+    def test_steam_errors_and_bad_input(self, client):
+        client.app_prices = mock.AsyncMock(side_effect=SteamAPIError("Steam answered 503", status_code=503))
+        self.assertEqual(self.client.get("/game-prices/", {"appids": "10"}).status_code, 502)
+        self.assertEqual(self.client.get("/game-prices/", {"appids": "10,x"}).status_code, 400)
+        self.assertEqual(self.client.get("/game-prices/").status_code, 400)
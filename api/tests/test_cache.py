@@ -0,0 +1,51 @@
+from django.core.cache import caches
+from django.test import RequestFactory
+
+from ..cache import bump_game_versions, cached_game_response, game_version
+from ..ingest import NOT_A_GAME, store_app_details
+from ..models import SteamGame
+from .base import CatalogTestCase, game_payload
+
+
+class GameCacheTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()
+        self.ingest("Portal", "Half-Life")
+        self.request = RequestFactory().get("/games/1/")
+
+    def render(self, appid, body):
+        return cached_game_response(self.request, appid, "page", lambda: body).content
+
+    def test_stored_details_invalidate_the_cached_page(self):
+        self.assertEqual(self.render(1, b"before"), b"before")
+        self.assertEqual(self.render(1, b"after"), b"before")
+        store_app_details(SteamGame.objects.get(appid=1), game_payload("Portal"))
+        self.assertEqual(self.render(1, b"after"), b"after")
+
+    def test_deleted_non_game_invalidates_the_cached_page(self):
+        # regression: the bump used game.appid after delete() had cleared it
+        self.assertEqual(self.render(2, b"game page"), b"game page")
+        version = game_version(2)
+        outcome = store_app_details(SteamGame.objects.get(appid=2), game_payload("Half-Life", app_type="dlc"))
+        self.assertEqual(outcome, NOT_A_GAME)
+        self.assertFalse(SteamGame.objects.filter(appid=2).exists())
+        self.assertNotEqual(game_version(2), version)
+        self.assertEqual(self.render(2, b"not found"), b"not found")
+        self.assertNoDrift()
+
+    def test_deleted_non_game_keeps_its_appid(self):
+        game = SteamGame.objects.get(appid=2)
+        store_app_details(game, game_payload("Half-Life", app_type="dlc"))
+        self.assertEqual(game.appid, 2)
+
+    def test_bump_without_an_appid_raises(self):
+        with self.assertRaises(ValueError):
+            bump_game_versions([1, None])
+
+    def test_etag_answers_not_modified(self):
+        etag = cached_game_response(self.request, 1, "page", lambda: b"page")["ETag"]
+        request = RequestFactory().get("/games/1/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached_game_response(request, 1, "page", lambda: b"page").status_code, 304)
+        bump_game_versions([1])
+        self.assertEqual(cached_game_response(request, 1, "page", lambda: b"new page").status_code, 200)
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from ..changes import changes_page, record_changes
+from ..ingest import delete_games, ingest_app_list
+from ..models import ChangeLogEntry, SteamGame
+from .base import CatalogTestCase
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=2)
+class ChangeFeedTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ingest("Portal", "Half-Life", "Team Fortress")
+
+    def settle(self):
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+
+    def test_fresh_entries_are_held_back(self):
+        self.assertEqual(changes_page(0, 10, ["appid"]), ([], 0, False))
+        self.settle()
+        rows, cursor, more = changes_page(0, 10, ["appid"])
+        self.assertEqual([row["appid"] for row in rows], [1, 2, 3])
+        self.assertEqual((cursor, more), (rows[-1]["seq"], False))
+
+    def test_cursor_pages_and_compaction(self):
+        self.settle()
+        rows, cursor, more = changes_page(0, 2, ["appid", "name"])
+        self.assertEqual(([row["appid"] for row in rows], more), ([1, 2], True))
+        self.assertEqual(rows[0], {"seq": rows[0]["seq"], "appid": 1, "op": "upsert", "game": {"appid": 1, "name": "Portal"}})
+        # 1 changes again and moves to the end of the log, 3 is deleted
+        ingest_app_list([{"appid": 1, "name": "Portal Prelude"}])
+        delete_games(SteamGame.objects.filter(appid=3))
+        self.settle()
+        rows, cursor, more = changes_page(cursor, 10, ["appid", "name"])
+        self.assertEqual([(row["appid"], row["op"]) for row in rows], [(1, "upsert"), (3, "delete")])
+        self.assertEqual(rows[0]["game"]["name"], "Portal Prelude")
+        self.assertIsNone(rows[1]["game"])
+        self.assertEqual(changes_page(cursor, 10, ["appid"]), ([], cursor, False))
+        self.assertEqual(ChangeLogEntry.objects.count(), 3)
+
+    def test_record_changes_replaces_older_entries(self):
+        record_changes([2, 2, 2])
+        self.assertEqual(ChangeLogEntry.objects.filter(appid=2).count(), 1)
+
+    def test_api_changes(self):
+        self.settle()
+        data = self.client.get("/api/changes/", {"page_size": 2, "fields": "appid"}).json()
+        self.assertEqual(([row["game"] for row in data["results"]], data["more"]), ([{"appid": 1}, {"appid": 2}], True))
+        data = self.client.get("/api/changes/", {"after": data["cursor"], "fields": "appid"}).json()
+        self.assertEqual(([row["appid"] for row in data["results"]], data["more"]), ([3], False))
+        self.assertEqual(self.client.get("/api/changes/", {"fields": "nope"}).status_code, 400)
@@ -0,0 +1,44 @@
+from ..classify import classify_games, classify_name
+from ..models import CatalogStat, ChangeLogEntry, SteamGame
+from .base import CatalogTestCase
+
+
+class ClassifyGamesTests(CatalogTestCase):
+    def test_classify_name_matches_whole_words(self):
+        self.assertEqual(classify_name("Portal 2 - Soundtrack"), "soundtrack")
+        self.assertEqual(classify_name("Half-Life VR Demo"), "vr demo")
+        self.assertEqual(classify_name("Modern Betrayal"), "")
+        self.assertEqual(classify_name("Portal"), "")
+
+    def test_changed_flags_are_saved_and_reported(self):
+        self.ingest("Portal", "Portal Soundtrack", "Half-Life")
+        # rows as an older keyword list left them
+        SteamGame.objects.update(is_non_game=False, non_game_reason="")
+        SteamGame.objects.filter(appid=3).update(is_non_game=True, non_game_reason="demo")
+        changes = []
+        self.assertEqual(classify_games(SteamGame.objects.all(), batch_size=2, changes=changes), 2)
+        self.assertEqual(sorted(changes), [2, 3])
+        self.assertEqual(
+            list(SteamGame.objects.order_by("appid").values_list("is_non_game", "non_game_reason")),
+            [(False, ""), (True, "soundtrack"), (False, "")],
+        )
+        self.assertEqual(classify_games(SteamGame.objects.all()), 0)
+
+    def test_no_counter_or_change_feed_side_effects(self):
+        self.ingest("Portal Soundtrack")
+        SteamGame.objects.update(is_non_game=False, non_game_reason="")
+        stats = dict(CatalogStat.objects.values_list("name", "value"))
+        entries = list(ChangeLogEntry.objects.values_list("seq", flat=True))
+        classify_games(SteamGame.objects.all())
+        self.assertEqual(dict(CatalogStat.objects.values_list("name", "value")), stats)
+        self.assertEqual(list(ChangeLogEntry.objects.values_list("seq", flat=True)), entries)
+
+    def test_delete_obvious_non_games_view(self):
+        self.ingest("Portal", "Portal Soundtrack", "Half-Life Demo")
+        response = self.client.get("/delete-obvious-non-games/", {"dry_run": 1})
+        self.assertContains(response, "Would delete 2 obvious non-game entries")
+        self.assertEqual(SteamGame.objects.count(), 3)
+        response = self.client.get("/delete-obvious-non-games/")
+        self.assertContains(response, "Deleted 2 obvious non-game entries")
+        self.assertEqual(list(SteamGame.objects.values_list("appid", flat=True)), [1])
+        self.assertNoDrift()
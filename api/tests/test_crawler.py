@@ -0,0 +1,99 @@
+import json
+import os
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+
+from ..crawler import DetailCrawler, crawl_async
+from ..models import SteamGame
+from ..stats import backlog_size
+from ..steam import SteamAPIError
+from .base import CatalogTestCase, game_payload
+
+
+class FakeSteam:
+    """
+    Stand-in for get_app_details: `failing` appids raise SteamAPIError, `missing` ones have no details,
+    `dlcs` are no games.
+    """
+    def __init__(self, failing=(), missing=(), dlcs=()):
+        self.failing = set(failing)
+        self.missing = set(missing)
+        self.dlcs = set(dlcs)
+        self.calls = []
+
+    def __call__(self, appid, **kwargs):
+        self.calls.append(appid)
+        if appid in self.failing:
+            raise SteamAPIError(f"Steam answered 503 for app {appid}", status_code=503)
+        if appid in self.missing:
+            return None
+        return game_payload(f"Game {appid}", app_type="dlc" if appid in self.dlcs else "game")
+
+    async def app_details(self, appid):
+        return self(appid)
+
+
+class CrawlerTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ingest(*(f"Game {appid}" for appid in range(1, 9)))
+        self.checkpoint = os.path.join(self.tmp, "crawl.json")
+
+    def crawl(self, steam, **kwargs):
+        crawler = DetailCrawler(workers=2, rate=1000, burst=1000, checkpoint=self.checkpoint, backoff=0)
+        with mock.patch("api.crawler.get_app_details", steam):
+            return crawler.run(**kwargs)
+
+    def read_checkpoint(self):
+        with open(self.checkpoint) as f:
+            return json.load(f)
+
+    def test_run_stores_the_backlog(self):
+        stats = self.crawl(FakeSteam(missing=[3], dlcs=[5]))
+        self.assertEqual(
+            (stats.processed, stats.stored, stats.missing, stats.not_games, stats.errors), (8, 6, 1, 1, 0)
+        )
+        self.assertEqual(stats.deleted, [5])
+        self.assertFalse(SteamGame.objects.filter(appid=5).exists())
+        self.assertEqual(backlog_size(), 1)
+        self.assertEqual(self.read_checkpoint()["last_appid"], 8)
+        self.assertNoDrift()
+
+    def test_failed_apps_are_kept_in_the_checkpoint_and_retried_on_resume(self):
+        stats = self.crawl(FakeSteam(failing=[2, 6]), limit=7)
+        self.assertEqual((stats.stored, stats.errors, stats.failed), (5, 2, [2, 6]))
+        self.assertEqual(self.read_checkpoint()["failed"], [2, 6])
+        self.assertEqual(self.read_checkpoint()["last_appid"], 7)
+
+        # 6 keeps failing, 2 goes through, then the crawl continues after 7
+        steam = FakeSteam(failing=[6])
+        stats = self.crawl(steam, resume=True)
+        self.assertEqual(steam.calls[:2], [2, 6])
+        self.assertEqual(sorted(steam.calls), [2, 6, 8])
+        self.assertEqual(stats.failed, [6])
+        self.assertEqual(self.read_checkpoint(), {**self.read_checkpoint(), "last_appid": 8, "failed": [6]})
+
+        stats = self.crawl(FakeSteam(), resume=True)
+        self.assertEqual((stats.processed, stats.failed), (1, []))
+        self.assertEqual(backlog_size(), 0)
+        self.assertNoDrift()
+
+    def test_unretried_failures_survive_an_interrupted_resume(self):
+        self.crawl(FakeSteam(failing=[2, 3]))
+        self.crawl(FakeSteam(failing=[2, 3]), resume=True, limit=1)
+        self.assertEqual(self.read_checkpoint()["failed"], [2, 3])
+
+    def test_failures_that_got_their_details_elsewhere_are_not_retried(self):
+        self.crawl(FakeSteam(failing=[2]))
+        SteamGame.objects.filter(appid=2).delete()
+        steam = FakeSteam()
+        self.crawl(steam, resume=True)
+        self.assertEqual(steam.calls, [])
+
+    def test_crawl_async_reports_what_is_left_of_the_backlog(self):
+        # async_to_sync brings the writes back to the test's thread and transaction
+        stats = async_to_sync(crawl_async)(FakeSteam(failing=[2]), limit=3)
+        self.assertEqual((stats.processed, stats.stored, stats.errors), (3, 2, 1))
+        self.assertEqual(stats.remaining, 8 - 3)
+        self.assertEqual(backlog_size(), 6)
@@ -0,0 +1,84 @@
+from ..facets import browse, facet_counts, recount_facets, set_detail_tags, tag_values
+from ..ingest import store_app_details
+from ..models import Category, Developer, Genre, SteamGame, SteamGameDetail
+from ..sync import sync_catalog
+from .base import CatalogTestCase, game_payload
+
+
+class FacetTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ingest("Portal", "Stardew Valley", "Half-Life")
+        store_app_details(SteamGame.objects.get(appid=1), game_payload("Portal", genres=("Puzzle",)))
+        store_app_details(SteamGame.objects.get(appid=2), game_payload("Stardew Valley", is_free=True))
+        store_app_details(SteamGame.objects.get(appid=3), game_payload("Half-Life", developers=("Valve", "Gearbox")))
+
+    def counters(self):
+        return {
+            "genres": dict(Genre.objects.filter(game_count__gt=0).values_list("name", "game_count")),
+            "developers": dict(Developer.objects.filter(game_count__gt=0).values_list("name", "game_count")),
+            "categories": dict(Category.objects.filter(game_count__gt=0).values_list("id", "game_count")),
+        }
+
+    def assertCountersMatchBrowse(self):
+        # the maintained counters are what filtering by each tag finds, and what a recount gives
+        counters = self.counters()
+        for name, count in counters["genres"].items():
+            self.assertEqual(browse(genre=name).count(), count)
+        for name, count in counters["developers"].items():
+            self.assertEqual(browse(developer=name).count(), count)
+        for category_id, count in counters["categories"].items():
+            self.assertEqual(browse(category=category_id).count(), count)
+        recount_facets()
+        self.assertEqual(self.counters(), counters)
+
+    def appids(self, details):
+        return sorted(details.values_list("steam_game_id", flat=True))
+
+    def test_counters(self):
+        self.assertEqual(self.counters(), {
+            "genres": {"Puzzle": 1, "Action": 2},
+            "developers": {"Valve": 3, "Gearbox": 1},
+            "categories": {2: 3},
+        })
+        self.assertEqual(self.appids(browse(is_free=False, developer="Valve")), [1, 3])
+        self.assertCountersMatchBrowse()
+
+    def test_filtered_facet_counts_are_grouped_over_the_matches(self):
+        facets = facet_counts(browse(genre="Action"))
+        self.assertEqual(facets["genres"], [{"name": "Action", "count": 2}])
+        developers = sorted((row["name"], row["count"]) for row in facets["developers"])
+        self.assertEqual(developers, [("Gearbox", 1), ("Valve", 2)])
+
+    def test_sync_tombstone_leaves_browse_and_counters(self):
+        sync_catalog([{"appid": 1, "name": "Portal"}, {"appid": 2, "name": "Stardew Valley"}])
+        self.assertTrue(SteamGame.objects.get(appid=3).is_removed)
+        self.assertEqual(self.appids(browse()), [1, 2])
+        self.assertEqual(self.counters()["developers"], {"Valve": 2})
+        self.assertCountersMatchBrowse()
+        self.assertNoDrift()
+
+        # the game comes back with its stored details, and on the counters
+        sync_catalog([
+            {"appid": 1, "name": "Portal"}, {"appid": 2, "name": "Stardew Valley"}, {"appid": 3, "name": "Half-Life"},
+        ])
+        self.assertEqual(self.appids(browse()), [1, 2, 3])
+        self.assertEqual(self.counters()["developers"], {"Valve": 3, "Gearbox": 1})
+        self.assertCountersMatchBrowse()
+        self.assertNoDrift()
+
+    def test_non_game_details_are_not_browsed_or_counted(self):
+        detail = SteamGameDetail.objects.get(steam_game_id=3)
+        SteamGameDetail.objects.filter(pk=detail.pk).update(is_game=False)
+        set_detail_tags([(detail.pk, tag_values(game_payload("Half-Life", developers=("Valve", "Gearbox"))))])
+        self.assertEqual(self.appids(browse()), [1, 2])
+        self.assertEqual(self.counters()["developers"], {"Valve": 2})
+        self.assertCountersMatchBrowse()
+
+    def test_api_browse(self):
+        sync_catalog([{"appid": 1, "name": "Portal"}, {"appid": 2, "name": "Stardew Valley"}])
+        data = self.client.get("/api/browse/").json()
+        self.assertEqual(sorted(row["appid"] for row in data["results"]), [1, 2])
+        self.assertEqual({row["name"]: row["count"] for row in data["facets"]["developers"]}, {"Valve": 2})
+        data = self.client.get("/api/browse/", {"developer": "Gearbox"}).json()
+        self.assertEqual((data["results"], data["facets"]["developers"]), ([], []))
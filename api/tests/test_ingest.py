@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.conf import settings
+
+from ..facets import browse
+from ..ingest import app_hash, build_game as real_build_game, ingest_app_list, store_app_details
+from ..models import Developer, SteamGame
+from ..stats import catalog_stats
+from ..sync import sync_catalog
+from ..titleindex import LiveTitleIndex, build_title_index
+from .base import CatalogTestCase, game_payload
+
+
+class IngestTests(CatalogTestCase):
+    def test_insert_rename_unchanged_counts(self):
+        self.assertEqual(
+            self.ingest("Portal", "Half-Life", "Team Fortress"), {"inserted": 3, "updated": 0, "unchanged": 0}
+        )
+        stats = ingest_app_list([
+            {"appid": 1, "name": "Portal"},
+            {"appid": 2, "name": "Half-Life 2"},
+            {"appid": 4, "name": "Left 4 Dead"},
+        ])
+        self.assertEqual(stats, {"inserted": 1, "updated": 1, "unchanged": 1})
+        game = SteamGame.objects.get(appid=2)
+        self.assertEqual((game.name, game.search_name), ("Half-Life 2", "half life 2"))
+        self.assertEqual(game.content_hash, app_hash({"appid": 2, "name": "Half-Life 2"}))
+        self.assertEqual(catalog_stats()["games"], 4)
+        self.assertNoDrift()
+
+    def test_duplicated_appids_keep_the_last_name(self):
+        stats = ingest_app_list([{"appid": 1, "name": "Old"}, {"appid": 1, "name": "New"}])
+        self.assertEqual(stats["inserted"], 1)
+        self.assertEqual(SteamGame.objects.get(appid=1).name, "New")
+
+    def test_rename_reclassifies(self):
+        self.ingest("Portal")
+        ingest_app_list([{"appid": 1, "name": "Portal Soundtrack"}])
+        game = SteamGame.objects.get(appid=1)
+        self.assertEqual((game.is_non_game, game.non_game_reason), (True, "soundtrack"))
+        self.assertEqual(catalog_stats()["non_game_reasons"], {"soundtrack": 1})
+        self.assertNoDrift()
+
+    def test_rows_a_concurrent_run_inserted_are_not_counted(self):
+        def build_game(app, **extra):
+            if app["appid"] == 2:
+                # another ingest inserts appid 2 after this batch's SELECT, the bulk insert skips it
+                SteamGame.objects.create(appid=2, name="Half-Life")
+            return real_build_game(app, **extra)
+
+        with mock.patch("api.ingest.build_game", build_game):
+            stats = self.ingest("Portal", "Half-Life", "Team Fortress")
+        self.assertEqual(stats, {"inserted": 2, "updated": 0, "unchanged": 0})
+        self.assertEqual(SteamGame.objects.count(), 3)
+
+    def test_full_ingest_revives_tombstones(self):
+        self.ingest("Portal", "Half-Life", "Team Fortress")
+        store_app_details(SteamGame.objects.get(appid=2), game_payload("Half-Life", developers=("Gearbox",)))
+        build_title_index()
+        sync_catalog([{"appid": 1, "name": "Portal"}, {"appid": 3, "name": "Team Fortress"}])
+        self.assertTrue(SteamGame.objects.get(appid=2).is_removed)
+
+        stats = self.ingest("Portal", "Half-Life", "Team Fortress")
+        self.assertEqual(stats, {"inserted": 0, "updated": 1, "unchanged": 2})
+        self.assertFalse(SteamGame.objects.get(appid=2).is_removed)
+        self.assertEqual(catalog_stats()["games"], 3)
+        self.assertEqual(list(browse().values_list("steam_game_id", flat=True)), [2])
+        self.assertEqual(Developer.objects.get(name="Gearbox").game_count, 1)
+        index = LiveTitleIndex(settings.TITLE_INDEX_PATH)
+        self.addCleanup(index.close)
+        index.refresh()
+        self.assertEqual(index.prefix("half"), [{"appid": 2, "name": "Half-Life"}])
+        self.assertNoDrift()
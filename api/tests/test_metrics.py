@@ -0,0 +1,79 @@
+from asgiref.sync import async_to_sync, sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from ..metrics import (
+    REQUEST_LATENCY, REQUEST_QUERIES, Counter, Histogram, MetricsMiddleware, Registry, steam_endpoint,
+)
+from ..models import SteamGame
+
+
+def observed(histogram, **labels):
+    """
+    (number of observations, their sum) of one label combination of `histogram`.
+    """
+    counts, total = histogram.values.get(histogram._key(labels), ([0], 0.0))
+    return sum(counts), total
+
+
+class RenderTests(SimpleTestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency", "Request latency.", ["view"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, view="home")
+        self.assertEqual(histogram.render(), [
+            "# HELP latency Request latency.",
+            "# TYPE latency histogram",
+            'latency_bucket{view="home",le="0.1"} 1',
+            'latency_bucket{view="home",le="1.0"} 3',
+            'latency_bucket{view="home",le="+Inf"} 4',
+            'latency_sum{view="home"} 4.05',
+            'latency_count{view="home"} 4',
+        ])
+
+    def test_registry_runs_its_collectors(self):
+        registry = Registry()
+        counter = registry.register(Counter("calls", "Calls.", ["name"]))
+        registry.collectors.append(lambda: counter.inc(2, name='say "hi"\n'))
+        self.assertIn('calls{name="say \\"hi\\"\\n"} 2', registry.render())
+
+    def test_steam_endpoint(self):
+        self.assertEqual(steam_endpoint("https://store.steampowered.com/api/appdetails?appids=1"), "appdetails")
+        self.assertEqual(steam_endpoint("https://api.steampowered.com/ISteamApps/GetAppList/v2/"), "applist")
+        self.assertEqual(steam_endpoint("https://example.com/"), "other")
+
+
+class MetricsMiddlewareTests(TestCase):
+    def test_sync_views_are_timed_and_their_queries_counted(self):
+        before = observed(REQUEST_LATENCY, view="api_stats", method="GET", status=200)[0]
+        queries_before = observed(REQUEST_QUERIES, view="api_stats")
+        self.assertEqual(self.client.get("/api/stats/").status_code, 200)
+        self.assertEqual(observed(REQUEST_LATENCY, view="api_stats", method="GET", status=200)[0], before + 1)
+        count, total = observed(REQUEST_QUERIES, view="api_stats")
+        self.assertEqual(count, queries_before[0] + 1)
+        self.assertGreater(total, queries_before[1])
+
+    def test_queries_of_an_async_view_run_in_a_thread_are_counted(self):
+        async def view(request):
+            await sync_to_async(SteamGame.objects.count)()
+            await sync_to_async(SteamGame.objects.exists)()
+            return HttpResponse(status=204)
+
+        middleware = MetricsMiddleware(view)
+        self.assertTrue(middleware.is_async)
+        request = RequestFactory().get("/")
+        request.resolver_match = None
+        before = observed(REQUEST_QUERIES, view="unmatched")
+        response = async_to_sync(middleware)(request)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(observed(REQUEST_QUERIES, view="unmatched"), (before[0] + 1, before[1] + 2))
+        self.assertGreaterEqual(observed(REQUEST_LATENCY, view="unmatched", method="GET", status=204)[0], 1)
+
+    def test_metrics_endpoint(self):
+        self.client.get("/api/stats/")
+        response = self.client.get("/metrics/")
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        self.assertContains(
+            response, 'steamdb_http_request_duration_seconds_count{view="api_stats",method="GET",status="200"}'
+        )
+        self.assertContains(response, "# TYPE steamdb_crawl_tasks gauge")
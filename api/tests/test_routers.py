@@ -0,0 +1,65 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from ..models import SteamGame
+from ..routers import STICKY_COOKIE, ReplicaMiddleware, ReplicaRouter
+
+
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def serve(self, request, write=False):
+        reads = []
+
+        def view(request):
+            reads.append(self.router.db_for_read(SteamGame))
+            if write:
+                router.db_for_write(SteamGame)
+                reads.append(self.router.db_for_read(SteamGame))
+            return HttpResponse()
+
+        with mock.patch("api.routers.connections") as connections:
+            connections.__getitem__.return_value.in_atomic_block = False
+            response = ReplicaMiddleware(view)(request)
+        return reads, response
+
+    @override_settings(DATABASE_REPLICAS=["replica"], REPLICA_STICKY_SECONDS=10)
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        reads, response = self.serve(self.factory.get("/"))
+        self.assertEqual(reads, ["replica"])
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+        reads, response = self.serve(self.factory.post("/"), write=True)
+        self.assertEqual(reads, ["replica", "default"])
+        self.assertEqual(response.cookies[STICKY_COOKIE]["max-age"], 10)
+
+        request = self.factory.get("/")
+        request.COOKIES[STICKY_COOKIE] = "1"
+        self.assertEqual(self.serve(request)[0], ["default"])
+
+    @override_settings(DATABASE_REPLICAS=["replica"])
+    def test_outside_requests_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(SteamGame), "default")
+
+    @override_settings(DATABASE_REPLICAS=["replica"], REPLICA_STICKY_SECONDS=10)
+    def test_a_write_in_a_thread_pins_an_async_request(self):
+        reads = []
+
+        async def view(request):
+            reads.append(self.router.db_for_read(SteamGame))
+            # the ORM calls of an async view run in sync_to_async, in a copy of the request's context
+            await sync_to_async(router.db_for_write)(SteamGame)
+            reads.append(self.router.db_for_read(SteamGame))
+            return HttpResponse()
+
+        with mock.patch("api.routers.connections") as connections:
+            connections.__getitem__.return_value.in_atomic_block = False
+            response = async_to_sync(ReplicaMiddleware(view))(self.factory.post("/"))
+        self.assertEqual(reads, ["replica", "default"])
+        self.assertIn(STICKY_COOKIE, response.cookies)
@@ -0,0 +1,54 @@
+from django.db import connection
+from django.db.models import Q
+
+from ..models import SteamGame
+from ..search import autocomplete, name_match, search_games
+from .base import CatalogTestCase
+
+
+class FallbackSearchTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ingest("Portal", "Portal 2", "Half-Life", "Stardew Valley", "Port Royale")
+
+    def test_typo_tolerant_and_ranked(self):
+        self.assertNotEqual(connection.vendor, "postgresql")
+        results = search_games("portl")
+        self.assertEqual([game.name for game in results][:2], ["Portal", "Portal 2"])
+        self.assertTrue(all(game.rank >= 0.6 for game in results))
+        self.assertEqual([game.name for game in search_games("stardew valey")], ["Stardew Valley"])
+
+    def test_skips_removed_games_and_empty_queries(self):
+        SteamGame.objects.filter(appid=1).update(is_removed=True)
+        self.assertNotIn(1, [game.appid for game in search_games("portal")])
+        self.assertEqual(search_games("!!"), [])
+
+
+class AutocompleteTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ingest("Portal", "Portal 2", "Half-Life", "DOOM: Eternal", "Port Royale")
+
+    def names(self, prefix, **kwargs):
+        return [row["name"] for row in autocomplete(prefix, **kwargs)]
+
+    def test_prefix_on_the_normalized_name(self):
+        self.assertEqual(self.names("Portal"), ["Portal", "Portal 2"])
+        self.assertEqual(self.names("doom eter"), ["DOOM: Eternal"])
+        self.assertEqual(self.names("port", limit=2), ["Port Royale", "Portal"])
+        self.assertEqual(self.names("  "), [])
+
+    def test_skips_removed_games(self):
+        SteamGame.objects.filter(appid=1).update(is_removed=True)
+        self.assertEqual(self.names("portal"), ["Portal 2"])
+
+    def test_name_match(self):
+        self.assertIsNone(name_match("!!"))
+        if connection.vendor != "postgresql":
+            self.assertEqual(name_match("Half-Life"), Q(search_name__startswith="half life"))
+        matches = SteamGame.objects.filter(name_match("half-l"))
+        self.assertEqual(list(matches.values_list("appid", flat=True)), [3])
+
+    def test_view_without_a_title_index(self):
+        response = self.client.get("/search-games/autocomplete/", {"q": "portal 2"})
+        self.assertEqual(response.json(), {"query": "portal 2", "results": [{"appid": 2, "name": "Portal 2"}]})
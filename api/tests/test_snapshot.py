@@ -0,0 +1,71 @@
+import gzip
+import os
+
+from ..ingest import delete_games, ingest_app_list, store_app_details
+from ..models import Genre, SteamGame, SteamGameDetail
+from ..snapshot import SnapshotError, export_snapshot, import_snapshot
+from ..stats import catalog_stats
+from .base import CatalogTestCase, game_payload
+
+
+class SnapshotTests(CatalogTestCase):
+    def test_export_import_round_trip(self):
+        self.ingest("Portal", "Half-Life", "Stardew Valley")
+        store_app_details(SteamGame.objects.get(appid=1), game_payload("Portal", genres=("Puzzle", "Action")))
+        store_app_details(SteamGame.objects.get(appid=3), game_payload("Stardew Valley", is_free=True))
+        path = os.path.join(self.tmp, "catalog.ndjson")
+        self.assertEqual(export_snapshot(path), (3, 0))
+        games = list(SteamGame.objects.order_by("appid").values())
+        details = list(SteamGameDetail.objects.order_by("steam_game_id").values_list("steam_game_id", "name", "is_free"))
+        stats = catalog_stats()
+
+        delete_games(SteamGame.objects.all())
+        self.assertEqual(catalog_stats()["games"], 0)
+        header, loaded, deleted = import_snapshot(path)
+        self.assertEqual((loaded, deleted), (3, 0))
+        self.assertEqual(list(SteamGame.objects.order_by("appid").values()), games)
+        self.assertEqual(
+            list(SteamGameDetail.objects.order_by("steam_game_id").values_list("steam_game_id", "name", "is_free")),
+            details,
+        )
+        self.assertEqual(dict(Genre.objects.values_list("name", "game_count")), {"Puzzle": 1, "Action": 2})
+        self.assertEqual(catalog_stats(), stats)
+        self.assertNoDrift()
+
+    def test_delta_against_a_base(self):
+        self.ingest("Portal", "Half-Life")
+        base = os.path.join(self.tmp, "base.ndjson")
+        delta = os.path.join(self.tmp, "delta.ndjson")
+        export_snapshot(base)
+        ingest_app_list([{"appid": 2, "name": "Half-Life 2"}])
+        delete_games(SteamGame.objects.filter(appid=1))
+        self.assertEqual(export_snapshot(delta, base=base), (1, 1))
+
+    def test_delta_is_applied_on_top_of_its_base(self):
+        self.ingest("Portal", "Half-Life", "Stardew Valley")
+        base = os.path.join(self.tmp, "base.ndjson")
+        delta = os.path.join(self.tmp, "delta.ndjson")
+        export_snapshot(base)
+        ingest_app_list([{"appid": 2, "name": "Half-Life 2"}])
+        store_app_details(SteamGame.objects.get(appid=3), game_payload("Stardew Valley"))
+        delete_games(SteamGame.objects.filter(appid=1))
+        export_snapshot(delta, base=base)
+        games = list(SteamGame.objects.order_by("appid").values())
+
+        # a node bootstrapped from the base catches up with the delta
+        delete_games(SteamGame.objects.all())
+        base_header = import_snapshot(base)[0]
+        with self.assertRaises(SnapshotError):
+            import_snapshot(delta, expected_base="another snapshot")
+        header, loaded, deleted = import_snapshot(delta, expected_base=base_header["id"])
+        self.assertEqual((header["base"], loaded, deleted), (base_header["id"], 2, 1))
+        self.assertEqual(list(SteamGame.objects.order_by("appid").values()), games)
+        self.assertEqual(Genre.objects.get(name="Action").game_count, 1)
+        self.assertNoDrift()
+
+    def test_other_files_are_refused(self):
+        path = os.path.join(self.tmp, "not-a-snapshot.gz")
+        with gzip.open(path, "wt") as f:
+            f.write('{"hello": "world"}\n')
+        with self.assertRaises(SnapshotError):
+            import_snapshot(path)
@@ -0,0 +1,81 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from ..ingest import app_hash, delete_games, store_app_details
+from ..models import ChangeLogEntry, Genre, SteamGame
+from ..stats import backlog_size, catalog_stats, reconcile_stats, track_stats
+from .base import CatalogTestCase, game_payload
+
+
+class StatsTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ingest("Portal", "Half-Life", "Portal Soundtrack")
+        store_app_details(SteamGame.objects.get(appid=1), game_payload("Portal", is_free=True))
+
+    def test_tracked_writes_keep_the_counters(self):
+        with track_stats([2, 3]):
+            SteamGame.objects.filter(appid=2).update(is_removed=True)
+            SteamGame.objects.filter(appid=3).delete()
+        stats = catalog_stats()
+        self.assertEqual((stats["games"], stats["with_details"], stats["free"], stats["removed"]), (1, 1, 1, 1))
+        self.assertEqual(stats["non_games"], 0)
+        self.assertEqual(backlog_size(), 0)
+        self.assertNoDrift()
+
+    def test_untracked_write_drifts_until_reconciled(self):
+        SteamGame.objects.filter(appid=2).delete()
+        self.assertEqual(reconcile_stats(), {"games": 1})
+        self.assertEqual(catalog_stats()["games"], 2)
+        self.assertNoDrift()
+
+    def test_delete_games_releases_counters(self):
+        delete_games(SteamGame.objects.filter(appid=1))
+        self.assertEqual(Genre.objects.get(name="Action").game_count, 0)
+        self.assertEqual(catalog_stats()["free"], 0)
+        self.assertNoDrift()
+
+    def test_api_stats_reads_the_counters(self):
+        data = self.client.get("/api/stats/").json()
+        self.assertEqual((data["games"], data["with_details"], data["free"]), (3, 1, 1))
+        self.assertEqual(data["non_game_reasons"], {"soundtrack": 1})
+        self.assertEqual(data["genres"], [{"name": "Action", "count": 1}])
+
+
+class PopulatedMigrationTests(TransactionTestCase):
+    """
+    Migrates a catalog stored with the 0007 schema to the latest one, so the data migrations run over real rows.
+    """
+    migrate_from = ("api", "0007_fetchjob_crawltask_priority")
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.migrate_to = executor.loader.graph.leaf_nodes("api")
+        executor.migrate([self.migrate_from])
+        self.addCleanup(lambda: MigrationExecutor(connection).migrate(self.migrate_to))
+        apps = executor.loader.project_state([self.migrate_from]).apps
+        OldGame = apps.get_model("api", "SteamGame")
+        OldDetail = apps.get_model("api", "SteamGameDetail")
+        OldGame.objects.bulk_create([
+            OldGame(appid=1, name="Portal", has_details=True, search_name="portal"),
+            OldGame(appid=2, name="Portal Soundtrack", search_name="portal soundtrack"),
+            OldGame(appid=3, name="Half-Life", search_name="half life"),
+        ])
+        OldDetail.objects.create(
+            steam_game_id=1, name="Portal", is_free=True, genres="Puzzle, Action", developers="Valve",
+            categories=[{"id": 2, "description": "Single-player"}],
+        )
+
+    def test_data_migrations_backfill_the_catalog(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        game = SteamGame.objects.get(appid=2)
+        self.assertEqual((game.is_non_game, game.non_game_reason), (True, "soundtrack"))
+        self.assertEqual(game.content_hash, app_hash({"appid": 2, "name": "Portal Soundtrack"}))
+        self.assertEqual(dict(Genre.objects.values_list("name", "game_count")), {"Puzzle": 1, "Action": 1})
+        stats = catalog_stats()
+        self.assertEqual((stats["games"], stats["with_details"], stats["free"]), (3, 1, 1))
+        self.assertEqual(stats["non_game_reasons"], {"soundtrack": 1})
+        self.assertEqual(reconcile_stats(), {})
+        self.assertEqual(sorted(ChangeLogEntry.objects.values_list("appid", flat=True)), [1, 2, 3])
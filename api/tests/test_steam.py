@@ -0,0 +1,193 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from ..bench.stub import SteamStub
+from ..steam import AsyncSteamClient, SteamAPIError, SteamClient, TokenBucket, TTLCache, get_app_details
+
+
+class StubTestCase(SimpleTestCase):
+    """
+    Clients talking to a local SteamStub of 50 apps; `latency` keeps concurrent calls in flight together.
+    """
+    latency = 0.0
+    error_rate = 0.0
+
+    def setUp(self):
+        self.stub = SteamStub(50, latency=self.latency, error_rate=self.error_rate, missing_rate=0.0)
+        self.stub.__enter__()
+        self.addCleanup(self.stub.__exit__)
+        settings_override = override_settings(STEAM_STORE_URL=self.stub.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def details(self, appid):
+        return self.stub.app_details([appid], "")[str(appid)]["data"]
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_burst_then_paced(self):
+        with mock.patch("api.steam.time.monotonic", return_value=100.0):
+            bucket = TokenBucket(rate=2, capacity=3)
+            self.assertEqual([bucket.reserve() for _ in range(5)], [0.0, 0.0, 0.0, 0.5, 1.0])
+
+    def test_refills_over_time(self):
+        with mock.patch("api.steam.time.monotonic") as monotonic:
+            monotonic.return_value = 100.0
+            bucket = TokenBucket(rate=2, capacity=1)
+            self.assertEqual(bucket.reserve(), 0.0)
+            monotonic.return_value = 100.5
+            self.assertEqual(bucket.reserve(), 0.0)
+
+
+class TTLCacheTests(SimpleTestCase):
+    def test_entries_expire(self):
+        cache = TTLCache(ttl=10)
+        with mock.patch("api.steam.time.monotonic") as monotonic:
+            monotonic.return_value = 100.0
+            cache.set("a", 1)
+            monotonic.return_value = 109.0
+            self.assertEqual(cache.get("a"), 1)
+            monotonic.return_value = 111.0
+            self.assertIsNone(cache.get("a"))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+
+    def test_no_ttl_caches_nothing(self):
+        cache = TTLCache(ttl=0)
+        cache.set("a", 1)
+        self.assertIsNone(cache.get("a"))
+
+
+class SteamClientTests(StubTestCase):
+    latency = 0.2
+
+    def test_concurrent_calls_for_an_app_share_one_request(self):
+        client = SteamClient(limiter=None)
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(client.app_details, [7] * 5))
+        self.assertEqual(results, [self.details(7)] * 5)
+        self.assertEqual(self.stub.requests, 1)
+        self.assertEqual(client.in_flight, {})
+
+    def test_answers_are_cached_for_the_ttl(self):
+        client = SteamClient(limiter=None)
+        client.app_details(7)
+        client.app_details(7)
+        self.assertEqual(self.stub.requests, 1)
+        uncached = SteamClient(limiter=None, cache_ttl=0)
+        uncached.app_details(7)
+        uncached.app_details(7)
+        self.assertEqual(self.stub.requests, 3)
+
+    def test_followers_get_the_leaders_error(self):
+        client = SteamClient(limiter=None)
+        started = threading.Event()
+
+        def failing_details(appid, **kwargs):
+            started.set()
+            threading.Event().wait(0.2)
+            raise SteamAPIError("Steam answered 503 for app 7", status_code=503)
+
+        with mock.patch("api.steam.get_app_details", failing_details), ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(client.app_details, 7)
+            started.wait()
+            follower = executor.submit(client.app_details, 7)
+            for future in (leader, follower):
+                with self.assertRaises(SteamAPIError):
+                    future.result()
+        # errors are not cached, the next call asks again
+        self.assertEqual(client.app_details(7), self.details(7))
+
+    @mock.patch("api.steam.PRICE_BATCH_SIZE", 10)
+    def test_prices_are_batched_and_cached(self):
+        client = SteamClient(limiter=None)
+        prices = client.app_prices(list(range(1, 26)) + [1])
+        self.assertEqual(list(prices), list(range(1, 26)))
+        self.assertEqual(self.stub.requests, 3)
+        client.app_prices([5, 25])
+        self.assertEqual(self.stub.requests, 3)
+
+    def test_every_request_takes_a_token(self):
+        limiter = mock.Mock()
+        SteamClient(limiter=limiter).app_details(7)
+        limiter.acquire.assert_called_once_with()
+
+
+class BackoffTests(StubTestCase):
+    error_rate = 1.0
+
+    @mock.patch("api.steam.time.sleep")
+    def test_throttled_calls_back_off_then_give_up(self, sleep):
+        with self.assertRaises(SteamAPIError) as raised:
+            get_app_details(7, max_retries=2, backoff=0.5)
+        self.assertEqual(raised.exception.status_code, 429)
+        self.assertEqual(self.stub.requests, 3)
+        first, second = (call.args[0] for call in sleep.call_args_list)
+        self.assertTrue(0.5 <= first <= 1.0 and 1.0 <= second <= 1.5)
+
+    @mock.patch("api.steam.time.sleep")
+    def test_retry_after_is_honoured(self, sleep):
+        response = mock.Mock(status_code=429, headers={"Retry-After": "7"})
+        session = mock.Mock()
+        session.get.side_effect = [response, mock.Mock(status_code=200, json=lambda: {"7": {"success": False}})]
+        self.assertIsNone(get_app_details(7, session=session, backoff=0))
+        sleep.assert_called_once_with(7)
+
+    def test_other_errors_are_not_retried(self):
+        session = mock.Mock()
+        session.get.return_value = mock.Mock(status_code=403)
+        with self.assertRaises(SteamAPIError):
+            get_app_details(7, session=session)
+        self.assertEqual(session.get.call_count, 1)
+
+    def test_async_client_backs_off_then_gives_up(self):
+        client = AsyncSteamClient(sync_client=SteamClient(limiter=None), max_retries=2, backoff=0)
+
+        async def fetch():
+            try:
+                return await client.app_details(7)
+            finally:
+                await client.aclose()
+
+        with self.assertRaises(SteamAPIError):
+            asyncio.run(fetch())
+        self.assertEqual(self.stub.requests, 3)
+
+
+class AsyncSteamClientTests(StubTestCase):
+    latency = 0.2
+
+    def run_client(self, calls):
+        client = AsyncSteamClient(sync_client=SteamClient(limiter=None))
+
+        async def main():
+            try:
+                return await calls(client)
+            finally:
+                await client.aclose()
+
+        return client, asyncio.run(main())
+
+    def test_concurrent_calls_for_an_app_share_one_request(self):
+        client, results = self.run_client(lambda client: asyncio.gather(*(client.app_details(7) for _ in range(5))))
+        self.assertEqual(results, [self.details(7)] * 5)
+        self.assertEqual(self.stub.requests, 1)
+        # the answer went into the cache shared with the sync client
+        self.assertEqual(client.sync_client.app_details(7), self.details(7))
+        self.assertEqual(self.stub.requests, 1)
+
+    @mock.patch("api.steam.PRICE_BATCH_SIZE", 10)
+    def test_prices_are_batched(self):
+        _, prices = self.run_client(lambda client: client.app_prices(range(1, 26)))
+        self.assertEqual(sorted(prices), list(range(1, 26)))
+        self.assertEqual(self.stub.requests, 3)
@@ -0,0 +1,77 @@
+from ..ingest import store_app_details
+from ..models import CrawlTask, SteamGame
+from ..stats import catalog_stats
+from ..sync import changed_since, sync_catalog
+from .base import CatalogTestCase, game_payload
+
+APPS = [{"appid": 1, "name": "Portal"}, {"appid": 2, "name": "Half-Life"}, {"appid": 3, "name": "Team Fortress"}]
+
+
+class SyncTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.first = sync_catalog(APPS)
+        for appid, name in [(1, "Portal"), (2, "Half-Life")]:
+            store_app_details(SteamGame.objects.get(appid=appid), game_payload(name))
+        CrawlTask.objects.all().delete()
+
+    def game(self, appid):
+        return SteamGame.objects.get(appid=appid)
+
+    def queued(self):
+        return sorted(CrawlTask.objects.filter(status=CrawlTask.PENDING).values_list("pk", flat=True))
+
+    def test_first_sync_adds_and_queues(self):
+        self.assertEqual((self.first.added, self.first.changed, self.first.removed), (3, 0, 0))
+
+    def test_unchanged_apps_are_not_written(self):
+        run = sync_catalog(APPS)
+        self.assertEqual((run.added, run.changed, run.unchanged), (0, 0, 3))
+        self.assertFalse(changed_since(self.first.pk).exists())
+        self.assertEqual(self.queued(), [])
+
+    def test_changed_app_with_details_is_flagged_stale(self):
+        run = sync_catalog([APPS[0], {"appid": 2, "name": "Half-Life: Source"}, APPS[2], {"appid": 4, "name": "Dota"}])
+        self.assertEqual((run.added, run.changed, run.unchanged), (1, 1, 2))
+        self.assertTrue(self.game(2).details_stale)
+        self.assertEqual(self.game(2).name, "Half-Life: Source")
+        self.assertEqual(self.queued(), [2, 4])
+        self.assertEqual(sorted(changed_since(self.first.pk).values_list("appid", flat=True)), [2, 4])
+        self.assertEqual(catalog_stats()["stale_details"], 1)
+        self.assertNoDrift()
+
+    def test_missing_apps_are_tombstoned(self):
+        run = sync_catalog(APPS[:2])
+        self.assertEqual(run.removed, 1)
+        self.assertTrue(self.game(3).is_removed)
+        self.assertEqual(catalog_stats()["removed"], 1)
+        self.assertNoDrift()
+
+    def test_a_truncated_list_tombstones_nothing(self):
+        run = sync_catalog(APPS[:1])
+        self.assertEqual(run.removed, 0)
+        self.assertFalse(SteamGame.objects.filter(is_removed=True).exists())
+
+    def test_unchanged_tombstone_is_revived_with_its_details(self):
+        sync_catalog(APPS[1:])
+        run = sync_catalog(APPS)
+        self.assertEqual(run.changed, 1)
+        game = self.game(1)
+        self.assertEqual((game.is_removed, game.has_details, game.details_stale), (False, True, False))
+        # its stored details still describe the record, nothing to refetch
+        self.assertEqual(self.queued(), [])
+        self.assertNoDrift()
+
+    def test_revived_tombstone_without_details_is_queued(self):
+        sync_catalog(APPS[:2])
+        sync_catalog(APPS)
+        self.assertFalse(self.game(3).is_removed)
+        self.assertEqual(self.queued(), [3])
+
+    def test_revived_tombstone_that_changed_is_flagged_stale(self):
+        sync_catalog(APPS[1:])
+        sync_catalog([{"appid": 1, "name": "Portal: Still Alive"}, *APPS[1:]])
+        game = self.game(1)
+        self.assertEqual((game.is_removed, game.details_stale), (False, True))
+        self.assertEqual(self.queued(), [1])
+        self.assertNoDrift()
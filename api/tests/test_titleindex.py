@@ -0,0 +1,107 @@
+import os
+from unittest import mock
+
+from django.conf import settings
+
+from .. import titleindex
+from ..titleindex import (
+    LiveTitleIndex, TitleIndex, build_title_index, compact_title_index, get_title_index, journal_path,
+    update_title_index,
+)
+from .base import CatalogTestCase
+
+
+class TitleIndexTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = settings.TITLE_INDEX_PATH
+        self.ingest("Portal", "Portal 2", "Half-Life", "Pong", "Portal: Revolution")
+        self.assertEqual(build_title_index(), 5)
+
+    def live(self):
+        index = LiveTitleIndex(self.path)
+        self.addCleanup(index.close)
+        self.assertTrue(index.refresh())
+        return index
+
+    def names(self, index, prefix, limit=10):
+        return [hit["name"] for hit in index.prefix(prefix, limit=limit)]
+
+    def test_snapshot_prefix(self):
+        index = TitleIndex(self.path)
+        self.addCleanup(index.close)
+        self.assertEqual(self.names(index, "PORTAL"), ["Portal", "Portal 2", "Portal: Revolution"])
+        self.assertEqual(index.prefix("portal 2"), [{"appid": 2, "name": "Portal 2"}])
+        self.assertEqual(self.names(index, "po", limit=2), ["Pong", "Portal"])
+        self.assertEqual(index.prefix("  "), [])
+
+    def test_journal_is_merged_over_the_snapshot(self):
+        # a delete, a rename into the prefix, a rename out of it and a new game
+        update_title_index(
+            upserts=[(3, "Portal Prelude"), (5, "Revolution"), (6, "Portal Stories: Mel")], deletes=[2]
+        )
+        index = self.live()
+        self.assertEqual(self.names(index, "portal"), ["Portal", "Portal Prelude", "Portal Stories: Mel"])
+        self.assertEqual(self.names(index, "portal", limit=2), ["Portal", "Portal Prelude"])
+        self.assertEqual(self.names(index, "rev"), ["Revolution"])
+        self.assertEqual(self.names(index, "half"), [])
+
+    def test_snapshot_scan_stops_at_the_limit(self):
+        update_title_index(upserts=[(appid, f"Mod {appid}") for appid in range(6, 12)])
+        index = self.live()
+        with mock.patch.object(TitleIndex, "name", autospec=True, side_effect=TitleIndex.name) as name:
+            self.assertEqual(self.names(index, "portal", limit=1), ["Portal"])
+        # the snapshot's matches are read one by one, not up to limit + len(changes) ahead
+        self.assertEqual(name.call_count, 1)
+
+    def test_refresh_reads_only_the_new_lines(self):
+        index = self.live()
+        update_title_index(deletes=[1])
+        self.assertTrue(index.refresh())
+        self.assertEqual(self.names(index, "portal"), ["Portal 2", "Portal: Revolution"])
+        update_title_index(upserts=[(1, "Portal")])
+        self.assertTrue(index.refresh())
+        self.assertEqual(self.names(index, "portal"), ["Portal", "Portal 2", "Portal: Revolution"])
+
+    def test_compaction_writes_the_journal_into_the_snapshot(self):
+        update_title_index(upserts=[(3, "Portal Prelude")], deletes=[2])
+        stale = self.live()
+        self.assertEqual(compact_title_index(), 4)
+        self.assertEqual(os.path.getsize(journal_path(self.path)), 0)
+        index = TitleIndex(self.path)
+        self.addCleanup(index.close)
+        self.assertEqual([appid for _, appid, _ in index], [4, 1, 3, 5])
+        # the journal was replaced, the reader has to map the new snapshot
+        self.assertFalse(stale.refresh())
+        self.assertEqual(self.names(self.live(), "portal"), ["Portal", "Portal Prelude", "Portal: Revolution"])
+
+    def test_writer_compacts_a_large_journal(self):
+        with mock.patch.object(titleindex, "JOURNAL_COMPACT_BYTES", 10):
+            update_title_index(upserts=[(6, "Portal Stories: Mel")])
+        self.assertEqual(os.path.getsize(journal_path(self.path)), 0)
+        index = TitleIndex(self.path)
+        self.addCleanup(index.close)
+        self.assertEqual(len(index), 6)
+
+    def test_nothing_is_journaled_without_a_snapshot(self):
+        os.remove(self.path)
+        os.remove(journal_path(self.path))
+        update_title_index(upserts=[(6, "Portal Stories: Mel")])
+        self.assertFalse(os.path.exists(journal_path(self.path)))
+
+    @mock.patch.object(titleindex, "RELOAD_CHECK_SECONDS", 0)
+    @mock.patch.object(titleindex, "_loaded", None)
+    def test_get_title_index_follows_the_journal_and_reloads_the_snapshot(self):
+        index = get_title_index()
+        self.assertEqual(self.names(index, "portal"), ["Portal", "Portal 2", "Portal: Revolution"])
+        update_title_index(deletes=[2])
+        self.assertIs(get_title_index(), index)
+        self.assertEqual(self.names(index, "portal"), ["Portal", "Portal: Revolution"])
+
+        compact_title_index()
+        reloaded = get_title_index()
+        self.assertIsNot(reloaded, index)
+        self.assertEqual(self.names(reloaded, "portal"), ["Portal", "Portal: Revolution"])
+
+        os.remove(self.path)
+        self.assertIsNone(get_title_index())
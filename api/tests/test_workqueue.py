@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from ..models import CrawlTask
+from ..workqueue import MAX_ATTEMPTS, claim_batch, complete, enqueue_backlog
+from .base import CatalogTestCase
+
+
+class ClaimBatchTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ingest("Portal", "Half-Life", "Team Fortress")
+        enqueue_backlog()
+
+    def test_claimed_tasks_are_not_handed_out_twice(self):
+        first = claim_batch("a", size=2)
+        second = claim_batch("b", size=2)
+        self.assertEqual(first, [1, 2])
+        self.assertEqual(second, [3])
+        self.assertEqual(claim_batch("c", size=2), [])
+
+    def test_expired_lease_goes_back_to_the_queue(self):
+        self.assertEqual(claim_batch("a", size=3), [1, 2, 3])
+        CrawlTask.objects.filter(pk=2).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(claim_batch("b", size=3), [2])
+        task = CrawlTask.objects.get(pk=2)
+        self.assertEqual((task.claimed_by, task.attempts), ("b", 2))
+
+    def test_complete_only_touches_the_nodes_own_tasks(self):
+        claim_batch("a", size=3)
+        CrawlTask.objects.filter(pk=3).update(attempts=MAX_ATTEMPTS)
+        complete("b", done=[1])
+        complete("a", done=[1], failed=[2, 3])
+        self.assertEqual(
+            list(CrawlTask.objects.order_by("pk").values_list("status", "claimed_by")),
+            [(CrawlTask.DONE, "a"), (CrawlTask.PENDING, ""), (CrawlTask.FAILED, "a")],
+        )
+        self.assertEqual(claim_batch("b", size=3), [2])
@@ -0,0 +1,332 @@
+import bisect
+import fcntl
+import heapq
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from itertools import islice, takewhile
+
+from django.conf import settings
+
+from .models import SteamGame, normalize_name
+
+MAGIC = b"STIDX001"
+# magic, number of titles, size of the key blob, size of the name blob
+HEADER = struct.Struct("<8sIII")
+RELOAD_CHECK_SECONDS = 2.0
+# Past this size the journal is merged into a new snapshot by the writer that grew it
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+
+def snapshot_path():
+    return getattr(settings, "TITLE_INDEX_PATH", None)
+
+
+def journal_path(path):
+    # changes made since the snapshot was written, one JSON line each: [appid, name] or [appid, null] for a delete
+    return f"{path}.journal"
+
+
+class TitleIndex:
+    """
+    Read-only, memory-mapped appid -> name index sorted by normalized name.
+
+    File layout: header | appids (uint32 x n) | key offsets (uint32 x n+1) | name offsets (uint32 x n+1) | keys | names.
+    Keys are the UTF-8 encoded normalize_name() values, sorted bytewise, so a prefix lookup is a binary search.
+    The arrays are memoryviews over the mapping: every worker mapping the same file shares the page cache copy.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, key_size, name_size = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a title index snapshot")
+        view = memoryview(self.mm)
+        offset = HEADER.size
+        self.appids = view[offset:offset + 4 * self.count].cast("I")
+        offset += 4 * self.count
+        self.key_offsets = view[offset:offset + 4 * (self.count + 1)].cast("I")
+        offset += 4 * (self.count + 1)
+        self.name_offsets = view[offset:offset + 4 * (self.count + 1)].cast("I")
+        offset += 4 * (self.count + 1)
+        self.keys_start = offset
+        self.names_start = offset + key_size
+
+    def __len__(self):
+        return self.count
+
+    def key(self, i):
+        return self.mm[self.keys_start + self.key_offsets[i]:self.keys_start + self.key_offsets[i + 1]]
+
+    def name(self, i):
+        return self.mm[self.names_start + self.name_offsets[i]:self.names_start + self.name_offsets[i + 1]].decode()
+
+    def __iter__(self):
+        """
+        Yields (key bytes, appid, name) in index order.
+        """
+        for i in range(self.count):
+            yield self.key(i), self.appids[i], self.name(i)
+
+    def scan(self, needle, skip=()):
+        """
+        Yields the (key bytes, appid, name) entries whose key starts with the encoded `needle`, in index order,
+        leaving out the appids in `skip`. Lazy: the caller stops reading once it has enough.
+        """
+        i = bisect.bisect_left(_KeyView(self), needle)
+        while i < self.count:
+            key = self.key(i)
+            if not key.startswith(needle):
+                return
+            appid = self.appids[i]
+            if appid not in skip:
+                yield key, appid, self.name(i)
+            i += 1
+
+    def prefix(self, prefix, limit=10):
+        """
+        Up to `limit` {"appid", "name"} dicts whose normalized name starts with `prefix`, in alphabetical order.
+        """
+        needle = normalize_name(prefix).encode()
+        if not needle:
+            return []
+        return [{"appid": appid, "name": name} for _, appid, name in islice(self.scan(needle), limit)]
+
+    def close(self):
+        for view in (self.appids, self.key_offsets, self.name_offsets):
+            view.release()
+        self.mm.close()
+
+
+class _KeyView:
+    """
+    Sequence of the index keys, just enough for bisect.
+    """
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return self.index.count
+
+    def __getitem__(self, i):
+        return self.index.key(i)
+
+
+def write_snapshot(path, entries):
+    """
+    Write (key bytes, appid, name) entries, already sorted by key, to `path`. The file is written next to the
+    target and renamed over it, so processes that have the old snapshot mapped keep a consistent view.
+    """
+    appids = array("I")
+    key_offsets = array("I", [0])
+    name_offsets = array("I", [0])
+    keys = bytearray()
+    names = bytearray()
+    for key, appid, name in entries:
+        appids.append(appid)
+        keys += key
+        names += name.encode()
+        key_offsets.append(len(keys))
+        name_offsets.append(len(names))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(appids), len(keys), len(names)))
+        for part in (appids, key_offsets, name_offsets):
+            f.write(part.tobytes())
+        f.write(keys)
+        f.write(names)
+    os.replace(tmp_path, path)
+    return len(appids)
+
+
+class _Lock:
+    """
+    Exclusive flock next to the snapshot, so two writers never merge into the same snapshot at once.
+    """
+    def __init__(self, path):
+        self.path = f"{path}.lock"
+
+    def __enter__(self):
+        self.file = open(self.path, "w")
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+def _reset_journal(path):
+    # a new file rather than a truncation: a reader that sees another inode knows to start over
+    tmp_path = f"{journal_path(path)}.{os.getpid()}.tmp"
+    open(tmp_path, "w").close()
+    os.replace(tmp_path, journal_path(path))
+
+
+def _read_journal(f):
+    """
+    {appid: name or None} of the complete lines of an open journal, from its current position on. Returns it with
+    the number of bytes consumed, a line still being appended is left for the next read.
+    """
+    data = f.read()
+    end = data.rfind(b"\n") + 1
+    changes = {}
+    for line in data[:end].splitlines():
+        appid, name = json.loads(line)
+        changes[appid] = name
+    return changes, end
+
+
+def build_title_index(path=None):
+    """
+    Full rebuild of the snapshot from the SteamGame table, with an empty journal. Returns the number of titles written.
+    """
+    path = path or snapshot_path()
+    rows = SteamGame.objects.live().values_list("appid", "name").iterator(chunk_size=5000)
+    entries = sorted((normalize_name(name).encode(), appid, name) for appid, name in rows)
+    with _Lock(path):
+        count = write_snapshot(path, entries)
+        _reset_journal(path)
+        return count
+
+
+def _compact(path):
+    # caller holds the lock
+    try:
+        with open(journal_path(path), "rb") as f:
+            changes, _ = _read_journal(f)
+    except FileNotFoundError:
+        changes = {}
+    new_entries = sorted(
+        (normalize_name(name).encode(), appid, name) for appid, name in changes.items() if name is not None
+    )
+    index = TitleIndex(path)
+    try:
+        old_entries = (entry for entry in index if entry[1] not in changes)
+        count = write_snapshot(path, heapq.merge(old_entries, new_entries))
+    finally:
+        index.close()
+    _reset_journal(path)
+    return count
+
+
+def compact_title_index(path=None):
+    """
+    Merge the journal into a new snapshot, without reading the table. Returns the number of titles written.
+    """
+    path = path or snapshot_path()
+    with _Lock(path):
+        return _compact(path)
+
+
+def update_title_index(upserts=(), deletes=(), path=None):
+    """
+    Record SteamGame changes for the title index: `upserts` are (appid, name) pairs, `deletes` appids. They are
+    appended to the journal next to the snapshot, which costs the size of the change, not of the catalog; the
+    writer that grows the journal past JOURNAL_COMPACT_BYTES merges it into a new snapshot.
+    Does nothing when no snapshot has been built.
+    """
+    path = path or snapshot_path()
+    if not path or not os.path.exists(path) or not (upserts or deletes):
+        return
+    lines = [json.dumps([appid, None]) for appid in deletes] + [json.dumps([appid, name]) for appid, name in upserts]
+    with _Lock(path):
+        with open(journal_path(path), "a") as f:
+            f.write("\n".join(lines) + "\n")
+            size = f.tell()
+        if size > JOURNAL_COMPACT_BYTES:
+            _compact(path)
+
+
+class LiveTitleIndex:
+    """
+    A mapped TitleIndex snapshot with the journal written since applied on top, what get_title_index() hands out.
+    The journal is kept small by the compaction, so its changes live in a dict and a sorted list.
+    """
+    def __init__(self, path):
+        self.snapshot = TitleIndex(path)
+        self.path = path
+        self.journal_inode = None
+        self.offset = 0
+        # appid -> name, None for a deleted game; these appids are skipped in the snapshot
+        self.changes = {}
+        self.entries = []
+
+    def refresh(self):
+        """
+        Read what was appended to the journal since the last call. False when the journal was replaced
+        (compaction or rebuild), the caller then maps the new snapshot.
+        """
+        try:
+            f = open(journal_path(self.path), "rb")
+        except FileNotFoundError:
+            return self.journal_inode is None
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            if self.journal_inode is None and self.offset == 0:
+                self.journal_inode = inode
+            elif inode != self.journal_inode:
+                return False
+            f.seek(self.offset)
+            changes, consumed = _read_journal(f)
+        if changes:
+            self.offset += consumed
+            self.changes.update(changes)
+            self.entries = sorted(
+                (normalize_name(name).encode(), appid, name) for appid, name in self.changes.items() if name is not None
+            )
+        return True
+
+    def prefix(self, prefix, limit=10):
+        """
+        Same as TitleIndex.prefix(), journal included.
+        """
+        needle = normalize_name(prefix).encode()
+        if not needle:
+            return []
+        # the journal's appids are skipped in the snapshot, both streams are sorted by key: merge until `limit`
+        i = bisect.bisect_left(self.entries, (needle,))
+        journal = takewhile(lambda entry: entry[0].startswith(needle), islice(self.entries, i, None))
+        matches = heapq.merge(self.snapshot.scan(needle, skip=self.changes), journal)
+        return [{"appid": appid, "name": name} for _, appid, name in islice(matches, limit)]
+
+    def close(self):
+        self.snapshot.close()
+
+
+_loaded = None
+_checked_at = 0.0
+_load_lock = threading.Lock()
+
+
+def get_title_index():
+    """
+    The process-wide LiveTitleIndex, or None when no snapshot exists. Every few seconds the snapshot file is
+    stat'ed and the journal read: new journal lines are applied, a new snapshot is mapped in place of the old one.
+    """
+    global _loaded, _checked_at
+    path = snapshot_path()
+    if not path:
+        return None
+    now = time.monotonic()
+    if _loaded is not None and now - _checked_at < RELOAD_CHECK_SECONDS:
+        return _loaded
+    with _load_lock:
+        _checked_at = now
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            _loaded = None
+            return None
+        current = _loaded.snapshot.stat if _loaded is not None else None
+        if current is None or (stat.st_ino, stat.st_mtime_ns) != (current.st_ino, current.st_mtime_ns) \
+                or not _loaded.refresh():
+            # the previous mapping is left to the garbage collector, a request may still be reading it
+            _loaded = LiveTitleIndex(path)
+            _loaded.refresh()
+        return _loaded
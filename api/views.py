@@ -1,142 +1,163 @@
-from django.shortcuts import render
-from .models import SteamGame, SteamGameDetail
+from django.shortcuts import get_object_or_404, render
+from django.template.loader import render_to_string
+from .models import AppDetailsArchive, FetchJob, SteamGame, SteamGameDetail
+from .cache import cached_game_response
+from .changes import changes_page
+from .facets import browse, facet_counts
+from .serializers import DEFAULT_DETAIL_FIELDS, DEFAULT_LIST_FIELDS, FieldError, dumps, game_rows, json_response, parse_fields
+from .ingest import APP_LIST_TIMEOUT, NOT_A_GAME, app_list_url, delete_games, iter_app_list, ingest_app_list, store_app_details
+from .steam import APP_DETAILS_BURST, AsyncSteamClient, SteamAPIError, SteamClient
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, STEAM_HOOKS
+from .crawler import backlog_queryset, crawl_async
+from .workqueue import create_fetch_job, job_status, queue_status
+from .pagination import MAX_PAGE_SIZE, int_param, keyset_page, stream_csv
+from .stats import catalog_stats
+from .search import DEFAULT_LIMIT as SEARCH_LIMIT, MAX_LIMIT as SEARCH_MAX_LIMIT, autocomplete, search_games
+from .sync import sync_catalog
+from .titleindex import get_title_index, update_title_index
+import asyncio
+import time
+
 import requests
-import json
-from django.http import HttpResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views import View
-from functools import reduce
-from django.db import models
-from operator import or_
+from django.db import DatabaseError
 
 # Create your views here.
+# Steam store API client shared by the views: keep-alive pool, single-flight requests and a short response cache
+steam_client = SteamClient()
+# Its asyncio counterpart for the async views, sharing the response cache: under ASGI one pooled connection set
+# per process carries every in-flight Steam call
+async_steam_client = AsyncSteamClient(steam_client)
+# The only columns the game list templates render
+GAME_LIST_FIELDS = ('appid', 'name', 'has_details')
+
 """
-Simple function-based view to list all the games and their details if available.
+Simple function-based view to list the games a page at a time (?after=<appid>&page_size=<n>), or the whole catalog as a streamed CSV with ?export=1.
 """
 def game_list(request):
-    games = SteamGame.objects.all()
-    return render(request, 'game_list.html', {'games': games})
+    if request.GET.get('export'):
+        return stream_csv(SteamGame.objects.live(), GAME_LIST_FIELDS, 'games.csv')
+    games, next_cursor = keyset_page(SteamGame.objects.live().only(*GAME_LIST_FIELDS), request)
+    return render(request, 'api/game_list.html', {'games': games, 'next_cursor': next_cursor})
+
+
+"""
+View for a single game and its details. The page is cached per game (see api.cache) until the game changes,
+and supports conditional GET with ETag.
+"""
 def game_detail(request, appid):
-    game = SteamGame.objects.get(appid=appid)
-    details = None
-    if game.has_details:
-        details = SteamGameDetail.objects.get(steam_game=game)
-    return render(request, 'game_detail.html', {'game': game, 'details': details})
+    def render_page():
+        # One query: the details come through the join on the reverse OneToOne
+        game = get_object_or_404(SteamGame.objects.select_related('details'), appid=appid)
+        details = getattr(game, 'details', None) if game.has_details else None
+        return render_to_string('api/game_detail.html', {'game': game, 'details': details}).encode()
+    return cached_game_response(request, appid, 'html', render_page)
 
 
 """
-API View to get the list of games from the steam database api endpoint
+API View to get the list of games from the steam database api endpoint.
+With ?incremental=1 it runs the incremental sync instead (see api.sync): changed apps get their details refreshed and apps gone from Steam are tombstoned.
 """
 def fetch_games(request):
-    url = "https://api.steampowered.com/ISteamApps/GetAppList/v2/"
-    response = requests.get(url)
+    try:
+        response = requests.get(app_list_url(), stream=True, timeout=APP_LIST_TIMEOUT, hooks=STEAM_HOOKS)
+    except requests.RequestException:
+        return HttpResponse("Failed to fetch games from the API.", status=502)
     if response.status_code == 200:
-        data = response.json()
-        # Parsing the data to a python dictionary
-        data_dict = data.get("applist", {})
-        app_list = data_dict.get("apps", []) 
-        for app in app_list:
-            appid = app["appid"]
-            name = app["name"]
-            # Check if the game already exists in the database
-            if not SteamGame.objects.filter(appid=appid).exists():
-                SteamGame.objects.create(appid=appid, name=name)
-        return HttpResponse("Games fetched and stored successfully.") 
+        # Parse the app list while it downloads and diff it against the database in batches
+        apps = iter_app_list(response.iter_content(chunk_size=64 * 1024))
+        try:
+            if request.GET.get('incremental'):
+                run = sync_catalog(apps)
+                return HttpResponse(
+                    f"Catalog sync {run.pk} done. Added {run.added}, changed {run.changed}, "
+                    f"removed {run.removed}, unchanged {run.unchanged}."
+                )
+            stats = ingest_app_list(apps)
+        except requests.RequestException:
+            # the download stalled or broke off halfway, the batches already written stay
+            return HttpResponse("The app list download from the API failed midway.", status=502)
+        return HttpResponse(
+            f"Games fetched and stored successfully. "
+            f"Inserted {stats['inserted']}, updated {stats['updated']}, unchanged {stats['unchanged']}."
+        )
     else:
         return HttpResponse("Failed to fetch games from the API.", status=500)
 
 
 """
-API View to get the details of a specific game from the steam database api endpoint
+API View to get the details of a specific game from the steam database api endpoint.
+Async: the Steam call doesn't hold a worker thread while it waits.
 """
-def fetch_game_details(request, appid):
-    url = f"https://store.steampowered.com/api/appdetails?appids={appid}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        app_data = data.get(str(appid), {})
-        if app_data.get("success"):
-            details = app_data.get("data", {})
-            game = SteamGame.objects.get(appid=appid)
-            # first check if it's a non-game or game
-            if details.get("type", "") != "game":
-                print("not a game")
-                # delete the game from the SteamGame model if it exists and return a message
-                game.delete()
-                return HttpResponse(f"AppID {appid} is not a game. Deleted from database.")
-            # Check if details already exist
-            if not SteamGameDetail.objects.filter(steam_game=game).exists():
-                try:
-                    SteamGameDetail.objects.create(
-                        name=details.get("name", ""),
-                        steam_game=game,
-                        is_game=details.get("type", "") == "game",
-                        required_age=details.get("required_age", ""),
-                        header_image=details.get("header_image", ""),# header image for the game to be used in the frontend
-                        about_the_game=details.get("short_description", ""),
-                        is_free=details.get("is_free", False),
-                        developers=", ".join(details.get("developers", [])),
-                        genres=", ".join([genre["description"] for genre in details.get("genres", [])])
-                        categories=details.get("categories", []),
-                    )
-                    game.has_details = True
-                    game.save()
-                except:
-                    return HttpResponse(f"Failed to store details for game {appid}.", status=500)
-
-            return HttpResponse(f"Details for game {appid} fetched and stored successfully.")
-        else:
-            return HttpResponse(f"No details found for game {appid}.", status=404)
-    else:
+async def fetch_game_details(request, appid):
+    try:
+        details = await async_steam_client.app_details(appid)
+    except SteamAPIError:
         return HttpResponse("Failed to fetch game details from the API.", status=500)
+    if details is None:
+        return HttpResponse(f"No details found for game {appid}.", status=404)
+    game = await SteamGame.objects.filter(appid=appid).afirst()
+    if game is None:
+        return HttpResponse(f"Game {appid} is not in the database.", status=404)
+    try:
+        # the archive, the tags and the cache version are written in one transaction, which needs the sync ORM
+        outcome = await sync_to_async(store_app_details)(game, details)
+    except DatabaseError:
+        return HttpResponse(f"Failed to store details for game {appid}.", status=500)
+    if outcome == NOT_A_GAME:
+        await sync_to_async(update_title_index)(deletes=[appid])
+        return HttpResponse(f"AppID {appid} is not a game. Deleted from database.")
+    return HttpResponse(f"Details for game {appid} fetched and stored successfully.")
 
 
 """
 API View to delete all the non games from the database both from SteamGame and SteamGameDetail models.
+With ?dry_run=1 nothing is deleted, the view only reports how many games would be.
 """
 def delete_non_games(request):
-    non_games = SteamGameDetail.objects.filter(is_game=False)
-    count = non_games.count()
-    for detail in non_games:
-        # Delete the associated SteamGame entry
-        detail.steam_game.delete()
-        # Delete the SteamGameDetail entry
-        detail.delete()
-    return HttpResponse(f"Deleted {count} non-game entries from the database.")
+    non_games = SteamGame.objects.filter(details__is_game=False)
+    if request.GET.get('dry_run'):
+        return HttpResponse(f"Would delete {catalog_stats()['detail_non_games']} non-game entries from the database.")
+    # Set-based delete, the details go with the games through the cascade
+    deleted = delete_games(non_games)
+    return HttpResponse(f"Deleted {len(deleted)} non-game entries from the database.")
 
 
 """
-Api view to delete obvious non-games like DLCs, soundtracks, etc from SteamGameDetail model.
+Api view to delete obvious non-games like DLCs, soundtracks, etc. The names are classified when fetch_games ingests them
+(see api.classify), so this is a single delete on the indexed is_non_game flag.
+With ?dry_run=1 nothing is deleted, the view reports how many games each keyword would remove instead.
 """
 def delete_obvious_non_games(request):
-    non_game_keywords = ['DLC', 'Soundtrack', 'Demo', 'Video', 'Comic', 'Guide', 'Tool', 'Driver', 'Theme', 'Server', 'Patch', 'Mod', 'Beta', 'Update', 'winui', 'steamworks', 'steamclient', 'vr', 'vrchat', 'vr game', 'vr experience', 'vr app', 'vr demo', 'steam', 'source', 'sdk', 'workshop', 'editor', 'map', 'level', 'plugin', 'addon', 'extension', 'utility', 'application', 'app', 'software', 'framework', 'library', 'engine', 'platform', 'service', 'toolkit', 'package', 'bundle', 'collection', 'playtest', 'test', 'testing', 'experiment', 'experimental', 'prototype', 'concept', 'idea', 'vision', 'demo reel', 'showcase', 'preview', 'trailer', 'teaser', 'clip', 'footage', 'sneak peek', 'behind the scenes', 'making of', 'interview', 'featurette', 'documentary', 'deleted scenes', 'client', 'server', 'multiplayer', 'singleplayer', 'co-op', 'cooperative', 'online', 'offline', 'lan', 'local', 'cross-platform', 'crossplay', 'modding', 'customization', 'skins', 'themes', 'avatars', 'emotes', 'badges', 'achievements', 'leaderboards', 'stats', 'progression', 'inventory', 'marketplace', 'trading', 'economy', 'currency', 'microtransactions', 'in-app purchases', 'pack']
-    q = SteamGame.objects.filter(
-        reduce(or_, (models.Q(name__icontains=kw) for kw in non_game_keywords))
+    non_games = SteamGame.objects.filter(is_non_game=True)
+    if request.GET.get('dry_run'):
+        stats = catalog_stats()
+        lines = [f"{reason}: {total}" for reason, total in stats['non_game_reasons'].items()]
+        return HttpResponse(
+            "\n".join([f"Would delete {stats['non_games']} obvious non-game entries from the database."] + lines),
+            content_type="text/plain",
         )
-    count = q.count()
-    for game in q:
-        if game.has_details:
-            try:
-                detail = SteamGameDetail.objects.get(steam_game=game)
-                detail.delete()
-            except SteamGameDetail.DoesNotExist:
-                pass
-        game.delete()
-    return HttpResponse(f"Deleted {count} obvious non-game entries from the database.")
+    deleted = delete_games(non_games)
+    return HttpResponse(f"Deleted {len(deleted)} obvious non-game entries from the database.")
 
 
 """
-Api view to get the record from a get parameter and search the SteamGame model for matching names. And automatically fetch details for those games if not already present.
+Api view to get the record from a get parameter and search the SteamGame model for matching names, best matches first and typos tolerated.
+Games without details are queued for the crawler workers (`manage.py crawl_details --distributed --no-backlog --poll 5`),
+the page answers right away with the id of the job, its progress is at /fetch-jobs/<id>/. ?limit= caps the number of results.
 """
-def search_and_fetch(request):
+async def search_and_fetch(request):
     if request.method == "GET":
         query = request.GET.get('q', '')
         if query:
-            games = SteamGame.objects.filter(name__icontains=query)
-            for game in games:
-                if not game.has_details:
-                    fetch_game_details(request, game.appid)
+            games = await sync_to_async(search_games)(query, limit=int_param(request, 'limit', SEARCH_LIMIT))
+            missing = [game.appid for game in games if not game.has_details]
+            job = await sync_to_async(create_fetch_job)(missing, query=query) if missing else None
             # This will be replaced with a json response in the future
-            return render(request, 'api/game_list.html', {'games': games})
+            return render(request, 'api/game_list.html', {'games': games, 'job': job})
         else:
             return HttpResponse("No search query provided.", status=400)
     else:
@@ -144,39 +165,244 @@ def search_and_fetch(request):
 
 
 """
-API view to fetch details for all games that do not have details yet.
+API view reporting the progress of a detail fetch job queued by a search.
+"""
+def fetch_job_status(request, job_id):
+    job = FetchJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'error': f"Job {job_id} does not exist."}, status=404)
+    return JsonResponse(job_status(job))
+
+
+"""
+API view for search-as-you-type: games whose name starts with ?q=, as json.
+Answered from the memory-mapped title index when a snapshot was built (manage.py build_title_index), from the database otherwise.
+"""
+def search_autocomplete(request):
+    prefix = request.GET.get('q', '')
+    limit = max(1, min(int_param(request, 'limit', 10), SEARCH_MAX_LIMIT))
+    title_index = get_title_index()
+    if title_index is not None:
+        results = title_index.prefix(prefix, limit=limit)
+    else:
+        results = autocomplete(prefix, limit=limit)
+    return JsonResponse({'query': prefix, 'results': results})
+
+
+"""
+API view to fetch details for the next ?limit= (100 by default) games that do not have details yet.
+The first APP_DETAILS_BURST go out concurrently on the shared async client (?concurrency=, 100 by default) while the request
+waits, paced by the process-wide token bucket; the rest of the slice is queued for the crawler workers as a fetch job.
+"""
+async def fetch_details_for_all(request):
+    # A full backfill takes far longer than a web request, run `manage.py crawl_details` for that.
+    # Past the token bucket's burst every fetch waits 1.5 s for a token, so the view only crawls what the burst covers.
+    limit = max(0, int_param(request, 'limit', 100))
+    appids = [appid async for appid in backlog_queryset().order_by('appid').values_list('appid', flat=True)[:limit]]
+    inline, queued = appids[:APP_DETAILS_BURST], appids[APP_DETAILS_BURST:]
+    job = await sync_to_async(create_fetch_job)(queued) if queued else None
+    stats = await crawl_async(async_steam_client, appids=inline, concurrency=int_param(request, 'concurrency', 100))
+    message = (
+        f"Fetched details for {stats.processed} games without details "
+        f"({stats.stored} stored, {stats.errors} errors, {stats.remaining} left)."
+    )
+    if job is not None:
+        message += f" Queued {len(queued)} more for the crawler workers, follow them at /fetch-jobs/{job.pk}/."
+    return HttpResponse(message)
+
+
+"""
+API view returning the current Steam price of several games at once: /game-prices/?appids=10,20,30.
+The appids are sent to Steam in concurrent batches, free games and unknown appids come back as null.
+"""
+async def game_prices(request):
+    try:
+        appids = [int(appid) for appid in request.GET.get('appids', '').split(',') if appid.strip()]
+    except ValueError:
+        return JsonResponse({'error': "appids must be a comma separated list of numbers."}, status=400)
+    if not appids:
+        return JsonResponse({'error': "No appids provided."}, status=400)
+    try:
+        prices = await async_steam_client.app_prices(appids)
+    except SteamAPIError:
+        return JsonResponse({'error': "Failed to fetch prices from the API."}, status=502)
+    return JsonResponse({str(appid): price for appid, price in prices.items()})
+
+
+"""
+API view reporting the distributed crawl queue: tasks per status and the progress of every crawler node.
+"""
+def crawl_status(request):
+    return JsonResponse(queue_status())
+
+
+"""
+Prometheus scrape endpoint: request latency and ORM query histograms, Steam API latency per status code and crawler
+progress. The counters live in each server process, so every worker is scraped on its own.
+"""
+def metrics(request):
+    return HttpResponse(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+
+"""
+Change feed for incremental consumers: /api/changes/?after=<seq>&page_size=<n>&fields=... returns the games inserted,
+updated or deleted since the `after` cursor, oldest first, each with its current row ("op": "upsert") or "op": "delete".
+Keep `cursor` from the answer and pass it as ?after= next time; `more` says another page is ready right away.
+Starting from 0 reads the whole catalog once. The log only keeps the latest entry of every game and delivery is best-effort
+under long write transactions, see api.changes.changes_page.
+"""
+def api_changes(request):
+    try:
+        fields = parse_fields(request, DEFAULT_LIST_FIELDS)
+    except FieldError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    size = max(1, min(int_param(request, 'page_size', 100), MAX_PAGE_SIZE))
+    rows, cursor, more = changes_page(max(0, int_param(request, 'after', 0)), size, fields)
+    return json_response(request, {'results': rows, 'cursor': cursor, 'more': more})
+
+
+"""
+The change feed as Server-Sent Events: /api/changes/stream/?after=<seq>&fields=... sends every entry as a `change`
+event whose id is its seq, then polls the log for new ones. The stream ends after CHANGE_FEED_STREAM_SECONDS, the
+EventSource reconnects by itself and resumes from the Last-Event-ID header it sends.
+Meant for ASGI: the waiting is an asyncio sleep, not a worker thread.
+"""
+async def api_changes_stream(request):
+    try:
+        fields = parse_fields(request, DEFAULT_LIST_FIELDS)
+    except FieldError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.GET.get('after', 0))
+    except ValueError:
+        after = 0
+    poll = settings.CHANGE_FEED_POLL_SECONDS
+    deadline = time.monotonic() + settings.CHANGE_FEED_STREAM_SECONDS
+    read_page = sync_to_async(changes_page)
+
+    async def events():
+        cursor = max(0, after)
+        yield f"retry: {int(poll * 1000)}\n\n"
+        while time.monotonic() < deadline:
+            rows, cursor, more = await read_page(cursor, MAX_PAGE_SIZE, fields)
+            for row in rows:
+                yield f"id: {row['seq']}\nevent: change\ndata: {dumps(row).decode()}\n\n"
+            if not more:
+                # a comment line keeps proxies from closing an idle stream
+                yield ": idle\n\n"
+                await asyncio.sleep(poll)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx would otherwise buffer the events
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+"""
+Dashboard numbers of the catalog: games, with/without details, free vs paid, removed and non-games per reason,
+plus the per-genre and per-category game counts. Everything is read from maintained counters (api.stats and the
+facet counters), so the answer costs the same few queries whatever the catalog size.
 """
-def fetch_details_for_all(request):
-    games_without_details = SteamGame.objects.filter(has_details=False)
-    count = games_without_details.count()
-    for game in games_without_details:
-        fetch_game_details(request, game.appid)
-    return HttpResponse(f"Fetched details for {count} games without details.")
+def api_stats(request):
+    stats = catalog_stats()
+    facets = facet_counts()
+    stats['genres'] = facets['genres']
+    stats['categories'] = facets['categories']
+    return json_response(request, stats)
 
 
 """
 API view to insert the categories json field that was missing in the fetch_details_for_all function. This will be run only once and for steam games that have details.
+Games whose appdetails payload is archived are rebuilt offline by `manage.py reprocess_details --fields categories`. The view only
+queues the others for a refetch by the crawler workers, which store (and archive) them like any crawled app, and answers with the job.
 """
 def insert_categories(request):
-    games_with_details = SteamGame.objects.filter(has_details=True)
-    count = 0
-    for game in games_with_details:
-        try:
-            detail = SteamGameDetail.objects.get(steam_game=game)
-            url = f"https://store.steampowered.com/api/appdetails?appids={game.appid}"
-            response = requests.get(url)
-            if response.status_code == 200:
-                data = response.json()
-                app_data = data.get(str(game.appid), {})
-                if app_data.get("success"):
-                    details = app_data.get("data", {})
-                    categories = details.get("categories", [])
-                    detail.categories = categories
-                    detail.save()
-                    count += 1
-        except SteamGameDetail.DoesNotExist:
-            return HttpResponse(f"Details for game {game.appid} do not exist.", status=404)
-    return HttpResponse(f"Inserted categories for {count} games.")
+    appids = list(
+        SteamGameDetail.objects.exclude(steam_game_id__in=AppDetailsArchive.objects.values('appid'))
+        .values_list('steam_game_id', flat=True)
+    )
+    rebuild = "run `manage.py reprocess_details --fields categories` to rebuild the archived ones."
+    if not appids:
+        return HttpResponse(f"Every stored detail is archived, {rebuild}")
+    job = create_fetch_job(appids, query='fix-missing-categories', refetch=True)
+    return HttpResponse(
+        f"Queued {len(appids)} games without an archived payload for a refetch, follow them at /fetch-jobs/{job.pk}/. "
+        f"Then {rebuild}"
+    )
+
+
+"""
+JSON API for the frontend. Lists are cursor paginated like the html pages (?after=<appid>&page_size=<n>),
+?fields= picks the columns (sparse fieldsets, see api.serializers.GAME_FIELDS) and the rows are serialized straight
+from .values_list() without building model instances.
+"""
+def api_game_list(request):
+    try:
+        fields = parse_fields(request, DEFAULT_LIST_FIELDS)
+    except FieldError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    rows, next_cursor = keyset_page(SteamGame.objects.live(), request, row_factory=lambda qs: game_rows(qs, fields))
+    return json_response(request, {'results': rows, 'next': next_cursor})
+
+
+def api_game_detail(request, appid):
+    try:
+        fields = parse_fields(request, DEFAULT_DETAIL_FIELDS)
+    except FieldError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    def render_json():
+        rows = game_rows(SteamGame.objects.filter(appid=appid), fields)
+        if not rows:
+            raise Http404(f"Game {appid} does not exist.")
+        return dumps(rows[0])
+    return cached_game_response(request, appid, f"json:{','.join(fields)}", render_json, content_type='application/json')
+
+
+def api_search(request):
+    query = request.GET.get('q', '')
+    if not query:
+        return JsonResponse({'error': "No search query provided."}, status=400)
+    try:
+        fields = parse_fields(request, DEFAULT_LIST_FIELDS)
+    except FieldError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    ranked = search_games(query, limit=int_param(request, 'limit', SEARCH_LIMIT))
+    ranks = {game.appid: game.rank for game in ranked}
+    rows = game_rows(SteamGame.objects.filter(appid__in=ranks), fields)
+    for row in rows:
+        row['rank'] = round(ranks[row['appid']], 4)
+    rows.sort(key=lambda row: (-row['rank'], row['appid']))
+    return json_response(request, {'query': query, 'results': rows})
+
+
+"""
+Faceted browse, e.g. /api/browse/?is_free=1&category=9&genre=RPG&developer=Valve for free co-op RPGs by Valve.
+Returns a page of games (same cursor and ?fields= as /api/games/) and the genre/category/developer facet counts.
+Unfiltered facet counts are the counters kept on the tag rows, filtered ones are counted over the matching games only.
+"""
+def api_browse(request):
+    try:
+        fields = parse_fields(request, DEFAULT_LIST_FIELDS)
+    except FieldError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    is_free = request.GET.get('is_free')
+    filters = {
+        'is_free': None if is_free is None else is_free.lower() in ('1', 'true', 'yes'),
+        'genre': request.GET.get('genre'),
+        'category': int_param(request, 'category', None),
+        'developer': request.GET.get('developer'),
+    }
+    filtered = any(value is not None for value in filters.values())
+    details = browse(**filters)
+    games = SteamGame.objects.live().filter(details__in=details.values('pk'))
+    rows, next_cursor = keyset_page(games, request, row_factory=lambda qs: game_rows(qs, fields))
+    return json_response(request, {
+        'results': rows,
+        'next': next_cursor,
+        'facets': facet_counts(details if filtered else None),
+    })
 
 
 """
@@ -185,5 +411,5 @@ This view however will be converted to an APIView in the future to serve JSON da
 """
 class HomePageView(View):
     def get(self, request):
-        games = SteamGame.objects.all()
-        return render(request, 'api/home.html', {'games': games})
+        games, next_cursor = keyset_page(SteamGame.objects.live().only(*GAME_LIST_FIELDS), request)
+        return render(request, 'api/home.html', {'games': games, 'next_cursor': next_cursor})
@@ -0,0 +1,171 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .ingest import INGEST_BATCH_SIZE, _batched
+from .models import CrawlNode, CrawlTask, FetchJob, SteamGame
+from .stats import track_stats
+
+CLAIM_BATCH_SIZE = 50
+LEASE_SECONDS = 600
+MAX_ATTEMPTS = 5
+# priority of the tasks a user is waiting for, the backlog is queued with 0
+USER_PRIORITY = 10
+
+
+def enqueue_backlog(batch_size=5000):
+    """
+    Add a pending CrawlTask for every game without details that isn't queued yet. Safe to run from several nodes at once.
+    Returns the number of appids looked at.
+    """
+    seen = 0
+    last_appid = 0
+    while True:
+        appids = list(
+            SteamGame.objects.filter(has_details=False, is_removed=False, appid__gt=last_appid, crawl_task__isnull=True)
+            .order_by('appid').values_list('appid', flat=True)[:batch_size]
+        )
+        if not appids:
+            return seen
+        CrawlTask.objects.bulk_create(
+            [CrawlTask(steam_game_id=appid) for appid in appids], ignore_conflicts=True
+        )
+        seen += len(appids)
+        last_appid = appids[-1]
+
+
+def claim_batch(node, size=CLAIM_BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+    """
+    Claim up to `size` appids for `node`. Rows another node is claiming right now are skipped instead of waited on
+    (SELECT ... FOR UPDATE SKIP LOCKED), and tasks whose lease expired are handed out again.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        appids = list(
+            CrawlTask.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=CrawlTask.PENDING) | Q(status=CrawlTask.CLAIMED, lease_expires_at__lt=now))
+            .filter(attempts__lt=MAX_ATTEMPTS)
+            .order_by('-priority', 'pk').values_list('pk', flat=True)[:size]
+        )
+        CrawlTask.objects.filter(pk__in=appids).update(
+            status=CrawlTask.CLAIMED,
+            claimed_by=node,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            attempts=F('attempts') + 1,
+        )
+    return appids
+
+
+def enqueue_appids(appids, priority=USER_PRIORITY, requeue=False):
+    """
+    Queue specific appids ahead of the backlog. Appids already waiting in the queue are not added twice,
+    they are only moved up to `priority`. With `requeue` finished or failed tasks are put back in the queue too,
+    for details that have to be fetched again.
+    """
+    appids = list(appids)
+    CrawlTask.objects.bulk_create(
+        [CrawlTask(steam_game_id=appid, priority=priority) for appid in appids], ignore_conflicts=True
+    )
+    if requeue:
+        CrawlTask.objects.filter(pk__in=appids, status__in=[CrawlTask.DONE, CrawlTask.FAILED]).update(
+            status=CrawlTask.PENDING, attempts=0, claimed_by='', lease_expires_at=None, priority=priority
+        )
+    CrawlTask.objects.filter(
+        pk__in=appids, status__in=[CrawlTask.PENDING, CrawlTask.CLAIMED], priority__lt=priority
+    ).update(priority=priority)
+
+
+def queue_refetch(appids, priority=USER_PRIORITY, batch_size=INGEST_BATCH_SIZE):
+    """
+    Fetch the details of `appids` again: the stored ones are flagged details_stale (so the crawler overwrites them
+    instead of keeping them) and every appid is queued for the crawl workers. Returns the number of appids queued.
+    """
+    queued = 0
+    for batch in _batched(appids, batch_size):
+        with track_stats(batch):
+            SteamGame.objects.filter(appid__in=batch, has_details=True).update(details_stale=True)
+        enqueue_appids(batch, priority=priority, requeue=True)
+        queued += len(batch)
+    return queued
+
+
+def create_fetch_job(appids, query='', refetch=False):
+    """
+    Queue the detail fetch of `appids` and return the FetchJob tracking it. With `refetch` the details already
+    stored are fetched again too (see queue_refetch).
+    """
+    appids = list(appids)
+    if refetch:
+        queue_refetch(appids)
+    else:
+        enqueue_appids(appids)
+    return FetchJob.objects.create(query=query[:255], appids=appids)
+
+
+def job_status(job):
+    """
+    Progress of a FetchJob. A task that is gone was deleted with its non-game, which counts as done.
+    """
+    total = len(job.appids)
+    counts = dict(
+        CrawlTask.objects.filter(pk__in=job.appids).values_list('status').annotate(total=Count('pk'))
+    )
+    waiting = counts.get(CrawlTask.PENDING, 0) + counts.get(CrawlTask.CLAIMED, 0)
+    return {
+        'id': job.pk,
+        'query': job.query,
+        'created_at': job.created_at,
+        'total': total,
+        'pending': counts.get(CrawlTask.PENDING, 0),
+        'running': counts.get(CrawlTask.CLAIMED, 0),
+        'failed': counts.get(CrawlTask.FAILED, 0),
+        'done': total - waiting - counts.get(CrawlTask.FAILED, 0),
+        'status': 'finished' if waiting == 0 else 'running',
+    }
+
+
+def complete(node, done, failed=()):
+    """
+    Finish the tasks of a claimed batch. Failed appids go back to the queue until they run out of attempts.
+    Only tasks still leased by `node` are touched, so a node that lost its lease can't overwrite the new owner.
+    """
+    owned = CrawlTask.objects.filter(claimed_by=node, status=CrawlTask.CLAIMED)
+    if done:
+        owned.filter(pk__in=done).update(status=CrawlTask.DONE, lease_expires_at=None)
+    if failed:
+        owned.filter(pk__in=failed, attempts__gte=MAX_ATTEMPTS).update(status=CrawlTask.FAILED, lease_expires_at=None)
+        owned.filter(pk__in=failed).update(status=CrawlTask.PENDING, claimed_by='', lease_expires_at=None)
+
+
+def record_progress(node, processed, stored, errors, rate):
+    """
+    Add a finished batch to the node's counters, which also works as the node's heartbeat.
+    """
+    updated = CrawlNode.objects.filter(name=node).update(
+        processed=F('processed') + processed,
+        stored=F('stored') + stored,
+        errors=F('errors') + errors,
+        rate=rate,
+        last_seen=timezone.now(),
+    )
+    if not updated:
+        CrawlNode.objects.get_or_create(
+            name=node, defaults={'processed': processed, 'stored': stored, 'errors': errors, 'rate': rate}
+        )
+
+
+def queue_status():
+    """
+    Task counts per status and the progress of every node, newest heartbeat first.
+    """
+    counts = dict(CrawlTask.objects.values_list('status').annotate(total=Count('pk')))
+    return {
+        'tasks': {status: counts.get(status, 0) for status, _ in CrawlTask.STATUS_CHOICES},
+        'nodes': list(
+            CrawlNode.objects.order_by('-last_seen').values(
+                'name', 'started_at', 'last_seen', 'processed', 'stored', 'errors', 'rate'
+            )
+        ),
+    }
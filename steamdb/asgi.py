@@ -3,6 +3,10 @@ ASGI config for steamdb project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn steamdb.asgi:application``): the async
+views then share the worker's event loop and its pooled Steam client
+(``api.views.async_steam_client``), instead of running in a new loop per request.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -82,17 +85,99 @@ Database setup for local development using sqlite3
  }
 """
 
-# Database setup for PostgreSQL
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'steamdb',
-        'USER': 'postgres',
-        'PASSWORD': 'admin1234',# TODO: Use an enviroment variable for the password
-        'HOST': 'localhost',
-        'PORT': '5432',
+# Database setup, from the environment. DB_PROFILE=sqlite selects the local load testing profile below,
+# anything else PostgreSQL.
+DB_PROFILE = os.environ.get('DB_PROFILE', 'postgres')
+# Reads in requests go to these aliases (see api.routers), a client that wrote sticks to the primary this long
+DATABASE_REPLICAS = []
+REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 10))
+# Run on every new SQLite connection (api.routers.configure_sqlite)
+SQLITE_PRAGMAS = []
+
+if DB_PROFILE == 'sqlite':
+    # WAL lets the page readers run next to the crawler's writes instead of waiting on the database lock,
+    # IMMEDIATE transactions take the write lock up front so concurrent writers queue instead of deadlocking
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': None,
+            'OPTIONS': {'timeout': 20, 'transaction_mode': 'IMMEDIATE'},
+        }
+    }
+    SQLITE_PRAGMAS = ['journal_mode=WAL', 'synchronous=NORMAL', 'cache_size=-65536', 'mmap_size=268435456']
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'steamdb'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', 'admin1234'),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'OPTIONS': {},
+        }
     }
+    if os.environ.get('DB_POOL_MAX_SIZE'):
+        # psycopg 3 connection pool per process (pip install "psycopg[pool]"), the right choice under ASGI where
+        # every request runs in its own thread; it replaces persistent connections
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ['DB_POOL_MAX_SIZE']),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+    else:
+        # persistent connections reused by the worker threads, checked before reuse
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    # DB_REPLICA_HOSTS=replica1:5432,replica2 adds one read replica alias per host, same credentials as the primary
+    for index, host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+        host, _, port = host.strip().partition(':')
+        alias = f'replica_{index}'
+        DATABASES[alias] = {
+            **DATABASES['default'],
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'HOST': host,
+            'PORT': port or DATABASES['default']['PORT'],
+            'TEST': {'MIRROR': 'default'},
+        }
+        DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+
+# Steam endpoints, overridden by the benchmark suite to hit its local stand-in
+STEAM_WEB_API_URL = 'https://api.steampowered.com'
+STEAM_STORE_URL = 'https://store.steampowered.com'
+
+# Cache
+# Per-process LRU tier for rendered game pages, entries live a minute. Set CACHE_SHARED_URL (e.g. redis://localhost:6379/1) to add a tier
+# shared by all the processes; it also carries the cache versions, so invalidation then reaches every worker.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'steamdb-local',
+        'TIMEOUT': 60,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
 }
+if os.environ.get('CACHE_SHARED_URL'):
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['CACHE_SHARED_URL'],
+    }
+# How long a rendered game page may be kept in the shared tier
+GAME_CACHE_TIMEOUT = 60 * 60
+
+# Change feed (/api/changes/): entries younger than the settle delay are held back, so a consumer doesn't skip a lower
+# seq whose transaction committed after a higher one. Best-effort only: a write transaction open longer than the delay
+# can still commit below a cursor already handed out, see api.changes.changes_page. SSE streams poll the log and end
+# after STREAM_SECONDS (clients reconnect with Last-Event-ID)
+CHANGE_FEED_SETTLE_SECONDS = 2
+CHANGE_FEED_POLL_SECONDS = 1
+CHANGE_FEED_STREAM_SECONDS = 300
+
+# Memory-mapped autocomplete index shared by all the workers, built with `manage.py build_title_index`
+TITLE_INDEX_PATH = BASE_DIR / 'title_index.bin'
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -28,6 +28,18 @@ urlpatterns = [
     path('delete-non-games/', delete_non_games, name='delete_non_games'),
     path('delete-obvious-non-games/', delete_obvious_non_games, name='delete_obvious_non_games'),
     path('search-games/', search_and_fetch, name='search_games'),
+    path('search-games/autocomplete/', search_autocomplete, name='search_autocomplete'),
     path('fetch-all-game-details/', fetch_details_for_all, name='fetch_all_game_details'),
+    path('fetch-jobs/<int:job_id>/', fetch_job_status, name='fetch_job_status'),
+    path('game-prices/', game_prices, name='game_prices'),
+    path('crawl-status/', crawl_status, name='crawl_status'),
+    path('metrics/', metrics, name='metrics'),
+    path('api/games/', api_game_list, name='api_game_list'),
+    path('api/games/<int:appid>/', api_game_detail, name='api_game_detail'),
+    path('api/search/', api_search, name='api_search'),
+    path('api/browse/', api_browse, name='api_browse'),
+    path('api/stats/', api_stats, name='api_stats'),
+    path('api/changes/', api_changes, name='api_changes'),
+    path('api/changes/stream/', api_changes_stream, name='api_changes_stream'),
     path('fix-missing-categories/', insert_categories, name='fix_missing_categories'),
 ]